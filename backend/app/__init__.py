@@ -1,10 +1,18 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 
 from app.core.config import settings
 from app.core.logging import configure_logging
-from app.core.middleware import RateLimitMiddleware
+from app.core.http import create_github_client
+from app.core.middleware import MetricsMiddleware, RateLimitMiddleware, parse_route_limits
+from app.core.rate_limit_store import create_counter_store
 from app.core.exceptions import (
     validation_exception_handler,
     blog_not_found_handler,
@@ -15,10 +23,40 @@ from app.core.exceptions import (
     AuthenticationException
 )
 
-from app.api.routes.blog import router as blog_router
+from app.api.routes.blog import router as blog_router, blog_service, post_renderer, view_counter
 from app.api.routes.auth import router as auth_router
+from app.api.routes.status import router as status_router
+from app.api.routes.tags import router as tags_router
+from app.api.routes.metrics import router as metrics_router
+from app.api.routes.media import router as media_router, media_store
+from app.api.routes.feeds import router as feeds_router
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One pooled GitHub client per process, shared by every request
+    http_client = create_github_client(app.state.github_transport)
+    app.state.http_client = http_client
+    blog_service.bind_client(http_client)
+    await asyncio.to_thread(blog_service.load_indexes)
+    await asyncio.to_thread(media_store.load)
+    # Replays the gist write-ahead log and starts the writer
+    await blog_service.startup()
+    await view_counter.start()
+    try:
+        yield
+    finally:
+        # Write the views counted since the last flush
+        await view_counter.stop()
+        await blog_service.shutdown()
+        await asyncio.to_thread(post_renderer.shutdown)
+        await asyncio.to_thread(blog_service.save_indexes)
+        await http_client.aclose()
 
-def create_app() -> FastAPI:
+def create_app(github_transport: Optional[httpx.AsyncBaseTransport] = None) -> FastAPI:
+    """
+    Build the API. ``github_transport`` replaces the network transport of the
+    GitHub client, e.g. to serve the gist from benchmarks.fake_gist in-process.
+    """
     # Configure logging
     configure_logging()
 
@@ -28,8 +66,10 @@ def create_app() -> FastAPI:
         version="1.0.0",
         docs_url="/docs",
         redoc_url=None,
-        openapi_url="/openapi.json"
+        openapi_url="/openapi.json",
+        lifespan=lifespan
     )
+    app.state.github_transport = github_transport
 
     # Middleware: CORS
     app.add_middleware(
@@ -38,10 +78,20 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Read by the frontend to resume the change stream from its listing
+        expose_headers=["X-Changes-Version"],
     )
 
     # Middleware: Rate Limiting
-    app.add_middleware(RateLimitMiddleware, requests_per_minute=60)
+    app.add_middleware(
+        RateLimitMiddleware,
+        requests_per_minute=settings.RATE_LIMIT_PER_MINUTE,
+        route_limits=parse_route_limits(settings.RATE_LIMIT_ROUTES),
+        store=create_counter_store(settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_DB_PATH),
+    )
+
+    # Middleware: Metrics and Server-Timing (outermost, so rate-limited requests are counted too)
+    app.add_middleware(MetricsMiddleware)
 
     # Exception Handlers
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
@@ -52,11 +102,18 @@ def create_app() -> FastAPI:
     # Routers
     app.include_router(blog_router, prefix="/api/blog-posts", tags=["Blog"])
     app.include_router(auth_router, prefix="/api", tags=["Auth"])
+    app.include_router(tags_router, prefix="/api", tags=["Blog"])
+    app.include_router(status_router, prefix="/api", tags=["Status"])
+    app.include_router(media_router, tags=["Media"])
+    app.include_router(feeds_router, tags=["Feeds"])
+    app.include_router(metrics_router)
 
     # Health Check
     @app.get("/health")
     async def health_check():
-        return {"status": "healthy", "environment": settings.ENV}
+        backend = blog_service.health()
+        status = "degraded" if backend["degraded"] or backend["stale"] else "healthy"
+        return {"status": status, "environment": settings.ENV, **backend}
 
     # Root Endpoint
     @app.get("/")
@@ -1,35 +1,391 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import TypeAdapter
+from typing import AsyncIterator, List, Dict, Optional
+from datetime import datetime
 
-from app.schemas.blog_schema import BlogCreate, BlogResponse, BlogUpdate
-from app.services.blog.gist_service import GistBlogService
+from app.schemas.blog_schema import (
+    BlogCreate,
+    BlogResponse,
+    BlogUpdate,
+    BlogPage,
+    RenderedBlogResponse,
+    RenderedPost,
+    RelatedPost,
+    PopularPost,
+    SearchResults,
+)
+from app.services.blog.interfaces import PAGE_FIELDS, SUMMARY_FIELDS
+from app.services.blog.changes import sse_frame
+from app.services.blog.indexes import decode_cursor
+from app.services.blog.factory import create_blog_service
+from app.services.blog.renderer import create_post_renderer
+from app.services.blog.views import create_view_counter
 from app.models.blog_model import Blog
 from app.core.dependencies import get_current_admin, optional_admin
+from app.core.exceptions import GistServiceException
+from app.core.metrics import timed
+from app.core.http_cache import cache_headers, is_not_modified, not_modified, variant_etag
+from app.core.response_cache import ResponseCache, check_not_modified, negotiate_encoding
 
 router = APIRouter()
-blog_service = GistBlogService()
+blog_service = create_blog_service()
+
+# Serialized bodies of read responses, keyed by their (uncompressed) ETag
+response_cache = ResponseCache()
+BLOG_MAP_ADAPTER = TypeAdapter(Dict[str, BlogResponse])
+BLOG_ADAPTER = TypeAdapter(BlogResponse)
+RENDERED_MAP_ADAPTER = TypeAdapter(Dict[str, RenderedBlogResponse])
+RENDERED_POST_ADAPTER = TypeAdapter(RenderedPost)
+
+# Markdown renders of post content, keyed by content hash
+post_renderer = create_post_renderer()
+# Post view counts, written to the database in periodic batches
+view_counter = create_view_counter()
+
+# Change-stream version a listing reflects, for GET /changes?since=
+CHANGES_VERSION_HEADER = "X-Changes-Version"
+
+def _with_changes_version(response: Response, version: int) -> Response:
+    response.headers[CHANGES_VERSION_HEADER] = str(version)
+    return response
 
 @router.get("/", response_model=Dict[str, BlogResponse])
-async def get_blogs():
+async def get_blogs(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    tag: Optional[List[str]] = Query(None, description="Only posts with these tags"),
+    match: str = Query("all", pattern="^(all|any)$", description="Require `all` tags or `any` of them"),
+    html: bool = Query(False, description="Also return rendered `html`, `toc` and reading time")
+):
     """
     Get all blog posts. Public endpoint - no authentication required.
+    Pass `limit`/`offset` to page through posts newest first, and `tag` to filter.
+    With `html=true` each post also carries its rendered `html`, `toc`, `word_count`
+    and `reading_time_minutes`.
+    Supports conditional requests via `If-None-Match`/`If-Modified-Since`.
+    The serialized (and compressed) body is reused until the posts change.
+    The `X-Changes-Version` header is the version to pass as `since` to `/changes`.
+    """
+    try:
+        await blog_service.ensure_fresh()
+        versions = blog_service.versions
+        version = versions.corpus_etag()
+        # Read with the corpus ETag: both move together on every change
+        changes_version = blog_service.changes.version
+        etag = variant_etag(version, request.url.path, request.url.query)
+        encoding = negotiate_encoding(request)
+        revalidated = check_not_modified(request, etag, encoding, versions.last_modified)
+        if revalidated is not None:
+            return _with_changes_version(revalidated, changes_version)
+
+        body = response_cache.get(etag)
+        if body is None:
+            if tag:
+                blogs = await blog_service.list_blogs_by_tags(tag, match_all=match == "all")
+                if limit is not None or offset:
+                    blogs = blogs[offset:offset + limit if limit is not None else None]
+            else:
+                blogs = await blog_service.list_blogs(limit=limit, offset=offset)
+            adapter = BLOG_MAP_ADAPTER
+            posts = {str(blog.id): blog for blog in blogs}
+            if html:
+                with timed("render"):
+                    rendered = await asyncio.gather(*(post_renderer.render(blog.content) for blog in blogs))
+                adapter = RENDERED_MAP_ADAPTER
+                posts = {str(blog.id): {**blog.model_dump(), **r} for blog, r in zip(blogs, rendered)}
+            with timed("validation"):
+                validated = adapter.validate_python(posts, from_attributes=True)
+            with timed("serialization"):
+                plain = adapter.dump_json(validated)
+            # Only cache the body if no write landed while it was being built
+            if versions.corpus_etag() != version:
+                response = Response(content=plain, media_type="application/json", headers=cache_headers(etag, versions.last_modified))
+                return _with_changes_version(response, changes_version)
+            body = response_cache.put(etag, plain)
+        return _with_changes_version(body.response(encoding, etag, versions.last_modified), changes_version)
+    except GistServiceException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch blogs: {str(e)}")
+
+@router.get("/page", response_model=BlogPage)
+async def get_blog_page(
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page"),
+    fields: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(PAGE_FIELDS)}"),
+    sort: str = Query("-date", pattern="^-?date$", description="`-date` (newest first) or `date`"),
+    since: Optional[datetime] = Query(None, description="Only posts dated at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only posts dated at or before this time"),
+    tag: Optional[List[str]] = Query(None, description="Only posts with these tags"),
+    match: str = Query("all", pattern="^(all|any)$", description="Require `all` tags or `any` of them")
+):
     """
+    Cursor-paginated post listing. Public endpoint - no authentication required.
+    Returns summary fields unless `fields` asks for `content` or `media`.
+    """
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else list(SUMMARY_FIELDS)
+    unknown = [f for f in selected if f not in PAGE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
     try:
-        blogs = await blog_service.list_blogs()
-        return {str(blog.id): blog for blog in blogs}
+        await blog_service.ensure_fresh()
+        versions = blog_service.versions
+        headers = cache_headers(variant_etag(versions.corpus_etag(), request.url.path, request.url.query), versions.last_modified)
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+        response.headers.update(headers)
+
+        return await blog_service.list_page(
+            limit=limit,
+            cursor=cursor,
+            fields=selected,
+            descending=sort == "-date",
+            since=since.isoformat() if since else None,
+            until=until.isoformat() if until else None,
+            tags=tag,
+            match_all=match == "all"
+        )
+    except GistServiceException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch blogs: {str(e)}")
 
+@router.get("/search", response_model=SearchResults)
+async def search_blogs(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000)
+):
+    """
+    Full-text search over titles, summaries, content and tags.
+    Public endpoint - no authentication required.
+    """
+    try:
+        return await blog_service.search(q, limit=limit, offset=offset)
+    except GistServiceException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
+
+async def _change_events(since: Optional[int]) -> AsyncIterator[bytes]:
+    changes = blog_service.changes
+    changes.clients += 1
+    try:
+        # Reconnect delay for EventSource, then the starting point
+        yield b"retry: 5000\n\n"
+        if since is None:
+            since = changes.version
+            yield sse_frame("version", {"version": since}, since)
+        while True:
+            entries = changes.since(since)
+            if entries is None:
+                since = changes.version
+                yield sse_frame("reset", {"version": since}, since)
+                continue
+            for version, frame in entries:
+                since = version
+                yield frame
+            await changes.wait()
+            if changes.version == since:
+                yield b": keepalive\n\n"
+    finally:
+        changes.clients -= 1
+
+@router.get("/changes")
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, description="Corpus version the client is up to date with")
+):
+    """
+    Server-Sent Events stream of post changes. Public endpoint - no authentication required.
+    Without `since` it starts with a `version` event; afterwards each `change` event carries the
+    new version, summaries of created/updated posts and deleted ids. A `reset` event means the
+    changes since the client's version are no longer kept and it should reload the listing.
+    Reconnecting clients resume from their `Last-Event-ID`.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    try:
+        await blog_service.ensure_fresh()
+    except GistServiceException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load posts: {str(e)}")
+    return StreamingResponse(
+        _change_events(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/popular", response_model=List[PopularPost])
+async def get_popular_blogs(limit: int = Query(10, ge=1, le=50)):
+    """
+    Most viewed posts, most viewed first. Public endpoint - no authentication required.
+    """
+    try:
+        await blog_service.ensure_fresh()
+        summaries = blog_service.summaries.summaries
+        return [
+            {**{field: summaries[post_id].get(field) for field in SUMMARY_FIELDS}, "views": views}
+            for post_id, views in view_counter.top(limit, summaries)
+        ]
+    except (HTTPException, GistServiceException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to rank posts: {str(e)}")
+
+@router.get("/by-slug/{slug}", response_model=BlogResponse)
+async def get_blog_by_slug(
+    slug: str,
+    request: Request,
+    count: bool = Query(True, description="Count this read as a view (`false` for background refetches)")
+):
+    """
+    Get a post by its slug. Public endpoint - no authentication required.
+    A slug the post had before an edit redirects (301) to its current slug.
+    """
+    try:
+        await blog_service.ensure_fresh()
+        found = blog_service.slugs.resolve(slug)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        post_id, current = found
+        target = blog_service.slugs.current_slug(post_id)
+        if not current and target:
+            location = request.url_for("get_blog_by_slug", slug=target)
+            return RedirectResponse(str(location.replace(query=request.url.query)), status_code=301)
+    except (HTTPException, GistServiceException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return await get_blog(int(post_id), request, count=count)
+
+@router.get("/{blog_id}/related", response_model=List[RelatedPost])
+async def get_related_blogs(
+    blog_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(5, ge=1, le=50)
+):
+    """
+    Posts most similar to this one by content (TF-IDF) and tags, best first.
+    Public endpoint - no authentication required.
+    """
+    try:
+        await blog_service.ensure_fresh()
+        versions = blog_service.versions
+        if versions.post_etag(str(blog_id)) is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        # Any post's edit can change the ranking, so validate against the whole corpus
+        headers = cache_headers(variant_etag(versions.corpus_etag(), request.url.path, request.url.query), versions.last_modified)
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+        response.headers.update(headers)
+
+        related = await blog_service.related_posts(str(blog_id), limit=limit)
+        if related is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        return related
+    except (HTTPException, GistServiceException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find related posts: {str(e)}")
+
+@router.get("/{blog_id}/html", response_model=RenderedPost)
+async def get_blog_html(blog_id: int, request: Request):
+    """
+    A post's content rendered to sanitized HTML, with a table of contents and
+    reading time. Public endpoint - no authentication required.
+    Renders are cached by content hash, so only edited posts are rendered again.
+    """
+    try:
+        await blog_service.ensure_fresh()
+        versions = blog_service.versions
+        post_etag = versions.post_etag(str(blog_id))
+        if post_etag is None:
+            raise HTTPException(status_code=404, detail="Blog not found")
+        etag = variant_etag(post_etag, request.url.path)
+        encoding = negotiate_encoding(request)
+        last_modified = versions.modified.get(str(blog_id))
+        revalidated = check_not_modified(request, etag, encoding, last_modified)
+        if revalidated is not None:
+            return revalidated
+
+        body = response_cache.get(etag)
+        if body is None:
+            post = await blog_service.get_post(str(blog_id))
+            if not post:
+                raise HTTPException(status_code=404, detail="Blog not found")
+            with timed("render"):
+                rendered = await post_renderer.render(post.get("content") or "")
+            with timed("validation"):
+                validated = RENDERED_POST_ADAPTER.validate_python({**post, **rendered})
+            with timed("serialization"):
+                plain = RENDERED_POST_ADAPTER.dump_json(validated)
+            if versions.post_etag(str(blog_id)) != post_etag:
+                return Response(content=plain, media_type="application/json", headers=cache_headers(etag, last_modified))
+            body = response_cache.put(etag, plain)
+        return body.response(encoding, etag, last_modified)
+    except (HTTPException, GistServiceException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to render blog: {str(e)}")
+
 @router.get("/{blog_id}", response_model=BlogResponse)
-async def get_blog(blog_id: int):
+async def get_blog(
+    blog_id: int,
+    request: Request,
+    count: bool = Query(True, description="Count this read as a view (`false` for background refetches)")
+):
     """
     Get a specific blog post. Public endpoint - no authentication required.
+    Supports conditional requests via `If-None-Match`/`If-Modified-Since`.
+    Only full (200) reads are counted as views, and only with `count=true`.
     """
     try:
-        blog = await blog_service.get_blog(blog_id)
-        if not blog:
+        await blog_service.ensure_fresh()
+        versions = blog_service.versions
+        etag = versions.post_etag(str(blog_id))
+        if etag is None:
             raise HTTPException(status_code=404, detail="Blog not found")
-        return blog
+        encoding = negotiate_encoding(request)
+        last_modified = versions.modified.get(str(blog_id))
+        revalidated = check_not_modified(request, etag, encoding, last_modified)
+        if revalidated is not None:
+            return revalidated
+
+        body = response_cache.get(etag)
+        if body is None:
+            blog = await blog_service.get_blog(blog_id)
+            if not blog:
+                raise HTTPException(status_code=404, detail="Blog not found")
+            with timed("validation"):
+                validated = BLOG_ADAPTER.validate_python(blog, from_attributes=True)
+            with timed("serialization"):
+                plain = BLOG_ADAPTER.dump_json(validated)
+            if versions.post_etag(str(blog_id)) != etag:
+                if count:
+                    view_counter.record(str(blog_id))
+                return Response(content=plain, media_type="application/json", headers=cache_headers(etag, last_modified))
+            body = response_cache.put(etag, plain)
+        # Revalidations (304) returned above are not views
+        if count:
+            view_counter.record(str(blog_id))
+        return body.response(encoding, etag, last_modified)
+    except (HTTPException, GistServiceException):
+        raise
     except KeyError:
         raise HTTPException(status_code=404, detail="Blog not found")
     except Exception as e:
@@ -45,6 +401,8 @@ async def create_blog(
     """
     try:
         return await blog_service.create_blog(blog)
+    except GistServiceException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create blog: {str(e)}")
 
@@ -63,6 +421,8 @@ async def update_blog(
         if not updated_blog:
             raise HTTPException(status_code=404, detail="Blog not found")
         return updated_blog
+    except (HTTPException, GistServiceException):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to update blog: {str(e)}")
 
@@ -80,5 +440,7 @@ async def delete_blog(
         if not success:
             raise HTTPException(status_code=404, detail="Blog not found")
         return {"message": "Blog deleted successfully"}
+    except (HTTPException, GistServiceException):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete blog: {str(e)}")
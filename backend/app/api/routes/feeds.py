@@ -0,0 +1,95 @@
+from typing import AsyncIterator, Iterator, List
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.routes.blog import blog_service, response_cache
+from app.core.exceptions import GistServiceException
+from app.core.http_cache import cache_headers, variant_etag
+from app.core.response_cache import check_not_modified, negotiate_encoding
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "rss": "application/rss+xml; charset=utf-8",
+    "atom": "application/atom+xml; charset=utf-8",
+    "sitemap": "application/xml; charset=utf-8",
+}
+# Post fragments are batched into writes of about this size while streaming
+STREAM_CHUNK_BYTES = 64 * 1024
+
+async def _stream(chunks: Iterator[str], etag: str, corpus_etag: str) -> AsyncIterator[bytes]:
+    """
+    Send the document in batched writes and keep a copy, which is cached
+    once complete unless the posts changed meanwhile. Runs on the event
+    loop (not in a thread) since it touches the response cache.
+    """
+    parts: List[bytes] = []
+    batch: List[bytes] = []
+    size = 0
+    for chunk in chunks:
+        data = chunk.encode()
+        batch.append(data)
+        size += len(data)
+        if size >= STREAM_CHUNK_BYTES:
+            block = b"".join(batch)
+            parts.append(block)
+            yield block
+            batch, size = [], 0
+    block = b"".join(batch)
+    parts.append(block)
+    yield block
+    if blog_service.versions.corpus_etag() == corpus_etag:
+        response_cache.put(etag, b"".join(parts))
+
+async def _feed_response(kind: str, request: Request):
+    """
+    Serve a feed document for the current corpus version. The first request
+    after a change streams it from the per-post fragments uncompressed;
+    later ones get the cached bytes, compressed if the client accepts it.
+    """
+    try:
+        await blog_service.ensure_fresh()
+        versions = blog_service.versions
+        corpus_etag = versions.corpus_etag()
+        etag = variant_etag(corpus_etag, request.url.path)
+        encoding = negotiate_encoding(request)
+        # A client may hold either the compressed or the streamed uncompressed copy
+        revalidated = check_not_modified(request, etag, encoding, versions.last_modified)
+        if revalidated is not None:
+            return revalidated
+
+        body = response_cache.get(etag)
+        if body is not None:
+            return body.response(encoding, etag, versions.last_modified, MEDIA_TYPES[kind])
+        chunks = await blog_service.feed_document(kind)
+        return StreamingResponse(
+            _stream(chunks, etag, corpus_etag),
+            media_type=MEDIA_TYPES[kind],
+            headers=cache_headers(etag, versions.last_modified)
+        )
+    except (HTTPException, GistServiceException):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to build {kind} document: {str(e)}")
+
+@router.get("/feed.xml")
+async def rss_feed(request: Request):
+    """
+    RSS 2.0 feed of the latest posts. Public endpoint - no authentication required.
+    """
+    return await _feed_response("rss", request)
+
+@router.get("/atom.xml")
+async def atom_feed(request: Request):
+    """
+    Atom feed of the latest posts. Public endpoint - no authentication required.
+    """
+    return await _feed_response("atom", request)
+
+@router.get("/sitemap.xml")
+async def sitemap(request: Request):
+    """
+    Sitemap of every post (up to the protocol's 50,000 URLs). Public endpoint - no authentication required.
+    """
+    return await _feed_response("sitemap", request)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+from app.core.dependencies import get_current_admin
+from app.core.http_cache import is_not_modified, not_modified
+from app.services.media.store import (
+    HASH_RE,
+    CorruptMediaError,
+    MediaTooLargeError,
+    MediaUpload,
+    UnsupportedMediaError,
+    create_media_store,
+)
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Uploaded files, stored by the SHA-256 of their content
+media_store = create_media_store()
+
+# Media URLs change whenever the content does, so responses never go stale
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Allowance for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+async def _read_raw(request: Request, upload: MediaUpload):
+    async for chunk in request.stream():
+        await upload.write(chunk)
+
+async def _read_multipart(request: Request, upload: MediaUpload, boundary: bytes):
+    """
+    Stream the first file part of a multipart body into ``upload``. Other
+    fields are skipped; the parser's callbacks only collect the current
+    chunk's file data, which is written before the next chunk is read.
+    """
+    pending: List[bytes] = []
+    part = {"headers": {}, "field": b"", "value": b"", "is_file": False}
+    found = {"file": False, "done": False}
+
+    def on_part_begin():
+        part.update(headers={}, field=b"", value=b"", is_file=False)
+
+    def on_header_field(data: bytes, start: int, end: int):
+        part["field"] += data[start:end]
+
+    def on_header_value(data: bytes, start: int, end: int):
+        part["value"] += data[start:end]
+
+    def on_header_end():
+        part["headers"][part["field"].lower()] = part["value"]
+        part["field"], part["value"] = b"", b""
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["is_file"] = b"filename" in options and not found["file"]
+        found["file"] = found["file"] or part["is_file"]
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if part["is_file"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        if part["is_file"]:
+            found["done"] = True
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    async for chunk in request.stream():
+        parser.write(chunk)
+        for data in pending:
+            await upload.write(data)
+        pending.clear()
+        if found["done"]:
+            # The file is complete; anything after it is not needed
+            break
+    if not found["done"]:
+        raise HTTPException(status_code=400, detail="Multipart body has no complete file part")
+
+@router.post("/api/media", status_code=201)
+async def upload_media(
+    request: Request,
+    response: Response,
+    current_user: str = Depends(get_current_admin)
+):
+    """
+    Upload an image, video or PDF (admin only), either as the raw request
+    body or as the file field of a multipart form. The body is streamed to
+    disk and stored under its SHA-256, so uploading the same file again
+    returns the existing entry (200 instead of 201). Images that do not
+    decode are refused with 422.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    is_multipart = content_type == b"multipart/form-data"
+    if is_multipart and not options.get(b"boundary"):
+        raise HTTPException(status_code=400, detail="Multipart body without a boundary")
+
+    limit = media_store.max_upload_bytes + (MULTIPART_OVERHEAD_BYTES if is_multipart else 0)
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Uploads are limited to {media_store.max_upload_bytes} bytes"
+        )
+
+    upload = media_store.begin_upload()
+    try:
+        if is_multipart:
+            await _read_multipart(request, upload, options[b"boundary"])
+        else:
+            await _read_raw(request, upload)
+        media, created = await upload.commit()
+    except MediaTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except CorruptMediaError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except UnsupportedMediaError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    finally:
+        await asyncio.to_thread(upload.abort)
+
+    logger.info(f"Stored media {media['hash']} ({media['size']} bytes, {'new' if created else 'duplicate'})")
+    if not created:
+        response.status_code = 200
+    return {**media, "created": created}
+
+@router.api_route("/media/{media_hash}", methods=["GET", "HEAD"])
+async def get_media(
+    media_hash: str,
+    request: Request,
+    w: Optional[int] = Query(None, description="Resize images to this width (one of MEDIA_VARIANT_WIDTHS)")
+):
+    """
+    Serve an uploaded file, optionally resized to one of the configured
+    widths. Responses are immutable, support byte ranges, and are sent with
+    the server's zero-copy file transfer when it offers one.
+    """
+    if not HASH_RE.match(media_hash):
+        raise HTTPException(status_code=404, detail="Media not found")
+    if w is not None and w not in media_store.variant_widths:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Width must be one of {', '.join(map(str, media_store.variant_widths))}"
+        )
+
+    content_type = await asyncio.to_thread(media_store.content_type, media_hash)
+    if content_type is None:
+        raise HTTPException(status_code=404, detail="Media not found")
+
+    path = media_store.path(media_hash)
+    if w is not None:
+        path = await media_store.variant(media_hash, content_type, w)
+    # The original stands in for variants that cannot be made (too narrow, not resizable)
+    is_variant = path != media_store.path(media_hash)
+    headers = {
+        "ETag": f'"{media_hash}-w{w}"' if is_variant else f'"{media_hash}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "X-Content-Type-Options": "nosniff",
+    }
+    if is_not_modified(request, headers):
+        return not_modified(headers)
+    return FileResponse(path, media_type=content_type, headers=headers)
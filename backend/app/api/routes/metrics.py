@@ -0,0 +1,86 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.api.routes.blog import blog_service, post_renderer, response_cache, view_counter
+from app.api.routes.media import media_store
+from app.core.metrics import registry
+
+router = APIRouter()
+
+def _per_gist(stats: dict) -> dict:
+    """Cache/writer stats keyed by gist: sharded backends already are, single gists are not."""
+    if not stats:
+        return {}
+    if all(isinstance(value, dict) for value in stats.values()):
+        return stats
+    return {getattr(blog_service, "gist_id", None) or "default": stats}
+
+def collect_blog_metrics():
+    caches = _per_gist(blog_service.cache_stats())
+    yield ("blog_cache_hits_total", "counter", "Post cache reads served from memory",
+           [({"gist": gist, "freshness": "fresh"}, s.get("hits")) for gist, s in caches.items()]
+           + [({"gist": gist, "freshness": "stale"}, s.get("stale_hits")) for gist, s in caches.items()])
+    yield ("blog_cache_misses_total", "counter", "Post cache reads that waited on GitHub",
+           [({"gist": gist}, s.get("misses")) for gist, s in caches.items()])
+    yield ("blog_cache_hit_ratio", "gauge", "Share of post cache reads served from memory",
+           [({"gist": gist}, s.get("hit_ratio")) for gist, s in caches.items()])
+    yield ("blog_cache_not_modified_total", "counter", "Revalidations answered with 304 by GitHub",
+           [({"gist": gist}, s.get("not_modified")) for gist, s in caches.items()])
+
+    writers = _per_gist(blog_service.writer_stats())
+    yield ("blog_write_queue_depth", "gauge", "Acknowledged mutations not yet flushed to GitHub",
+           [({"gist": gist}, s.get("queue_depth")) for gist, s in writers.items()])
+    yield ("blog_write_flushes_total", "counter", "Flushes of queued mutations",
+           [({"gist": gist, "outcome": "ok"}, s.get("flushes")) for gist, s in writers.items()]
+           + [({"gist": gist, "outcome": "failed"}, s.get("failed_flushes")) for gist, s in writers.items()])
+
+    upstream = blog_service.upstream_stats()
+    if upstream:
+        yield ("github_circuit_open", "gauge", "1 while the GitHub circuit breaker rejects calls",
+               [({}, 1 if upstream["circuit_state"] == "open" else 0)])
+        yield ("github_circuit_transitions_total", "counter", "Circuit breaker state transitions",
+               [({"transition": name}, count) for name, count in upstream["circuit_transitions"].items()])
+        yield ("github_retries_total", "counter", "Retried GitHub calls", [({}, upstream["retries"])])
+        yield ("github_rejected_calls_total", "counter", "GitHub calls refused before being sent",
+               [({"reason": "circuit_open"}, upstream["rejected_open"]),
+                ({"reason": "rate_limit_budget"}, upstream["rejected_budget"])])
+        yield ("github_rate_limit_remaining", "gauge", "Remaining GitHub API quota as last reported",
+               [({}, upstream["rate_limit_remaining"])])
+
+    responses = response_cache.stats()
+    yield ("response_cache_lookups_total", "counter", "Serialized response cache lookups",
+           [({"result": "hit"}, responses["hits"]), ({"result": "miss"}, responses["misses"])])
+    yield ("response_cache_hit_ratio", "gauge", "Share of responses served from serialized bytes",
+           [({}, responses["hit_ratio"])])
+
+    renders = post_renderer.stats()
+    yield ("render_cache_lookups_total", "counter", "Markdown render cache lookups",
+           [({"result": "hit"}, renders["hits"]), ({"result": "miss"}, renders["misses"])])
+    yield ("renders_total", "counter", "Markdown renders by where they ran",
+           [({"where": "inline"}, renders["inline_renders"]), ({"where": "process"}, renders["process_renders"])])
+
+    changes = blog_service.changes.stats()
+    yield ("corpus_version", "gauge", "Corpus version, raised by one with every change", [({}, changes["version"])])
+    yield ("change_stream_clients", "gauge", "Connected change feed (SSE) clients", [({}, changes["clients"])])
+
+    views = view_counter.stats()
+    yield ("post_views_total", "counter", "Post views recorded by this worker", [({}, views["recorded"])])
+    yield ("post_views_pending", "gauge", "Views not yet written to the database", [({}, views["pending_views"])])
+    yield ("post_view_flushes_total", "counter", "View count flushes by outcome",
+           [({"result": "ok"}, views["flushes"]), ({"result": "failed"}, views["flush_failures"])])
+
+    media = media_store.stats()
+    yield ("media_uploads_total", "counter", "Media uploads by whether the content was already stored",
+           [({"result": "new"}, media["uploads"] - media["deduplicated"]), ({"result": "duplicate"}, media["deduplicated"])])
+    yield ("media_variant_bytes", "gauge", "Disk used by resized media variants", [({}, media["variant_bytes"])])
+    yield ("media_variant_evictions_total", "counter", "Resized variants evicted to stay within the disk budget",
+           [({}, media["variants_evicted"])])
+
+registry.add_collector(collect_blog_metrics)
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """
+    Metrics in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
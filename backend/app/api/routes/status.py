@@ -0,0 +1,62 @@
+from fastapi import APIRouter
+
+from app.api.routes.blog import blog_service, post_renderer, response_cache, view_counter
+from app.api.routes.media import media_store
+
+router = APIRouter(prefix="/status")
+
+@router.get("/cache")
+async def cache_status():
+    """
+    Post cache counters (hits, misses, revalidations, 304s, coalesced fetches).
+    """
+    return blog_service.cache_stats()
+
+@router.get("/writer")
+async def writer_status():
+    """
+    Gist write pipeline state: queue depth and flush latency.
+    """
+    return blog_service.writer_stats()
+
+@router.get("/upstream")
+async def upstream_status():
+    """
+    GitHub call resilience: circuit breaker state and transitions, retries and rate-limit budget.
+    """
+    return blog_service.upstream_stats()
+
+@router.get("/responses")
+async def response_cache_status():
+    """
+    Serialized response cache: entries, hit ratio and available encodings.
+    """
+    return response_cache.stats()
+
+@router.get("/render")
+async def render_cache_status():
+    """
+    Markdown render cache: entries, hit ratio and inline vs process-pool renders.
+    """
+    return post_renderer.stats()
+
+@router.get("/changes")
+async def change_feed_status():
+    """
+    Live change feed: corpus version, change log span and connected clients.
+    """
+    return blog_service.changes.stats()
+
+@router.get("/views")
+async def view_counter_status():
+    """
+    View counting: views recorded, deltas waiting for the next flush and flush latency.
+    """
+    return view_counter.stats()
+
+@router.get("/media")
+async def media_status():
+    """
+    Media uploads and deduplication, and the resized variant cache's disk usage and evictions.
+    """
+    return media_store.stats()
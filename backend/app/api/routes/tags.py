@@ -0,0 +1,20 @@
+from fastapi import APIRouter, HTTPException
+from typing import List
+
+from app.schemas.blog_schema import TagCount
+from app.api.routes.blog import blog_service
+from app.core.exceptions import GistServiceException
+
+router = APIRouter(prefix="/tags")
+
+@router.get("", response_model=List[TagCount])
+async def get_tags():
+    """
+    All tags with their post counts, most used first. Public endpoint - no authentication required.
+    """
+    try:
+        return await blog_service.tag_facets()
+    except GistServiceException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch tags: {str(e)}")
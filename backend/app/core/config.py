@@ -1,10 +1,18 @@
 import os
 from typing import Optional
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Relative data paths are resolved against the backend directory, so they do
+# not depend on where the server (or a tool) is started from
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def backend_path(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.normpath(os.path.join(BACKEND_DIR, path))
+
 class Settings(BaseSettings):
     ENV: str = 'development'
     GITHUB_TOKEN: Optional[str] = None
@@ -12,12 +20,98 @@ class Settings(BaseSettings):
     GIST_IDS: Optional[str] = None
     PORT: str = '8000'
     FRONTEND_URL: str = 'http://localhost:5173'
-    DATABASE_URL: str = 'sqlite+aiosqlite:///./blog.db'
+    DATABASE_URL: str = 'sqlite+aiosqlite:///' + backend_path('blog.db')
+    BLOG_BACKEND: str = 'gist'  # "gist" or "sqlite"
+
+    # Post cache settings
+    CACHE_TTL_SECONDS: float = 30.0
+    CACHE_STALE_SECONDS: float = 300.0
+
+    # Background polling of the gist (keeps the post cache warm)
+    POLL_ENABLED: bool = True
+    POLL_MIN_SECONDS: float = 5.0
+    POLL_MAX_SECONDS: float = 120.0
+    # Reads (including polling) pause until the rate limit resets once fewer requests
+    # than this remain, keeping the rest for writes
+    GITHUB_RATE_LIMIT_RESERVE: int = 100
+
+    # GitHub call resilience: retries with jittered backoff and a circuit breaker
+    GITHUB_MAX_RETRIES: int = 3
+    GITHUB_RETRY_BASE_SECONDS: float = 0.5
+    GITHUB_RETRY_MAX_SECONDS: float = 8.0
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RESET_SECONDS: float = 30.0
+
+    # GitHub HTTP client settings
+    GITHUB_API_URL: str = 'https://api.github.com'  # point at benchmarks.fake_gist for load tests
+    HTTP2_ENABLED: bool = True
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 15.0
+
+    # Gist write pipeline settings
+    WRITE_AHEAD_LOG_PATH: str = './data/gist_wal.jsonl'
+    WRITE_COALESCE_SECONDS: float = 0.5
+    WRITE_RETRY_SECONDS: float = 5.0
+
+    # Local snapshot of the gist, served at startup and while GitHub is unreachable
+    SNAPSHOT_PATH: str = './data/gist_snapshot.jsonl'
+
+    # HTTP caching of read endpoints
+    CACHE_CONTROL: str = 'public, max-age=0, must-revalidate'
+
+    # Server-side Markdown rendering: results are cached by content hash, and
+    # content at least this long renders in a process pool off the event loop
+    RENDER_CACHE_ENTRIES: int = 512
+    RENDER_PROCESS_THRESHOLD_CHARS: int = 20000
+    RENDER_PROCESS_WORKERS: int = 2
+
+    # Uploaded media: content-addressed originals plus an LRU of resized
+    # image variants (kept under MEDIA_VARIANT_CACHE_BYTES on disk)
+    MEDIA_ROOT: str = './data/media'
+    MEDIA_MAX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    MEDIA_VARIANT_CACHE_BYTES: int = 256 * 1024 * 1024
+    MEDIA_VARIANT_WIDTHS: str = '320,640,1280'  # allowed ?w= values
+
+    # Search settings
+    SEARCH_INDEX_PATH: str = './data/search_index.json.gz'
+
+    # Related posts: TF-IDF cosine similarity blended with tag overlap (Jaccard)
+    RELATED_POSTS_K: int = 10  # most similar posts kept per post
+    RELATED_TAG_WEIGHT: float = 0.3
+
+    # RSS/Atom feeds and sitemap; post links are FRONTEND_URL + FEED_POST_PATH
+    FEED_TITLE: str = "Roxton's Blog"
+    FEED_DESCRIPTION: str = "Posts from Roxton's Blog"
+    FEED_MAX_ITEMS: int = 50
+    FEED_POST_PATH: str = '/posts/{slug}'  # {slug} or {id}
+
+    # Live change feed (SSE): changes kept for clients catching up, and keepalive interval
+    CHANGE_LOG_ENTRIES: int = 1000
+    CHANGE_HEARTBEAT_SECONDS: float = 15.0
+
+    # Post views are counted in memory and added to the post_views table this often
+    VIEW_FLUSH_SECONDS: float = 5.0
+
+    # Rate limiting settings
+    RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_ROUTES: str = 'POST /api/auth/login=5'  # "[METHOD ]/path/prefix=per_minute,..."
+    RATE_LIMIT_BACKEND: str = 'memory'  # "memory" or "sqlite" (shared across workers)
+    RATE_LIMIT_DB_PATH: str = './data/rate_limits.db'
     
     # Authentication settings
     SECRET_KEY: str = 'your-secret-key-change-this-in-production'
     ADMIN_PASSWORD: str = 'admin123'  # Change this!
     
+    @field_validator(
+        'WRITE_AHEAD_LOG_PATH', 'SNAPSHOT_PATH', 'MEDIA_ROOT', 'SEARCH_INDEX_PATH', 'RATE_LIMIT_DB_PATH'
+    )
+    @classmethod
+    def _resolve_data_path(cls, value: str) -> str:
+        return backend_path(value)
+
     model_config = {
         "env_file": ".env",
         "env_file_encoding": "utf-8",
@@ -27,7 +121,7 @@ class Settings(BaseSettings):
     def validate(self):
         if not self.GITHUB_TOKEN:
             print("Warning: GITHUB_TOKEN environment variable is not set")
-        if not self.GIST_ID:
+        if not self.GIST_ID and not self.GIST_IDS:
             print("Warning: GIST_ID environment variable is not set")
         if self.ADMIN_PASSWORD == 'admin123':
             print("Warning: Using default admin password. Please change ADMIN_PASSWORD in environment variables.")
@@ -10,4 +10,6 @@ def configure_logging():
     )
 
     logging.getLogger("httpx").setLevel(logging.WARNING)
-    logging.getLogger("uvicorn").setLevel(logging.WARNING)
\ No newline at end of file
+    logging.getLogger("uvicorn").setLevel(logging.WARNING)
+    logging.getLogger("markdown_it").setLevel(logging.WARNING)
+    logging.getLogger("aiosqlite").setLevel(logging.WARNING)
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Metrics are plain dicts of label tuple -> value, updated from the event loop
+thread without locks. Label values are bounded (route templates, methods,
+status codes), so the number of series stops growing once every route has
+been hit. Values that services already count (cache, writer, upstream guard)
+are read by collectors at scrape time instead of on every request.
+"""
+import bisect
+import contextvars
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in self.values.items()
+        ]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (+Inf last)..., sum]
+        self.values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(float(bound))
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+        # Called at scrape time, each returns (name, type, help, [(labels dict, value)])
+        self.collectors: List[Callable[[], Iterable[Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable):
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        blocks = [metric.render() for metric in self.metrics]
+        for collector in self.collectors:
+            for name, kind, help_text, samples in collector():
+                lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    names = tuple(labels.keys())
+                    lines.append(f"{name}{_format_labels(names, tuple(labels.values()))} {_format_value(value)}")
+                blocks.append("\n".join(lines))
+        return "\n".join(blocks) + "\n"
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")))
+HTTP_LATENCY = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"))
+HTTP_RESPONSE_SIZE = registry.register(Histogram(
+    "http_response_size_bytes", "HTTP response body size by route template", ("route",), buckets=SIZE_BUCKETS))
+GITHUB_REQUESTS = registry.register(Counter(
+    "github_requests_total", "GitHub API requests by method and status", ("method", "status")))
+GITHUB_LATENCY = registry.register(Histogram(
+    "github_request_duration_seconds", "GitHub API request latency", ("method",)))
+RATE_LIMIT_REJECTIONS = registry.register(Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter", ("rule",)))
+
+# Server-Timing phases of the current request
+SERVER_TIMING_PHASES = ("upstream", "parse", "render", "validation", "serialization")
+
+class ServerTiming:
+    __slots__ = SERVER_TIMING_PHASES
+
+    def __init__(self):
+        for phase in SERVER_TIMING_PHASES:
+            setattr(self, phase, 0.0)
+
+    def header(self, total: float) -> bytes:
+        parts = [
+            f"{phase};dur={getattr(self, phase) * 1000:.2f}"
+            for phase in SERVER_TIMING_PHASES
+            if getattr(self, phase)
+        ]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts).encode()
+
+_current_timing: contextvars.ContextVar[Optional[ServerTiming]] = contextvars.ContextVar("server_timing", default=None)
+
+def start_timing() -> ServerTiming:
+    timing = ServerTiming()
+    _current_timing.set(timing)
+    return timing
+
+def record_phase(phase: str, seconds: float):
+    """Add ``seconds`` to a Server-Timing phase of the current request, if any."""
+    timing = _current_timing.get()
+    if timing is not None:
+        setattr(timing, phase, getattr(timing, phase) + seconds)
+
+class timed:
+    """``with timed("parse"): ...`` records the block's duration as a Server-Timing phase."""
+
+    __slots__ = ("phase", "started")
+
+    def __init__(self, phase: str):
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record_phase(self.phase, time.perf_counter() - self.started)
+        return False
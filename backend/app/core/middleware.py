@@ -1,37 +1,217 @@
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from app.core.config import settings
-import time
 import asyncio
+import logging
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.metrics import (
+    HTTP_IN_FLIGHT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    HTTP_RESPONSE_SIZE,
+    RATE_LIMIT_REJECTIONS,
+    start_timing,
+)
+from app.core.rate_limit_store import CounterStore, MemoryCounterStore
+
+logger = logging.getLogger(__name__)
+
+class RateLimitRule:
+    """``requests_per_minute`` sustained, with bursts of up to ``burst`` requests."""
+
+    def __init__(self, name: str, requests_per_minute: int, burst: Optional[int] = None):
+        self.name = name
+        self.limit = requests_per_minute
+        self.capacity = float(burst or requests_per_minute)
+        self.rate = requests_per_minute / 60.0
+
+def parse_route_limits(spec: Optional[str]) -> List[Tuple[Optional[str], str, int]]:
+    """
+    Parse ``"POST /api/auth/login=5,/api/blog-posts/search=30"`` into
+    (method, path prefix, requests per minute) entries.
+    """
+    routes = []
+    for item in (spec or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        target, _, limit = item.rpartition("=")
+        parts = target.split()
+        method, path = (parts[0].upper(), parts[1]) if len(parts) == 2 else (None, parts[0])
+        routes.append((method, path, int(limit)))
+    return routes
+
+class RateLimitMiddleware:
+    """
+    Per-client token-bucket rate limiting as a plain ASGI middleware.
+
+    Every request costs one token from the bucket of its client and route;
+    checking and updating a bucket is O(1) and rejected requests cost nothing,
+    so a throttled client recovers at the refill rate. Buckets live in a
+    pluggable ``CounterStore`` (use the SQLite store to share limits across
+    workers) and fully refilled ones are expired by a background task.
+    """
+
+    def __init__(
+        self,
+        app,
+        requests_per_minute: int = 60,
+        route_limits: Optional[List[Tuple[Optional[str], str, int]]] = None,
+        store: Optional[CounterStore] = None,
+        cleanup_interval: float = 60.0,
+    ):
+        self.app = app
+        self.default_rule = RateLimitRule("default", requests_per_minute)
+        # Longest prefix first, so the most specific rule wins
+        self.routes = sorted(
+            (
+                (method, path, RateLimitRule(f"{method or '*'} {path}", limit))
+                for method, path, limit in route_limits or []
+            ),
+            key=lambda route: len(route[1]),
+            reverse=True,
+        )
+        self._rule_cache: Dict[Tuple[str, str], RateLimitRule] = {}
+        self.store = store if store is not None else MemoryCounterStore()
+        self.cleanup_interval = cleanup_interval
+        self._cleanup_task: Optional[asyncio.Task] = None
+
+    def _rule_for(self, method: str, path: str) -> RateLimitRule:
+        rule = self._rule_cache.get((method, path))
+        if rule is None:
+            rule = self.default_rule
+            for route_method, prefix, route_rule in self.routes:
+                if path.startswith(prefix) and route_method in (None, method):
+                    rule = route_rule
+                    break
+            if len(self._rule_cache) < 10000:
+                self._rule_cache[(method, path)] = rule
+        return rule
+
+    async def _call_store(self, method, *args):
+        """
+        Blocking stores (a write transaction may wait on another worker) run
+        in a thread; the in-memory one runs on the loop, the only place its
+        dict may be touched.
+        """
+        if self.store.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def _cleanup(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                expired = await self._call_store(self.store.expire, time.time())
+                if expired:
+                    logger.debug(f"Expired {expired} idle rate limit bucket(s)")
+            except Exception as e:
+                logger.warning(f"Rate limit cleanup failed: {str(e)}")
+
+    def _watch_shutdown(self, receive):
+        async def receive_lifespan():
+            message = await receive()
+            if message["type"] == "lifespan.shutdown" and self._cleanup_task is not None:
+                self._cleanup_task.cancel()
+                self._cleanup_task = None
+            return message
+        return receive_lifespan
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self.app(scope, self._watch_shutdown(receive), send)
+            return
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup())
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        rule = self._rule_for(scope["method"], scope["path"])
+        allowed, remaining, retry_after, reset = await self._call_store(
+            self.store.hit, f"{rule.name}|{client_ip}", rule.capacity, rule.rate, time.time()
+        )
+        headers = [
+            (b"x-ratelimit-limit", str(rule.limit).encode()),
+            (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+            (b"x-ratelimit-reset", str(math.ceil(reset)).encode()),
+        ]
+
+        if not allowed:
+            RATE_LIMIT_REJECTIONS.inc(rule.name)
+            body = b"Rate limit exceeded"
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(retry_after)).encode()),
+                    *headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+def _route_template(scope) -> str:
+    # Newer FastAPI versions keep included routes unprefixed and record the full
+    # path in the scope only while the route runs, so this is read at response start
+    path = getattr((scope.get("fastapi") or {}).get("effective_route_context"), "path", None)
+    if path is None:
+        path = getattr(scope.get("route"), "path", None)
+    # Unmatched paths share one label so arbitrary URLs cannot add series
+    return path or "unmatched"
+
+class MetricsMiddleware:
+    """
+    Records request count, latency, in-flight requests and response size per
+    route template, and adds a ``Server-Timing`` header with the phases the
+    request spent in (upstream, parse, validation, serialization, total).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        timing = start_timing()
+        status = 500
+        size = 0
+        template = None
+        HTTP_IN_FLIGHT.inc()
+
+        async def send_with_timing(message):
+            nonlocal status, size, template
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                template = _route_template(scope)
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", timing.header(time.perf_counter() - started))
+                ]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, requests_per_minute=60):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.request_times = {}
-        
-    async def dispatch(self, request: Request, call_next):
-        client_ip = request.client.host
-        current_time = time.time()
-        
-        # Clean up old requests
-        self.request_times = {ip: times for ip, times in self.request_times.items() 
-                             if current_time - times[-1] < 60}
-        
-        # Initialize for new client
-        if client_ip not in self.request_times:
-            self.request_times[client_ip] = []
-        
-        # Check rate limit
-        if len(self.request_times[client_ip]) >= self.requests_per_minute:
-            return Response(
-                content="Rate limit exceeded",
-                status_code=429
-            )
-        
-        # Add request time
-        self.request_times[client_ip].append(current_time)
-        
-        # Process request
-        response = await call_next(request)
-        return response
\ No newline at end of file
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            if template is None:
+                template = _route_template(scope)
+            method = scope["method"]
+            HTTP_REQUESTS.inc(method, template, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - started, method, template)
+            HTTP_RESPONSE_SIZE.observe(size, template)
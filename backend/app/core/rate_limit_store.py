@@ -0,0 +1,110 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+# (allowed, tokens remaining, seconds until the next token, seconds until the bucket is full)
+HitResult = Tuple[bool, float, float, float]
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + (now - updated) * rate)
+
+def _take(tokens: float, capacity: float, rate: float) -> HitResult:
+    if tokens >= 1:
+        tokens -= 1
+        return True, tokens, 0.0, (capacity - tokens) / rate
+    return False, tokens, (1 - tokens) / rate, (capacity - tokens) / rate
+
+class CounterStore:
+    """
+    Token-bucket state keyed by client and route. ``hit`` is O(1); buckets
+    that have refilled completely carry no information and are dropped by
+    ``expire``, which the middleware runs in the background.
+    Stores that do I/O set ``blocking`` so the middleware calls them from a
+    worker thread instead of the event loop.
+    """
+
+    blocking = False
+
+    def hit(self, key: str, capacity: float, rate: float, now: float) -> HitResult:
+        raise NotImplementedError
+
+    def expire(self, now: float) -> int:
+        raise NotImplementedError
+
+class MemoryCounterStore(CounterStore):
+    """Per-process buckets in a dict."""
+
+    def __init__(self):
+        # key -> [tokens, updated, seconds until full]
+        self._buckets: Dict[str, List[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def hit(self, key: str, capacity: float, rate: float, now: float) -> HitResult:
+        bucket = self._buckets.get(key)
+        tokens = capacity if bucket is None else _refill(bucket[0], bucket[1], now, capacity, rate)
+        result = _take(tokens, capacity, rate)
+        self._buckets[key] = [result[1], now, result[3]]
+        return result
+
+    def expire(self, now: float) -> int:
+        idle = [key for key, (_, updated, full_in) in self._buckets.items() if now - updated >= full_in]
+        for key in idle:
+            del self._buckets[key]
+        return len(idle)
+
+class SQLiteCounterStore(CounterStore):
+    """
+    Buckets in a local SQLite file, so every uvicorn worker on the host
+    shares the same limits. Each hit is a single short write transaction,
+    which can wait up to a second for another worker's, so it is blocking.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Counters are disposable, so skip fsyncs on the request path
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limit_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limit_full_at ON rate_limit_buckets (full_at)")
+
+    def hit(self, key: str, capacity: float, rate: float, now: float) -> HitResult:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_limit_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = capacity if row is None else _refill(row[0], row[1], now, capacity, rate)
+                result = _take(tokens, capacity, rate)
+                self._conn.execute(
+                    "INSERT INTO rate_limit_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, "
+                    "updated = excluded.updated, full_at = excluded.full_at",
+                    (key, result[1], now, now + result[3]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return result
+
+    def expire(self, now: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM rate_limit_buckets WHERE full_at <= ?", (now,)).rowcount
+
+def create_counter_store(backend: str, path: str) -> CounterStore:
+    if backend == "sqlite":
+        return SQLiteCounterStore(path)
+    if backend == "memory":
+        return MemoryCounterStore()
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
@@ -0,0 +1,144 @@
+import gzip
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from fastapi import Request, Response
+
+from app.core.http_cache import cache_headers, is_not_modified, not_modified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    compressors: Dict[str, Callable[[bytes], bytes]] = {}
+    if zstandard is not None:
+        compressors["zstd"] = zstandard.ZstdCompressor(level=10).compress
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=9)
+    compressors["gzip"] = lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+    return compressors
+
+COMPRESSORS = _compressors()
+
+# Short suffixes keep the ETag of each encoding distinct (strong ETags are per representation)
+ETAG_SUFFIXES = {"zstd": "zst", "br": "br", "gzip": "gz"}
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """Best supported content coding from ``Accept-Encoding``, in server preference order."""
+    header = request.headers.get("accept-encoding")
+    if not header:
+        return None
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(coding.strip().lower())
+    for encoding in COMPRESSORS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    return f"{etag}-{ETAG_SUFFIXES[encoding]}" if encoding else etag
+
+def check_not_modified(
+    request: Request, etag: str, encoding: Optional[str], last_modified: Optional[float] = None
+) -> Optional[Response]:
+    """
+    A 304 if the client holds either ETag of the body: the encoded one, or
+    the plain one, which small bodies are sent with uncompressed. None otherwise.
+    """
+    for candidate in dict.fromkeys((encoded_etag(etag, encoding), etag)):
+        headers = cache_headers(candidate, last_modified)
+        if is_not_modified(request, headers):
+            return not_modified(headers)
+    return None
+
+class CachedBody:
+    """
+    Serialized body of one response (JSON, or XML for feeds), plus each
+    compressed encoding once it has been asked for.
+    """
+
+    __slots__ = ("plain", "_encoded")
+
+    def __init__(self, plain: bytes):
+        self.plain = plain
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoding_for(self, encoding: Optional[str]) -> Optional[str]:
+        """The content coding actually sent when ``encoding`` was negotiated."""
+        return encoding if len(self.plain) >= MIN_COMPRESS_BYTES else None
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        encoding = self.encoding_for(encoding)
+        if encoding is None:
+            return self.plain
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = COMPRESSORS[encoding](self.plain)
+            self._encoded[encoding] = body
+        return body
+
+    def response(
+        self, encoding: Optional[str], etag: str, last_modified: Optional[float] = None,
+        media_type: str = "application/json"
+    ) -> Response:
+        """The body for ``encoding``, with the ETag of the representation actually sent."""
+        encoding = self.encoding_for(encoding)
+        headers = cache_headers(encoded_etag(etag, encoding), last_modified)
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.encoded(encoding), media_type=media_type, headers=headers)
+
+class ResponseCache:
+    """
+    LRU of serialized response bodies keyed by ETag. ETags change with the
+    corpus version, so entries for old versions are never hit again and
+    simply age out.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, etag: str) -> Optional[CachedBody]:
+        body = self._entries.get(etag)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(etag)
+        self.hits += 1
+        return body
+
+    def put(self, etag: str, plain: bytes) -> CachedBody:
+        body = CachedBody(plain)
+        self._entries[etag] = body
+        self._entries.move_to_end(etag)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return body
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "encodings": list(COMPRESSORS),
+        }
@@ -1,13 +1,70 @@
+from sqlalchemy import event, inspect, literal
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.models import Base
 
 engine = create_async_engine(settings.DATABASE_URL)
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+if engine.dialect.name == "sqlite":
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers proceed while a write is in progress
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def _default_clause(column, dialect) -> str:
+    """``DEFAULT`` clause for ``column``'s server default: numbers bare, other text quoted, SQL expressions compiled."""
+    if column.server_default is None:
+        return ""
+    arg = column.server_default.arg
+    if not isinstance(arg, str):
+        return f" DEFAULT {arg.compile(dialect=dialect)}"
+    try:
+        numeric = column.type.python_type in (int, float)
+    except NotImplementedError:
+        numeric = False
+    if numeric:
+        # Raises for anything that is not a number, rather than writing it into the DDL
+        float(arg)
+        return f" DEFAULT {arg}"
+    return f" DEFAULT {literal(arg).compile(dialect=dialect, compile_kwargs={'literal_binds': True})}"
+
+def _upgrade_tables(sync_conn):
+    """
+    ``create_all`` only creates missing tables, so add the columns and
+    indexes introduced since a table was created. New columns must be
+    nullable or have a server-side default; unique constraints on them come
+    from their (unique) indexes, as SQLite cannot add a UNIQUE column.
+    """
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                column_type = column.type.compile(dialect=sync_conn.dialect)
+                default = _default_clause(column, sync_conn.dialect)
+                not_null = " NOT NULL" if not column.nullable and default else ""
+                sync_conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}{not_null}"
+                )
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in indexes:
+                index.create(sync_conn)
+
+async def init_db():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_upgrade_tables)
+
 async def get_db():
     db = AsyncSessionLocal()
     try:
         yield db
     finally:
-        await db.close()
\ No newline at end of file
+        await db.close()
@@ -0,0 +1,58 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, String, Text
+from sqlalchemy.orm import declarative_base, relationship
+
+Base = declarative_base()
+
+class Post(Base):
+    __tablename__ = "posts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    title = Column(String(200), nullable=False)
+    content = Column(Text, nullable=False)
+    summary = Column(String(500), nullable=True)
+    tags = Column(JSON, nullable=False, default=list)
+    media = Column(JSON, nullable=False, default=list)
+    date = Column(DateTime, nullable=False, index=True)
+    slug = Column(String(255), nullable=True, unique=True, index=True)
+    # Earlier slugs, still answered with a redirect to the current one
+    previous_slugs = Column(JSON, nullable=False, default=list, server_default="[]")
+    # BlogRevision value of the write that last changed the post
+    revision = Column(Integer, nullable=False, default=0, server_default="0", index=True)
+
+    tag_rows = relationship("PostTag", cascade="all, delete-orphan", passive_deletes=True)
+
+class PostTag(Base):
+    """One row per (post, tag) so tag filters are index lookups instead of JSON scans."""
+    __tablename__ = "post_tags"
+
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    tag = Column(String(100), primary_key=True)
+
+    __table_args__ = (Index("ix_post_tags_tag", "tag"),)
+
+class BlogRevision(Base):
+    """
+    Single-row counter bumped inside every post write, so other workers can
+    tell with one primary-key read whether their in-memory indexes are stale.
+    """
+    __tablename__ = "blog_revision"
+
+    id = Column(Integer, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+class DeletedPost(Base):
+    """Tombstone telling other workers which revision removed a post."""
+    __tablename__ = "deleted_posts"
+
+    post_id = Column(Integer, primary_key=True)
+    revision = Column(Integer, nullable=False, index=True)
+
+class PostView(Base):
+    """
+    Running view count per post. Keyed by the id as a string so gist-backed
+    posts are counted too, hence no foreign key to ``posts``.
+    """
+    __tablename__ = "post_views"
+
+    post_id = Column(String(64), primary_key=True)
+    views = Column(Integer, nullable=False, default=0)
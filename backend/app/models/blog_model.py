@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
 
 class BlogBase(BaseModel):
     title: str
@@ -16,5 +16,9 @@ class BlogUpdate(BlogBase):
 class Blog(BlogBase):
     id: str
     date: datetime
+    summary: Optional[str] = None
+    tags: Optional[List[str]] = None
+    media: Optional[List[str]] = None
+    slug: Optional[str] = None
     class Config:
         from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 class BlogCreate(BaseModel):
@@ -28,9 +28,70 @@ class BlogResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TocEntry(BaseModel):
+    level: int = Field(..., description="Heading level, 1-6")
+    id: str = Field(..., description="Anchor of the heading in the rendered HTML")
+    title: str
+
+class RenderedContent(BaseModel):
+    html: str = Field(..., description="Sanitized HTML rendered from the Markdown content")
+    toc: List[TocEntry] = Field(default_factory=list, description="Headings in document order")
+    word_count: int
+    reading_time_minutes: int
+
+class RenderedBlogResponse(BlogResponse, RenderedContent):
+    pass
+
+class RenderedPost(RenderedContent):
+    id: str
+    title: str
+    slug: Optional[str] = None
+
 class BlogUpdate(BaseModel):
     title: Optional[str] = Field(None, min_length=1, max_length=200)
     content: Optional[str] = Field(None, min_length=1)
     summary: Optional[str] = Field(None, max_length=500)
     tags: Optional[List[str]] = None
     media: Optional[List[str]] = None
+
+class BlogPage(BaseModel):
+    items: List[Dict[str, Any]] = Field(..., description="Posts projected to the requested fields")
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page")
+    total: int = Field(..., description="Number of posts matching the filters")
+
+class SearchHit(BaseModel):
+    id: str
+    title: str
+    summary: Optional[str] = None
+    tags: Optional[List[str]] = Field(default_factory=list)
+    date: datetime
+    slug: Optional[str] = None
+    score: float = Field(..., description="BM25 relevance score")
+    snippet: str = Field(..., description="HTML-escaped excerpt with matches wrapped in <mark>")
+
+class SearchResults(BaseModel):
+    query: str
+    total: int = Field(..., description="Number of matching posts")
+    items: List[SearchHit]
+
+class RelatedPost(BaseModel):
+    id: str
+    title: str
+    summary: Optional[str] = None
+    tags: Optional[List[str]] = Field(default_factory=list)
+    date: datetime
+    slug: Optional[str] = None
+    score: float = Field(..., description="Content similarity blended with tag overlap, 0-1")
+
+class PopularPost(BaseModel):
+    id: str
+    title: str
+    summary: Optional[str] = None
+    tags: Optional[List[str]] = Field(default_factory=list)
+    date: datetime
+    slug: Optional[str] = None
+    views: int = Field(..., description="Views across all workers as of the last flush, plus this worker's since")
+
+class TagCount(BaseModel):
+    tag: str
+    count: int = Field(..., description="Number of posts with this tag")
@@ -0,0 +1,103 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+from app.services.blog.indexes import diff_posts
+
+
+class PostCache:
+    """
+    In-process cache of the parsed post map for a single gist.
+
+    Entries are fresh for ``ttl`` seconds, after which they may still be served
+    for ``stale_ttl`` more seconds while a revalidation runs in the background.
+    The upstream ETag is kept so revalidation can use ``If-None-Match``.
+    A map restored from a disk snapshot is always servable but never fresh,
+    so the first read revalidates it in the background.
+    Whenever the post map changes, ``on_change`` receives only the posts that
+    differ from the last map it was told about.
+    """
+
+    def __init__(
+        self,
+        ttl: float,
+        stale_ttl: float,
+        on_change: Optional[Callable[[Dict[str, dict], List[str]], None]] = None
+    ):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.on_change = on_change
+        self.data: Optional[Dict[str, dict]] = None
+        self._published: Optional[Dict[str, dict]] = None
+        self.etag: Optional[str] = None
+        self.fetched_at: float = 0.0
+        self.from_snapshot = False
+
+        # Counters
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.not_modified = 0
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def is_fresh(self) -> bool:
+        return self.data is not None and self.age() < self.ttl
+
+    def is_servable_stale(self) -> bool:
+        if self.data is None:
+            return False
+        return self.from_snapshot or self.age() < self.ttl + self.stale_ttl
+
+    def _swap(self, data: Dict[str, dict]):
+        self.data = data
+        if self.on_change is not None and data is not self._published:
+            upserts, removed = diff_posts(self._published, data)
+            self._published = data
+            if upserts or removed:
+                self.on_change(upserts, removed)
+
+    def store(self, data: Dict[str, dict], etag: Optional[str] = None):
+        """Replace the cached post map with a freshly fetched or written one."""
+        self._swap(data)
+        self.etag = etag
+        self.fetched_at = time.monotonic()
+        self.from_snapshot = False
+
+    def restore(self, data: Dict[str, dict], etag: Optional[str] = None):
+        """Seed the cache from a disk snapshot, pending revalidation upstream."""
+        self._swap(data)
+        self.etag = etag
+        self.fetched_at = 0.0
+        self.from_snapshot = True
+
+    def update(self, data: Dict[str, dict]):
+        """Replace the post map after a local mutation, keeping its freshness."""
+        self._swap(data)
+
+    def touch(self):
+        """Mark the cached post map as fresh again after a 304 from upstream."""
+        self.fetched_at = time.monotonic()
+        self.from_snapshot = False
+
+    def invalidate(self):
+        self.data = None
+        self.etag = None
+        self.fetched_at = 0.0
+        self.from_snapshot = False
+
+    def stats(self) -> dict:
+        reads = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "not_modified": self.not_modified,
+            "hit_ratio": round((self.hits + self.stale_hits) / reads, 4) if reads else 0.0,
+            "cached_posts": len(self.data) if self.data is not None else 0,
+            "age_seconds": round(self.age(), 3) if self.data is not None and not self.from_snapshot else None,
+            "etag": self.etag,
+            "from_snapshot": self.from_snapshot,
+        }
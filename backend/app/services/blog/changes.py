@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import json
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.blog.indexes import PostIndex
+
+logger = logging.getLogger(__name__)
+
+CHANGE_FIELDS = ("id", "title", "summary", "tags", "date", "slug")
+
+def sse_frame(event: str, data: dict, event_id: Optional[int] = None) -> bytes:
+    """One Server-Sent Events message."""
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'), default=str)}")
+    return ("\n".join(lines) + "\n\n").encode()
+
+class ChangeLog(PostIndex):
+    """
+    A corpus version that goes up by one with every change, and the last
+    ``max_entries`` changes as post-level diffs (summaries of created and
+    updated posts, ids of deleted ones), so a client that knows a version
+    only has to catch up on what changed since.
+
+    Each entry is encoded as an SSE message once and the same bytes are sent
+    to every client. Waiting clients share one event, replaced on every
+    change, and a single timer task (running only while there are waiters)
+    wakes them for heartbeats, so idle connections cost no work of their own.
+    The same task calls ``refresh`` before each heartbeat, so changes made
+    by other processes reach connected clients without each of them
+    revalidating the posts.
+    """
+
+    # Changes touching more posts than this (e.g. the first load) are logged as a reset
+    MAX_POSTS_PER_ENTRY = 100
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        heartbeat_seconds: float = 15.0,
+        refresh: Optional[Callable[[], Awaitable[None]]] = None,
+    ):
+        # Starting from the clock keeps versions increasing across restarts
+        self.version = int(time.time() * 1000)
+        self.heartbeat_seconds = heartbeat_seconds
+        self.refresh = refresh
+        self.entries: "deque[Tuple[int, bytes]]" = deque(maxlen=max_entries)
+        self._known: Set[str] = set()
+        self._event = asyncio.Event()
+        self._waiters = 0
+        self._ticker: Optional[asyncio.Task] = None
+
+        # Counters
+        self.clients = 0
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        deleted = [post_id for post_id in removed if post_id in self._known]
+        if not upserts and not deleted:
+            return
+        created = [post_id for post_id in upserts if post_id not in self._known]
+        updated = [post_id for post_id in upserts if post_id in self._known]
+        self._known.update(upserts)
+        self._known.difference_update(deleted)
+        self.version += 1
+
+        if len(upserts) + len(deleted) > self.MAX_POSTS_PER_ENTRY:
+            frame = sse_frame("reset", {"version": self.version}, self.version)
+        else:
+            def summaries(post_ids: List[str]) -> List[dict]:
+                return [{field: upserts[post_id].get(field) for field in CHANGE_FIELDS} for post_id in post_ids]
+
+            frame = sse_frame("change", {
+                "version": self.version,
+                "created": summaries(created),
+                "updated": summaries(updated),
+                "deleted": deleted,
+            }, self.version)
+        self.entries.append((self.version, frame))
+        self._wake()
+
+    def since(self, version: int) -> Optional[List[Tuple[int, bytes]]]:
+        """
+        (version, message) of every change after ``version``, or None when
+        the log no longer reaches back that far (or the version is not one
+        of ours) and the client has to reload.
+        """
+        if version == self.version:
+            return []
+        oldest = self.entries[0][0] if self.entries else self.version + 1
+        if version > self.version or version < oldest - 1:
+            return None
+        # Versions in the log are consecutive, so the start is an offset
+        return list(itertools.islice(self.entries, version - oldest + 1, None))
+
+    def _wake(self):
+        self._event.set()
+        self._event = asyncio.Event()
+
+    async def wait(self):
+        """Return after the next change, or the next heartbeat."""
+        self._waiters += 1
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.get_running_loop().create_task(self._heartbeat())
+        try:
+            await self._event.wait()
+        finally:
+            self._waiters -= 1
+
+    async def _heartbeat(self):
+        while self._waiters:
+            await asyncio.sleep(self.heartbeat_seconds)
+            if self.refresh is not None:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    logger.warning(f"Change log refresh failed: {str(e)}")
+            self._wake()
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "entries": len(self.entries),
+            "oldest_version": self.entries[0][0] if self.entries else None,
+            "clients": self.clients,
+        }
@@ -0,0 +1,20 @@
+from app.core.config import settings
+from app.services.blog.interfaces import BlogRepository
+
+def create_blog_service() -> BlogRepository:
+    """
+    Build the blog repository selected by BLOG_BACKEND ("gist" or "sqlite").
+    The gist backend is sharded when GIST_IDS lists more than one gist.
+    """
+    backend = settings.BLOG_BACKEND.lower()
+    if backend == "sqlite":
+        from app.services.blog.sqlite_service import SQLiteBlogService
+        return SQLiteBlogService()
+    if backend == "gist":
+        from app.services.blog.sharded_gist_service import ShardedGistBlogService, parse_gist_ids
+        gist_ids = parse_gist_ids(settings.GIST_IDS)
+        if len(gist_ids) > 1:
+            return ShardedGistBlogService(gist_ids)
+        from app.services.blog.gist_service import GistBlogService
+        return GistBlogService(gist_id=gist_ids[0] if gist_ids else None)
+    raise ValueError(f"Unknown BLOG_BACKEND: {settings.BLOG_BACKEND}")
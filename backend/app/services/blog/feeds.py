@@ -0,0 +1,113 @@
+import re
+from datetime import datetime, timezone
+from email.utils import formatdate
+from typing import Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape, quoteattr
+
+from app.services.blog.indexes import PostIndex, VersionIndex, post_timestamp
+
+# Characters XML 1.0 does not allow, even escaped
+INVALID_XML_RE = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+# The sitemap protocol allows at most this many URLs per file
+SITEMAP_MAX_URLS = 50000
+
+FEED_KINDS = ("rss", "atom", "sitemap")
+
+def _text(value) -> str:
+    return escape(INVALID_XML_RE.sub("", str(value or "")))
+
+def _attr(value) -> str:
+    return quoteattr(INVALID_XML_RE.sub("", str(value or "")))
+
+def _rfc3339(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
+
+class FeedIndex(PostIndex):
+    """
+    The RSS item, Atom entry and sitemap URL of every post, as ready-made
+    XML fragments. Only changed posts are rendered again; whole documents
+    are streamed from the fragments by ``document``.
+
+    Modification times come from ``versions``, which has to be applied first.
+    """
+
+    def __init__(self, versions: VersionIndex, site_url: str, post_path: str):
+        self.versions = versions
+        self.site_url = site_url.rstrip("/")
+        self.post_path = post_path
+        self.fragments: Dict[str, Tuple[str, str, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.fragments)
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        for post_id in removed:
+            self.fragments.pop(post_id, None)
+        for post_id, post in upserts.items():
+            self.fragments[post_id] = self._render(post_id, post)
+
+    def post_url(self, post_id: str, slug) -> str:
+        return self.site_url + self.post_path.format(id=post_id, slug=slug or post_id)
+
+    def _render(self, post_id: str, post: dict) -> Tuple[str, str, str]:
+        link = self.post_url(post_id, post.get("slug"))
+        # Stable across slug changes, unlike the link
+        guid = f"{self.site_url}/api/blog-posts/{post_id}"
+        published = post_timestamp(post.get("date"))
+        updated = self.versions.modified.get(post_id, published)
+        title, summary = _text(post.get("title")), _text(post.get("summary"))
+        tags = post.get("tags") or []
+
+        rss = (
+            f"<item><title>{title}</title><link>{_text(link)}</link>"
+            f'<guid isPermaLink="false">{_text(guid)}</guid>'
+            f"<pubDate>{formatdate(published, usegmt=True)}</pubDate>"
+            f"<description>{summary}</description>"
+            + "".join(f"<category>{_text(tag)}</category>" for tag in tags)
+            + "</item>\n"
+        )
+        atom = (
+            f"<entry><title>{title}</title><link href={_attr(link)}/><id>{_text(guid)}</id>"
+            f"<published>{_rfc3339(published)}</published><updated>{_rfc3339(updated)}</updated>"
+            f"<summary>{summary}</summary>"
+            + "".join(f"<category term={_attr(tag)}/>" for tag in tags)
+            + "</entry>\n"
+        )
+        sitemap = f"<url><loc>{_text(link)}</loc><lastmod>{_rfc3339(updated)}</lastmod></url>\n"
+        return rss, atom, sitemap
+
+    def document(self, kind: str, post_ids: Iterable[str], title: str, description: str) -> Iterator[str]:
+        """
+        Chunks of the ``kind`` document ("rss", "atom" or "sitemap") listing
+        ``post_ids`` in order, one post per chunk, so the document is never
+        built up front. The fragments are taken now, so posts changing while
+        it is streamed cannot mix versions.
+        """
+        entries = [self.fragments[post_id] for post_id in post_ids if post_id in self.fragments]
+        return self._chunks(kind, entries, title, description, self.versions.last_modified)
+
+    def _chunks(
+        self, kind: str, entries: List[Tuple[str, str, str]], title: str, description: str, updated: float
+    ) -> Iterator[str]:
+        site = _text(self.site_url)
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        if kind == "rss":
+            yield (
+                '<rss version="2.0"><channel>'
+                f"<title>{_text(title)}</title><link>{site}/</link>"
+                f"<description>{_text(description)}</description>"
+                f"<lastBuildDate>{formatdate(updated, usegmt=True)}</lastBuildDate>\n"
+            )
+        elif kind == "atom":
+            yield (
+                '<feed xmlns="http://www.w3.org/2005/Atom">'
+                f"<title>{_text(title)}</title><subtitle>{_text(description)}</subtitle>"
+                f"<link href={_attr(self.site_url + '/')}/><id>{site}/</id>"
+                f"<updated>{_rfc3339(updated)}</updated>\n"
+            )
+        else:
+            yield '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        position = FEED_KINDS.index(kind)
+        for fragments in entries:
+            yield fragments[position]
+        yield {"rss": "</channel></rss>\n", "atom": "</feed>\n", "sitemap": "</urlset>\n"}[kind]
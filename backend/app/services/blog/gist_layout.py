@@ -0,0 +1,83 @@
+"""
+Per-post gist layout.
+
+Each post lives in its own ``post_<id>.json`` file and ``blog_index.json`` holds
+the small listing fields of every post, so a write only PATCHes the files of
+the posts it touched plus the index. Gists still using the single
+``blog_data.json`` file are read as-is and migrated on the next flush.
+"""
+import json
+from typing import Dict, Iterable, Optional, Set
+
+LEGACY_FILENAME = "blog_data.json"
+INDEX_FILENAME = "blog_index.json"
+INDEX_FIELDS = ("id", "title", "summary", "tags", "date", "slug", "previous_slugs")
+
+# Marks a post whose file content was not inlined by the gist API
+RAW_URL_KEY = "_raw_url"
+
+def post_filename(post_id: str) -> str:
+    return f"post_{post_id}.json"
+
+def index_entry(post: dict) -> dict:
+    return {field: post.get(field) for field in INDEX_FIELDS}
+
+def encode_post(post: dict) -> str:
+    return json.dumps({k: v for k, v in post.items() if k != RAW_URL_KEY}, indent=2)
+
+def encode_index(data: Dict[str, dict]) -> str:
+    return json.dumps({post_id: index_entry(post) for post_id, post in data.items()}, indent=2)
+
+def raw_file_url(gist: dict, filename: str) -> Optional[str]:
+    """
+    Raw URL for a file the gist API left out of the listing (it only inlines
+    the first 300 files). This URL tracks the latest revision rather than a
+    pinned one.
+    """
+    owner = (gist.get("owner") or {}).get("login")
+    if not owner:
+        return None
+    return f"https://gist.githubusercontent.com/{owner}/{gist['id']}/raw/{filename}"
+
+def decode_per_post(gist: dict) -> Dict[str, dict]:
+    """
+    Build the post map from the index and per-post files. Posts whose file was
+    truncated or not listed keep only their index fields plus a raw URL to load
+    the full post from when it is actually needed.
+    """
+    files = gist["files"]
+    index = json.loads(files[INDEX_FILENAME]["content"])
+    data: Dict[str, dict] = {}
+    for post_id, entry in index.items():
+        file = files.get(post_filename(post_id))
+        if file is not None and not file.get("truncated") and file.get("content") is not None:
+            data[post_id] = json.loads(file["content"])
+            continue
+        url = file["raw_url"] if file is not None else raw_file_url(gist, post_filename(post_id))
+        data[post_id] = {**entry, RAW_URL_KEY: url}
+    return data
+
+def encode_changes(
+    data: Dict[str, dict],
+    changed: Iterable[str],
+    removed: Iterable[str],
+    existing_files: Set[str],
+    migrate: bool = False
+) -> Dict[str, Optional[dict]]:
+    """
+    PATCH ``files`` payload writing the changed posts, deleting removed ones
+    and rewriting the index. A migration writes every post and drops the
+    legacy file.
+    """
+    files: Dict[str, Optional[dict]] = {}
+    for post_id in (data.keys() if migrate else changed):
+        if post_id in data:
+            files[post_filename(post_id)] = {"content": encode_post(data[post_id])}
+    for post_id in removed:
+        filename = post_filename(post_id)
+        if filename in existing_files:
+            files[filename] = None
+    if migrate and LEGACY_FILENAME in existing_files:
+        files[LEGACY_FILENAME] = None
+    files[INDEX_FILENAME] = {"content": encode_index(data)}
+    return files
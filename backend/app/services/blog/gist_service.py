@@ -1,62 +1,415 @@
+import asyncio
 import httpx
 import json
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional, Set
 import logging
+import time
 
 from app.services.blog.interfaces import BlogRepository
+from app.services.blog.cache import PostCache
+from app.services.blog.singleflight import SingleFlight
+from app.services.blog.writer import GistWriter, RejectedWriteError, WriteAheadLog, apply_mutations
+from app.services.blog.snapshot import SnapshotStore
+from app.services.blog.poller import UpstreamPoller
+from app.services.blog.resilience import UpstreamGuard, create_upstream_guard, is_retryable
+from app.services.blog.indexes import SlugIndex
+from app.services.blog.slugs import assign_slug
+from app.services.blog.gist_layout import (
+    INDEX_FILENAME,
+    LEGACY_FILENAME,
+    RAW_URL_KEY,
+    decode_per_post,
+    encode_changes,
+)
 from app.models.blog_model import Blog
 from app.core.config import settings
+from app.core.exceptions import GistServiceException
+from app.core.http import create_github_client
+from app.core.metrics import timed
 from app.schemas.blog_schema import BlogCreate, BlogUpdate
 
 logger = logging.getLogger(__name__)
 
 class GistBlogService(BlogRepository):
-    def __init__(self):
-        self.api_url = f"https://api.github.com/gists/{settings.GIST_ID}"
+    def __init__(
+        self,
+        client: Optional[httpx.AsyncClient] = None,
+        gist_id: Optional[str] = None,
+        wal_path: Optional[str] = None,
+        on_change: Optional[Callable[[Dict[str, dict], List[str]], None]] = None,
+        snapshot_path: Optional[str] = None,
+        guard: Optional[UpstreamGuard] = None,
+        slug_index: Optional[SlugIndex] = None
+    ):
+        super().__init__()
+        self._client = client
+        self.gist_id = gist_id or settings.GIST_ID
+        self.api_url = f"{settings.GITHUB_API_URL.rstrip('/')}/gists/{self.gist_id}"
         self.headers = {
             "Authorization": f"token {settings.GITHUB_TOKEN}",
             "Accept": "application/vnd.github+json"
         }
-        self.filename = "blog_data.json"
+        self.cache = PostCache(
+            settings.CACHE_TTL_SECONDS,
+            settings.CACHE_STALE_SECONDS,
+            on_change=on_change or self._publish,
+        )
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._flight = SingleFlight()
+        # Last post map seen upstream; the cache holds it with queued mutations applied
+        self._upstream: Dict[str, dict] = {}
+        self._upstream_files: Set[str] = set()
+        # Set while the gist still uses the single blog_data.json file
+        self._needs_migration = False
+        # Lazily loaded post files, keyed by raw URL
+        self._raw_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._mutation_lock = asyncio.Lock()
+        self.writer = GistWriter(
+            WriteAheadLog(wal_path or settings.WRITE_AHEAD_LOG_PATH),
+            self._flush_mutations,
+            coalesce_window=settings.WRITE_COALESCE_SECONDS,
+            retry_delay=settings.WRITE_RETRY_SECONDS,
+            on_dead_letter=self._dead_lettered,
+        )
+        self.snapshot = SnapshotStore(snapshot_path or settings.SNAPSHOT_PATH)
+        self._snapshot_task: Optional[asyncio.Task] = None
+        self._snapshot_dirty = False
+        # Upstream health, reported by /health
+        self.last_success: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.poller = UpstreamPoller(
+            self._poll,
+            min_interval=settings.POLL_MIN_SECONDS,
+            max_interval=settings.POLL_MAX_SECONDS,
+        )
+        # Retries, circuit breaker and rate-limit budget for every GitHub call
+        self.guard = guard or create_upstream_guard()
+        # New slugs must be unique across this index (all shards' posts when sharded)
+        self._slug_index = slug_index if slug_index is not None else self.slugs
 
-    async def _fetch_data(self) -> dict:
-        async with httpx.AsyncClient() as client:
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The shared pooled client injected by the app lifespan. Standalone use
+        (scripts, tools) falls back to a lazily created client of the same shape.
+        """
+        if self._client is None:
+            self._client = create_github_client()
+        return self._client
+
+    def bind_client(self, client: httpx.AsyncClient):
+        self._client = client
+
+    def cache_stats(self) -> dict:
+        return {
+            **self.cache.stats(),
+            "single_flight": self._flight.stats(),
+            "poller": self.poller.stats(),
+        }
+
+    def upstream_stats(self) -> dict:
+        return self.guard.stats()
+
+    def writer_stats(self) -> dict:
+        return self.writer.stats()
+
+    def health(self) -> dict:
+        degraded = self.last_error is not None
+        stale = self.cache.data is not None and (self.cache.from_snapshot or not self.cache.is_servable_stale())
+        return {
+            "degraded": degraded,
+            "stale": stale,
+            "source": "snapshot" if self.cache.from_snapshot else "upstream",
+            "last_success_age_seconds": round(time.time() - self.last_success, 3) if self.last_success else None,
+            "last_error": self.last_error,
+        }
+
+    def load_indexes(self):
+        super().load_indexes()
+        self.load_snapshot()
+
+    def load_snapshot(self) -> int:
+        """Seed the cache (and so the indexes) from the local snapshot, if there is one."""
+        loaded = self.snapshot.load()
+        if loaded is None:
+            return 0
+        data, header = loaded
+        self._upstream = data
+        self._upstream_files = set(header.get("files") or [])
+        self._needs_migration = bool(header.get("needs_migration"))
+        self.cache.restore(data, header.get("etag"))
+        logger.info(f"Loaded {len(data)} post(s) of gist {self.gist_id} from snapshot version {header.get('version')}")
+        return len(data)
+
+    def _schedule_snapshot(self):
+        self._snapshot_dirty = True
+        if self._snapshot_task is None or self._snapshot_task.done():
+            self._snapshot_task = asyncio.create_task(self._write_snapshots())
+
+    async def _write_snapshots(self):
+        # Snapshots written while one is in progress collapse into a single follow-up write
+        while self._snapshot_dirty:
+            self._snapshot_dirty = False
+            header = {
+                "gist_id": self.gist_id,
+                "etag": self.cache.etag,
+                "files": sorted(self._upstream_files),
+                "needs_migration": self._needs_migration,
+            }
             try:
-                res = await client.get(self.api_url, headers=self.headers)
-                res.raise_for_status()
-                
-                if self.filename not in res.json()["files"]:
-                    return {}
-                    
-                file_content = res.json()["files"][self.filename]["content"]
-                return json.loads(file_content)
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code == 404:
-                    return {}
+                await asyncio.to_thread(self.snapshot.save, self._upstream, header)
+            except Exception as e:
+                logger.warning(f"Failed to write snapshot of gist {self.gist_id}: {str(e)}")
+
+    async def startup(self):
+        replayed = self.writer.start()
+        if replayed and self.cache.data is not None:
+            # The snapshot predates the replayed mutations
+            self.cache.update(apply_mutations(self._upstream, self.writer.pending))
+        if self._needs_migration:
+            self.writer.kick()
+        if settings.POLL_ENABLED:
+            self.poller.start()
+
+    async def shutdown(self):
+        await self.poller.stop()
+        await self.writer.stop()
+        if self._snapshot_task is not None:
+            await self._snapshot_task
+
+    async def _fetch_data(self) -> dict:
+        """
+        Fetch and parse the gist, revalidating the cached copy with
+        If-None-Match so unchanged gists cost a 304 instead of a full payload.
+        Concurrent callers share a single in-flight request and its outcome.
+        """
+        return await self._flight.do(self.api_url, self._fetch_upstream)
+
+    def _store_upstream(self, data: dict, etag: Optional[str] = None):
+        self._upstream = data
+        self.cache.store(apply_mutations(data, self.writer.pending), etag)
+        self._schedule_snapshot()
+
+    async def _fetch_upstream(self) -> dict:
+        headers = dict(self.headers)
+        if self.cache.data is not None and self.cache.etag:
+            headers["If-None-Match"] = self.cache.etag
+            self.cache.revalidations += 1
+
+        try:
+            res = await self.guard.call(lambda: self.client.get(self.api_url, headers=headers))
+            if res.status_code == 304:
+                self.cache.not_modified += 1
+                self.cache.touch()
+                self._upstream_ok()
+                return self.cache.data
+            res.raise_for_status()
+
+            with timed("parse"):
+                gist = res.json()
+                data = await self._decode_gist(gist)
+            self._upstream_files = set(gist["files"])
+            self._store_upstream(data, res.headers.get("ETag"))
+            self._upstream_ok()
+            return self.cache.data
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                self._store_upstream({})
+                self._upstream_ok()
+                return self.cache.data
+            self.last_error = str(e)
+            raise GistServiceException(f"GitHub responded {e.response.status_code}") from e
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+
+    async def _poll(self) -> bool:
+        before = self.cache.data
+        try:
+            await self._fetch_data()
+        finally:
+            # Hold polling back while GitHub asks us to wait or the read budget is spent
+            resume_at = self.guard.budget.resume_at()
+            if resume_at:
+                self.poller.defer_until(resume_at)
+        return self.cache.data is not before
+
+    def _upstream_ok(self):
+        self.last_success = time.time()
+        self.last_error = None
+
+    async def _get_data(self) -> dict:
+        """
+        Return the cached post map, fetching or revalidating it as needed.
+        Stale entries are served immediately while a background task refreshes them.
+        While the poller runs it owns revalidation, so reads never wait on GitHub
+        once any data is cached.
+        """
+        if self.cache.is_fresh():
+            self.cache.hits += 1
+            return self.cache.data
+        if self.cache.data is not None and self.poller.running:
+            self.cache.stale_hits += 1
+            return self.cache.data
+        if self.cache.is_servable_stale():
+            self.cache.stale_hits += 1
+            self._schedule_refresh()
+            return self.cache.data
+
+        self.cache.misses += 1
+        try:
+            return await self._fetch_data()
+        except Exception as e:
+            if self.cache.data is None:
                 raise
+            # Upstream is unreachable: keep serving the last known posts
+            logger.warning(f"Serving stale posts of gist {self.gist_id}, refresh failed: {str(e)}")
+            self.cache.stale_hits += 1
+            return self.cache.data
 
-    async def _write_data(self, data: dict):
-        async with httpx.AsyncClient() as client:
-            updated_content = json.dumps(data, indent=2)
-            await client.patch(self.api_url, headers=self.headers, json={
-                "files": {
-                    self.filename: {"content": updated_content}
-                }
-            })
+    def _schedule_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._background_refresh())
 
-    async def list_blogs(self) -> List[Blog]:
+    async def _background_refresh(self):
         try:
-            data = await self._fetch_data()
-            return [Blog(**v) for v in data.values()]
+            await self._fetch_data()
+        except Exception as e:
+            logger.warning(f"Background refresh of gist {self.gist_id} failed: {str(e)}")
+
+    async def _decode_gist(self, gist: dict) -> Dict[str, dict]:
+        files = gist["files"]
+        if INDEX_FILENAME in files:
+            self._needs_migration = False
+            return decode_per_post(gist)
+        if LEGACY_FILENAME not in files:
+            return {}
+
+        legacy = files[LEGACY_FILENAME]
+        if legacy.get("truncated"):
+            content = await self._fetch_raw(legacy["raw_url"])
+        else:
+            content = legacy["content"]
+        data = json.loads(content)
+        if data and not self._needs_migration:
+            logger.info(f"Gist {self.gist_id} uses {LEGACY_FILENAME}, migrating to per-post files")
+            self.writer.kick()
+        self._needs_migration = True
+        return data
+
+    async def _fetch_raw(self, url: str) -> str:
+        content = self._raw_cache.get(url)
+        if content is not None:
+            self._raw_cache.move_to_end(url)
+            return content
+        res = await self.guard.call(lambda: self.client.get(url))
+        res.raise_for_status()
+        self._raw_cache[url] = res.text
+        if len(self._raw_cache) > 32:
+            self._raw_cache.popitem(last=False)
+        return res.text
+
+    async def load_post(self, post: dict) -> dict:
+        """Return ``post`` with its full content, loading it via raw_url if it was truncated."""
+        url = post.get(RAW_URL_KEY)
+        if url is None:
+            return post
+        return json.loads(await self._fetch_raw(url))
+
+    async def _write_files(self, files: Dict[str, Optional[dict]]):
+        res = await self.guard.call(
+            lambda: self.client.patch(self.api_url, headers=self.headers, json={"files": files}),
+            write=True,
+        )
+        # A failed PATCH must keep the batch in the write-ahead log; the guard
+        # already retried the transient failures, any other error rejects the batch
+        if res.is_error and not is_retryable(res):
+            raise RejectedWriteError(f"GitHub responded {res.status_code}: {res.text[:200]}")
+        res.raise_for_status()
+        for filename, file in files.items():
+            if file is None:
+                self._upstream_files.discard(filename)
+            else:
+                self._upstream_files.add(filename)
+
+    async def _flush_mutations(self, batch: List[dict]):
+        """
+        Writer callback: apply a batch of queued mutations to the latest
+        upstream post map and PATCH only the files of the posts it touched.
+        """
+        # With the read budget spent, keep the remaining quota for the PATCH itself
+        if not self.guard.budget.resume_at():
+            await self._fetch_data()
+        data = apply_mutations(self._upstream, batch)
+        changed = {m["id"] for m in batch if m["id"] in data}
+        removed = {m["id"] for m in batch if m["id"] not in data}
+        if not changed and not removed and not self._needs_migration:
+            return
+
+        migrate = self._needs_migration
+        await self._write_files(encode_changes(data, changed, removed, self._upstream_files, migrate=migrate))
+        if migrate:
+            self._needs_migration = False
+            logger.info(f"Migrated {len(data)} post(s) in gist {self.gist_id} to per-post files")
+
+        # The PATCH changes the gist's ETag, so the next revalidation does a full GET.
+        self._upstream = data
+        pending = self.writer.pending_after(batch[-1]["seq"]) if batch else self.writer.pending
+        self.cache.store(apply_mutations(data, pending))
+        self._schedule_snapshot()
+
+    def _dead_lettered(self, mutation: dict):
+        """Writer callback: stop showing a mutation the gist rejected."""
+        if self.cache.data is not None:
+            self.cache.update(apply_mutations(self._upstream, self.writer.pending))
+
+    async def _mutate(self, op: str, post_id: str, post: Optional[dict] = None):
+        """Queue a mutation durably and reflect it in the cached post map."""
+        await self.writer.submit(op, post_id, post)
+        if self.cache.data is not None:
+            self.cache.update(apply_mutations(self.cache.data, [{"op": op, "id": post_id, "post": post}]))
+
+    async def ensure_fresh(self):
+        await self._get_data()
+
+    async def get_post_map(self) -> Dict[str, dict]:
+        """Raw post dicts keyed by id, including acknowledged but unflushed writes."""
+        return await self._get_data()
+
+    async def upsert_post(self, post: dict):
+        """Queue a complete post as-is, keeping its id and date."""
+        async with self._mutation_lock:
+            await self._mutate("upsert", post["id"], post)
+
+    async def remove_post(self, post_id: str):
+        async with self._mutation_lock:
+            await self._mutate("delete", post_id)
+
+    async def list_blogs(self, limit: Optional[int] = None, offset: int = 0) -> List[Blog]:
+        try:
+            data = await self._get_data()
+            posts = list(data.values())
+            if limit is not None or offset:
+                posts.sort(key=lambda p: (p["date"], int(p["id"])), reverse=True)
+                posts = posts[offset:offset + limit if limit is not None else None]
+            posts = await asyncio.gather(*(self.load_post(p) for p in posts))
+            return [Blog(**v) for v in posts]
         except Exception as e:
             logger.error(f"Error fetching blogs: {str(e)}")
             raise
 
+    async def get_post(self, post_id: str) -> Optional[dict]:
+        """A single raw post dict with its full content."""
+        post = (await self._get_data()).get(post_id)
+        if post is None:
+            return None
+        return await self.load_post(post)
+
     async def get_blog(self, blog_id: int) -> Optional[Blog]:
         try:
-            data = await self._fetch_data()
-            blog_data = data.get(str(blog_id))
+            blog_data = await self.get_post(str(blog_id))
             if not blog_data:
                 return None
             return Blog(**blog_data)
@@ -66,15 +419,16 @@ class GistBlogService(BlogRepository):
 
     async def create_blog(self, blog: BlogCreate) -> Blog:
         try:
-            data = await self._fetch_data()
-            new_id = str(max([int(i) for i in data.keys()] + [0]) + 1)
-            now_str = datetime.now().isoformat()
+            async with self._mutation_lock:
+                data = await self._get_data()
+                new_id = str(max([int(i) for i in data.keys()] + [0]) + 1)
+                now_str = datetime.now().isoformat()
 
-            blog_data = blog.model_dump()
-            blog_data.update({"id": new_id, "date": now_str})
-            data[new_id] = blog_data
+                blog_data = blog.model_dump()
+                blog_data.update({"id": new_id, "date": now_str})
+                assign_slug(blog_data, None, self._slug_index)
+                await self._mutate("upsert", new_id, blog_data)
 
-            await self._write_data(data)
             logger.info(f"Created blog post with ID: {new_id}")
             return Blog(**blog_data)
         except Exception as e:
@@ -83,24 +437,28 @@ class GistBlogService(BlogRepository):
 
     async def update_blog(self, blog_id: int, blog_update: BlogUpdate) -> Optional[Blog]:
         try:
-            data = await self._fetch_data()
-            blog_key = str(blog_id)
-            
-            if blog_key not in data:
-                return None
-            
-            # Update only the fields that are provided
-            existing_blog = data[blog_key]
-            update_data = blog_update.model_dump(exclude_unset=True)
-            
-            for key, value in update_data.items():
-                if value is not None:
-                    existing_blog[key] = value
-            
-            # Update the modification date
-            existing_blog["date"] = datetime.now().isoformat()
-            
-            await self._write_data(data)
+            async with self._mutation_lock:
+                data = await self._get_data()
+                blog_key = str(blog_id)
+
+                if blog_key not in data:
+                    return None
+
+                # Update only the fields that are provided
+                previous = await self.load_post(data[blog_key])
+                existing_blog = dict(previous)
+                update_data = blog_update.model_dump(exclude_unset=True)
+
+                for key, value in update_data.items():
+                    if value is not None:
+                        existing_blog[key] = value
+
+                # Update the modification date
+                existing_blog["date"] = datetime.now().isoformat()
+                assign_slug(existing_blog, previous, self._slug_index)
+
+                await self._mutate("upsert", blog_key, existing_blog)
+
             logger.info(f"Updated blog post with ID: {blog_id}")
             return Blog(**existing_blog)
         except Exception as e:
@@ -109,14 +467,15 @@ class GistBlogService(BlogRepository):
 
     async def delete_blog(self, blog_id: int) -> bool:
         try:
-            data = await self._fetch_data()
-            blog_key = str(blog_id)
-            
-            if blog_key not in data:
-                return False
-            
-            del data[blog_key]
-            await self._write_data(data)
+            async with self._mutation_lock:
+                data = await self._get_data()
+                blog_key = str(blog_id)
+
+                if blog_key not in data:
+                    return False
+
+                await self._mutate("delete", blog_key)
+
             logger.info(f"Deleted blog post with ID: {blog_id}")
             return True
         except Exception as e:
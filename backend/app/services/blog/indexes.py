@@ -0,0 +1,307 @@
+import base64
+import bisect
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from app.services.blog.gist_layout import index_entry
+
+class PostIndex:
+    """
+    A derived view of the post map. Repositories call ``apply`` with only the
+    posts that changed, so indexes are maintained incrementally instead of
+    being rebuilt from the whole corpus.
+    """
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        raise NotImplementedError
+
+def diff_posts(old: Optional[Dict[str, dict]], new: Dict[str, dict]) -> Tuple[Dict[str, dict], List[str]]:
+    """Posts added or changed between two post maps, and ids that disappeared."""
+    if not old:
+        return dict(new), []
+    upserts = {}
+    for post_id, post in new.items():
+        previous = old.get(post_id)
+        # Unchanged posts are usually the same object, so the identity check is the fast path
+        if previous is not post and previous != post:
+            upserts[post_id] = post
+    removed = [post_id for post_id in old if post_id not in new]
+    return upserts, removed
+
+def encode_cursor(key: Tuple[str, int]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    date, post_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    return str(date), int(post_id)
+
+def _sort_key(post: dict) -> Tuple[str, int]:
+    return str(post["date"]), int(post["id"])
+
+class SummaryIndex(PostIndex):
+    """
+    Listing fields of every post plus an ordering by (date, id), so pages are
+    answered by bisecting a sorted list instead of sorting the corpus per request.
+    """
+
+    # Above this many changes a full re-sort is cheaper than repeated insort
+    BULK_THRESHOLD = 64
+
+    def __init__(self):
+        self.summaries: Dict[str, dict] = {}
+        self._keys: Dict[str, Tuple[str, int]] = {}
+        self._order: List[Tuple[str, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        removed = list(removed)
+        bulk = len(upserts) + len(removed) > self.BULK_THRESHOLD
+        for post_id in removed:
+            self._discard(post_id, bulk)
+        for post_id, post in upserts.items():
+            self._discard(post_id, bulk)
+            key = _sort_key(post)
+            self.summaries[post_id] = index_entry(post)
+            self._keys[post_id] = key
+            if not bulk:
+                bisect.insort(self._order, key)
+        if bulk:
+            self._order = sorted(self._keys.values())
+
+    def _discard(self, post_id: str, bulk: bool):
+        key = self._keys.pop(post_id, None)
+        self.summaries.pop(post_id, None)
+        if key is not None and not bulk:
+            i = bisect.bisect_left(self._order, key)
+            if i < len(self._order) and self._order[i] == key:
+                del self._order[i]
+
+    @staticmethod
+    def _range(order: List[Tuple[str, int]], since: Optional[str], until: Optional[str]) -> Tuple[int, int]:
+        lo = bisect.bisect_left(order, (since, -1)) if since else 0
+        # "\uffff" sorts after any ISO timestamp with the same prefix
+        hi = bisect.bisect_right(order, (until + "\uffff", 0)) if until else len(order)
+        return lo, hi
+
+    def page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        descending: bool = True,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        candidates: Optional[Set[str]] = None,
+    ) -> Tuple[List[str], Optional[str], int]:
+        """
+        Return (post ids, next cursor, total matching) for one page.
+        ``since``/``until`` bound the date range by bisection. ``candidates``
+        restricts the page to a precomputed id set (e.g. from the tag index),
+        sorted on its own so the cost follows the number of candidates, not
+        the corpus.
+        """
+        if candidates is not None:
+            order = sorted(self._keys[post_id] for post_id in candidates if post_id in self._keys)
+        else:
+            order = self._order
+        full_lo, full_hi = self._range(order, since, until)
+        lo, hi = full_lo, full_hi
+        if cursor:
+            key = decode_cursor(cursor)
+            if descending:
+                hi = min(hi, bisect.bisect_left(order, key))
+            else:
+                lo = max(lo, bisect.bisect_right(order, key))
+
+        positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+        ids: List[str] = []
+        next_cursor = None
+        for i in positions:
+            if len(ids) == limit:
+                next_cursor = encode_cursor(self._keys[ids[-1]])
+                break
+            ids.append(str(order[i][1]))
+
+        return ids, next_cursor, full_hi - full_lo
+
+class TagIndex(PostIndex):
+    """
+    Tag -> post ids, with per-tag counts read straight from the set sizes.
+    Lookups cost O(result) rather than a scan of the corpus.
+    """
+
+    def __init__(self):
+        self.posts_by_tag: Dict[str, Set[str]] = {}
+        self.tags_by_post: Dict[str, Tuple[str, ...]] = {}
+        self._facets: Optional[List[Tuple[str, int]]] = None
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        for post_id in removed:
+            self._discard(post_id)
+        for post_id, post in upserts.items():
+            tags = tuple(dict.fromkeys(post.get("tags") or []))
+            if self.tags_by_post.get(post_id) == tags:
+                continue
+            self._discard(post_id)
+            for tag in tags:
+                self.posts_by_tag.setdefault(tag, set()).add(post_id)
+            self.tags_by_post[post_id] = tags
+            self._facets = None
+
+    def _discard(self, post_id: str):
+        for tag in self.tags_by_post.pop(post_id, ()):
+            posts = self.posts_by_tag.get(tag)
+            if posts is not None:
+                posts.discard(post_id)
+                if not posts:
+                    del self.posts_by_tag[tag]
+        self._facets = None
+
+    def match(self, tags: Iterable[str], match_all: bool = True) -> Set[str]:
+        sets = [self.posts_by_tag.get(tag, set()) for tag in dict.fromkeys(tags)]
+        if not sets:
+            return set()
+        if match_all:
+            # Intersect starting from the smallest set
+            sets.sort(key=len)
+            return set(sets[0]).intersection(*sets[1:])
+        return set().union(*sets)
+
+    def facets(self) -> List[Tuple[str, int]]:
+        """(tag, post count) pairs, most used first; cached until the tags change."""
+        if self._facets is None:
+            self._facets = sorted(
+                ((tag, len(posts)) for tag, posts in self.posts_by_tag.items()),
+                key=lambda item: (-item[1], item[0]),
+            )
+        return self._facets
+
+class SlugIndex(PostIndex):
+    """
+    Slug -> post id for current slugs, plus the slugs posts had before, which
+    are kept as redirects. Lookups and uniqueness checks are dict lookups.
+    A current slug always wins over another post's old slug.
+    """
+
+    def __init__(self):
+        self.ids_by_slug: Dict[str, str] = {}
+        self.redirects: Dict[str, str] = {}
+        self.slugs_by_post: Dict[str, Tuple[Optional[str], Tuple[str, ...]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids_by_slug)
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        for post_id in removed:
+            self._discard(post_id)
+        for post_id, post in upserts.items():
+            slugs = (post.get("slug"), tuple(post.get("previous_slugs") or ()))
+            if self.slugs_by_post.get(post_id) == slugs:
+                continue
+            self._discard(post_id)
+            slug, previous = slugs
+            if slug:
+                self.ids_by_slug[slug] = post_id
+                self.redirects.pop(slug, None)
+            for old in previous:
+                if old not in self.ids_by_slug:
+                    self.redirects[old] = post_id
+            self.slugs_by_post[post_id] = slugs
+
+    def _discard(self, post_id: str):
+        slug, previous = self.slugs_by_post.pop(post_id, (None, ()))
+        if slug and self.ids_by_slug.get(slug) == post_id:
+            del self.ids_by_slug[slug]
+        for old in previous:
+            if self.redirects.get(old) == post_id:
+                del self.redirects[old]
+
+    def resolve(self, slug: str) -> Optional[Tuple[str, bool]]:
+        """(post id, whether ``slug`` is that post's current slug), or None."""
+        post_id = self.ids_by_slug.get(slug)
+        if post_id is not None:
+            return post_id, True
+        post_id = self.redirects.get(slug)
+        return (post_id, False) if post_id is not None else None
+
+    def current_slug(self, post_id: str) -> Optional[str]:
+        return self.slugs_by_post.get(post_id, (None, ()))[0]
+
+    def owner(self, slug: str) -> Optional[str]:
+        found = self.resolve(slug)
+        return found[0] if found else None
+
+    def unique(self, base: str, post_id: Optional[str] = None) -> str:
+        """``base``, or ``base-2``, ``base-3``... whichever no other post uses (current or old)."""
+        candidate, n = base, 1
+        while self.owner(candidate) not in (None, post_id):
+            n += 1
+            candidate = f"{base}-{n}"
+        return candidate
+
+def post_hash(post_id: str, post: dict) -> int:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(post_id.encode())
+    h.update(b"\0")
+    h.update(json.dumps(post, sort_keys=True, separators=(",", ":"), default=str).encode())
+    return int.from_bytes(h.digest(), "big")
+
+def post_timestamp(value) -> float:
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value))
+    except (TypeError, ValueError):
+        return 0.0
+    if parsed.tzinfo is None:
+        # Post dates are written in server local time
+        parsed = parsed.astimezone()
+    return parsed.astimezone(timezone.utc).timestamp()
+
+class VersionIndex(PostIndex):
+    """
+    Content hash of every post, and a corpus hash that is the XOR of them all,
+    so a change re-hashes only the posts it touched and updates the corpus
+    hash in O(1). Used as strong ETags for conditional GETs.
+
+    Each post also gets a modification time: its ``date`` when first loaded,
+    or the time a later change was seen (posts keep their date when edited).
+    """
+
+    def __init__(self):
+        self.hashes: Dict[str, int] = {}
+        self.modified: Dict[str, float] = {}
+        self.corpus_hash = 0
+        self.last_modified = 0.0
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        now = time.time()
+        for post_id in removed:
+            previous = self.hashes.pop(post_id, None)
+            if previous is not None:
+                self.corpus_hash ^= previous
+                self.modified.pop(post_id, None)
+                self.last_modified = max(self.last_modified, now)
+        for post_id, post in upserts.items():
+            digest = post_hash(post_id, post)
+            previous = self.hashes.get(post_id)
+            if previous == digest:
+                continue
+            if previous is not None:
+                self.corpus_hash ^= previous
+            self.corpus_hash ^= digest
+            self.hashes[post_id] = digest
+            date = post_timestamp(post.get("date"))
+            modified = date if previous is None else max(date, now)
+            self.modified[post_id] = modified
+            self.last_modified = max(self.last_modified, modified)
+
+    def corpus_etag(self) -> str:
+        return f"{self.corpus_hash:032x}"
+
+    def post_etag(self, post_id: str) -> Optional[str]:
+        digest = self.hashes.get(post_id)
+        return f"{digest:032x}" if digest is not None else None
@@ -1,8 +1,166 @@
-from typing import List, Dict
-from app.models.blog_model import BlogBase
+import asyncio
+import logging
+from typing import List, Dict, Iterable, Iterator, Optional
+from app.core.config import settings
+from app.models.blog_model import Blog, BlogBase
+from app.services.blog.changes import ChangeLog
+from app.services.blog.feeds import SITEMAP_MAX_URLS, FeedIndex
+from app.services.blog.indexes import PostIndex, SlugIndex, SummaryIndex, TagIndex, VersionIndex
+from app.services.blog.related import RelatedIndex
+from app.services.blog.search_index import SearchIndex, make_snippet, tokenize
+
+logger = logging.getLogger(__name__)
+
+PAGE_FIELDS = ("id", "title", "summary", "tags", "date", "slug", "content", "media")
+SUMMARY_FIELDS = ("id", "title", "summary", "tags", "date", "slug")
 
 class BlogRepository:
-    async def list_blogs(self) -> List[BlogBase]:
+    def __init__(self):
+        # In-memory indexes derived from the posts, updated incrementally on every change
+        self.summaries = SummaryIndex()
+        self.search_index = SearchIndex()
+        self.tags = TagIndex()
+        self.versions = VersionIndex()
+        self.slugs = SlugIndex()
+        self.related = RelatedIndex(k=settings.RELATED_POSTS_K, tag_weight=settings.RELATED_TAG_WEIGHT)
+        # After versions, whose modification times the feed entries use
+        self.feeds = FeedIndex(self.versions, settings.FRONTEND_URL, settings.FEED_POST_PATH)
+        # Last, so clients told about a change find every other index updated
+        self.changes = ChangeLog(
+            max_entries=settings.CHANGE_LOG_ENTRIES,
+            heartbeat_seconds=settings.CHANGE_HEARTBEAT_SECONDS,
+            refresh=self.ensure_fresh,
+        )
+        self.indexes: List[PostIndex] = [
+            self.summaries, self.search_index, self.tags, self.versions, self.slugs, self.related, self.feeds,
+            self.changes
+        ]
+
+    def load_indexes(self):
+        """Load persisted index state; called from the app lifespan before startup."""
+        loaded = self.search_index.load(settings.SEARCH_INDEX_PATH)
+        if loaded:
+            logger.info(f"Loaded {loaded} saved search index entries")
+
+    def save_indexes(self):
+        """Persist index state; called from the app lifespan after shutdown."""
+        if self.search_index.dirty:
+            self.search_index.save(settings.SEARCH_INDEX_PATH)
+
+    def _publish(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        removed = list(removed)
+        for index in self.indexes:
+            index.apply(upserts, removed)
+
+    async def ensure_fresh(self):
+        """Make sure the indexes reflect the current posts (may revalidate upstream)."""
+        pass
+
+    async def get_post(self, post_id: str) -> Optional[Dict]:
+        """A single post as a raw dict, including its content."""
+        raise NotImplementedError
+
+    async def list_page(
+        self,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Iterable[str] = SUMMARY_FIELDS,
+        descending: bool = True,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        match_all: bool = True
+    ) -> Dict:
+        """
+        One page of posts ordered by date, served from the summary index.
+        Full posts are only loaded when ``fields`` asks for content or media.
+        """
+        await self.ensure_fresh()
+        candidates = self.tags.match(tags, match_all) if tags else None
+        ids, next_cursor, total = self.summaries.page(
+            limit, cursor=cursor, descending=descending, since=since, until=until, candidates=candidates
+        )
+        fields = list(fields)
+        if any(field not in SUMMARY_FIELDS for field in fields):
+            posts = await asyncio.gather(*(self.get_post(post_id) for post_id in ids))
+        else:
+            posts = [self.summaries.summaries[post_id] for post_id in ids]
+        items = [{field: post.get(field) for field in fields} for post in posts if post is not None]
+        return {"items": items, "next_cursor": next_cursor, "total": total}
+
+    async def list_blogs_by_tags(self, tags: List[str], match_all: bool = True) -> List[Blog]:
+        """Posts carrying all (or any) of ``tags``, newest first, via the tag index."""
+        await self.ensure_fresh()
+        ids, _, _ = self.summaries.page(len(self.summaries) or 1, candidates=self.tags.match(tags, match_all))
+        posts = await asyncio.gather(*(self.get_post(post_id) for post_id in ids))
+        return [Blog(**post) for post in posts if post is not None]
+
+    async def tag_facets(self) -> List[Dict]:
+        await self.ensure_fresh()
+        return [{"tag": tag, "count": count} for tag, count in self.tags.facets()]
+
+    async def search(self, query: str, limit: int = 10, offset: int = 0) -> Dict:
+        """BM25-ranked posts matching ``query`` with highlighted content snippets."""
+        await self.ensure_fresh()
+        hits, total = self.search_index.search(query, limit=limit, offset=offset)
+        posts = await asyncio.gather(*(self.get_post(post_id) for post_id, _ in hits))
+        terms = tokenize(query)
+        items = []
+        for (post_id, score), post in zip(hits, posts):
+            if post is None:
+                continue
+            item = {field: post.get(field) for field in SUMMARY_FIELDS}
+            item["score"] = score
+            item["snippet"] = make_snippet(post.get("content") or post.get("summary") or "", terms)
+            items.append(item)
+        return {"query": query, "total": total, "items": items}
+
+    async def related_posts(self, post_id: str, limit: int = 5) -> Optional[List[Dict]]:
+        """Summaries of the posts most similar to ``post_id``, with scores; None if there is no such post."""
+        await self.ensure_fresh()
+        if post_id not in self.summaries.summaries:
+            return None
+        await self.related.refresh()
+        items = []
+        for related_id, score in self.related.related(post_id, limit):
+            summary = self.summaries.summaries.get(related_id)
+            if summary is not None:
+                items.append({**{field: summary.get(field) for field in SUMMARY_FIELDS}, "score": score})
+        return items
+
+    async def feed_document(self, kind: str) -> Iterator[str]:
+        """Chunks of the RSS, Atom or sitemap document, newest posts first."""
+        await self.ensure_fresh()
+        limit = SITEMAP_MAX_URLS if kind == "sitemap" else settings.FEED_MAX_ITEMS
+        ids, _, _ = self.summaries.page(limit)
+        return self.feeds.document(kind, ids, settings.FEED_TITLE, settings.FEED_DESCRIPTION)
+
+    async def startup(self):
+        """Called once from the app lifespan before serving requests."""
+        pass
+
+    async def shutdown(self):
+        """Called once from the app lifespan on graceful shutdown."""
+        pass
+
+    def bind_client(self, client):
+        """Backends that call GitHub use the app's shared HTTP client."""
+        pass
+
+    def cache_stats(self) -> Dict:
+        return {}
+
+    def writer_stats(self) -> Dict:
+        return {}
+
+    def upstream_stats(self) -> Dict:
+        return {}
+
+    def health(self) -> Dict:
+        """Backend health for /health: at least ``degraded`` and ``stale`` flags."""
+        return {"degraded": False, "stale": False}
+
+    async def list_blogs(self, limit: Optional[int] = None, offset: int = 0) -> List[BlogBase]:
         raise NotImplementedError
 
     async def create_blog(self, blog: BlogBase) -> BlogBase:
@@ -10,3 +168,9 @@ class BlogRepository:
 
     async def get_blog(self, blog_id: int) -> BlogBase:
         raise NotImplementedError
+
+    async def update_blog(self, blog_id: int, blog: BlogBase) -> Optional[BlogBase]:
+        raise NotImplementedError
+
+    async def delete_blog(self, blog_id: int) -> bool:
+        raise NotImplementedError
@@ -0,0 +1,102 @@
+"""
+Markdown to HTML for server-side rendering of post content.
+
+Parsing is CommonMark (markdown-it-py) plus the GFM extensions the editor
+produces: tables, strikethrough and bare-URL autolinks. Raw HTML in the
+source is escaped, never passed through, and the rendered HTML is cleaned
+by nh3 against an allow-list, so only ``ALLOWED_TAGS``/``ALLOWED_ATTRIBUTES``
+and URLs that are relative or use ``SAFE_SCHEMES`` survive. Functions here
+are module-level and picklable so they can run in a worker process.
+"""
+import html
+import math
+import re
+from typing import Dict, List, Tuple
+
+import nh3
+from markdown_it import MarkdownIt
+
+SAFE_SCHEMES = {"http", "https", "mailto"}
+WORDS_PER_MINUTE = 200
+
+ALLOWED_TAGS = {
+    "p", "br", "hr", "h1", "h2", "h3", "h4", "h5", "h6", "blockquote", "pre", "code",
+    "em", "strong", "s", "a", "img", "ul", "ol", "li",
+    "table", "thead", "tbody", "tr", "th", "td",
+}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title", "rel"},
+    "img": {"src", "alt", "title", "loading"},
+    "code": {"class"},
+    "ol": {"start"},
+    "th": {"style"},
+    "td": {"style"},
+    **{f"h{level}": {"id"} for level in range(1, 7)},
+}
+
+TAG_RE = re.compile(r"<[^>]+>")
+HTTP_RE = re.compile(r"https?://", re.I)
+
+def _render_image(self, tokens, idx, options, env) -> str:
+    tokens[idx].attrSet("loading", "lazy")
+    return self.image(tokens, idx, options, env)
+
+def _render_link_open(self, tokens, idx, options, env) -> str:
+    if HTTP_RE.match(tokens[idx].attrGet("href") or ""):
+        tokens[idx].attrSet("rel", "nofollow noopener")
+    return self.renderToken(tokens, idx, options, env)
+
+def _parser() -> MarkdownIt:
+    md = MarkdownIt("commonmark", {"html": False, "linkify": True}).enable(["table", "strikethrough", "linkify"])
+    md.add_render_rule("image", _render_image)
+    md.add_render_rule("link_open", _render_link_open)
+    return md
+
+MARKDOWN = _parser()
+SANITIZER = nh3.Cleaner(
+    tags=ALLOWED_TAGS,
+    attributes=ALLOWED_ATTRIBUTES,
+    url_schemes=SAFE_SCHEMES,
+    # rel is set above, only on absolute links
+    link_rel=None,
+    filter_style_properties={"text-align"},
+)
+
+def heading_id(text: str, used: Dict[str, int]) -> str:
+    """GitHub-style anchor for a heading, made unique within the document."""
+    plain = html.unescape(TAG_RE.sub("", text)).lower()
+    slug = re.sub(r"[^\w\- ]", "", plain).strip().replace(" ", "-") or "section"
+    count = used.get(slug, 0)
+    used[slug] = count + 1
+    return slug if count == 0 else f"{slug}-{count}"
+
+def _add_heading_ids(tokens, env) -> List[Dict]:
+    """Give each heading an anchor and return the table of contents."""
+    toc: List[Dict] = []
+    used: Dict[str, int] = {}
+    for i, token in enumerate(tokens):
+        if token.type != "heading_open":
+            continue
+        inner = MARKDOWN.renderer.renderInline(tokens[i + 1].children or [], MARKDOWN.options, env)
+        anchor = heading_id(inner, used)
+        token.attrSet("id", anchor)
+        toc.append({"level": int(token.tag[1]), "id": anchor, "title": html.unescape(TAG_RE.sub("", inner))})
+    return toc
+
+def reading_stats(content: str) -> Tuple[int, int]:
+    """(word count, reading time in whole minutes, at least 1)."""
+    words = len(re.findall(r"\w+", content))
+    return words, max(1, math.ceil(words / WORDS_PER_MINUTE))
+
+def render_markdown(content: str) -> Dict:
+    """
+    Render ``content`` to sanitized HTML. Returns the HTML, a table of
+    contents (``level``, ``id``, ``title`` per heading), the word count and
+    an estimated reading time.
+    """
+    env: Dict = {}
+    tokens = MARKDOWN.parse(content, env)
+    toc = _add_heading_ids(tokens, env)
+    body = SANITIZER.clean(MARKDOWN.renderer.render(tokens, MARKDOWN.options, env)).strip()
+    words, minutes = reading_stats(content)
+    return {"html": body, "toc": toc, "word_count": words, "reading_time_minutes": minutes}
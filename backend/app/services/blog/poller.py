@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class UpstreamPoller:
+    """
+    Background task that keeps a cache warm by calling ``poll_fn`` on an
+    adaptive interval.
+
+    ``poll_fn`` returns whether the data changed. A change resets the
+    interval to ``min_interval``; every unchanged or failed poll multiplies
+    it by ``backoff`` up to ``max_interval``. ``defer_until`` holds polling
+    back, e.g. until GitHub's rate limit resets or a ``Retry-After`` expires.
+    """
+
+    def __init__(
+        self,
+        poll_fn: Callable[[], Awaitable[bool]],
+        min_interval: float,
+        max_interval: float,
+        backoff: float = 2.0,
+    ):
+        self.poll_fn = poll_fn
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self.backoff = backoff
+        self.interval = min_interval
+        self._deferred_until = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.polls = 0
+        self.changes = 0
+        self.failures = 0
+        self.deferrals = 0
+        self.last_poll: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def defer_until(self, timestamp: float):
+        if timestamp > self._deferred_until:
+            self._deferred_until = timestamp
+            self.deferrals += 1
+
+    async def _run(self):
+        delay = 0.0
+        while True:
+            await asyncio.sleep(delay)
+            # Deferrals may arrive while sleeping (from request-driven calls too)
+            while (wait := self._deferred_until - time.time()) > 0:
+                await asyncio.sleep(wait)
+
+            self.polls += 1
+            self.last_poll = time.time()
+            try:
+                changed = await self.poll_fn()
+            except Exception as e:
+                self.failures += 1
+                changed = False
+                logger.warning(f"Upstream poll failed: {str(e)}")
+            if changed:
+                self.changes += 1
+                self.interval = self.min_interval
+            else:
+                self.interval = min(self.max_interval, self.interval * self.backoff)
+            delay = self.interval
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_seconds": round(self.interval, 3),
+            "polls": self.polls,
+            "changes": self.changes,
+            "failures": self.failures,
+            "deferrals": self.deferrals,
+            "deferred_for_seconds": round(max(0.0, self._deferred_until - time.time()), 3),
+            "last_poll_age_seconds": round(time.time() - self.last_poll, 3) if self.last_poll else None,
+        }
@@ -0,0 +1,299 @@
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from app.services.blog.indexes import PostIndex
+from app.services.blog.search_index import fingerprint, term_frequencies
+
+logger = logging.getLogger(__name__)
+
+class _Vectors:
+    """TF-IDF and tag matrices of the whole corpus, one row per post."""
+
+    def __init__(self, ids: List[str], text: sparse.csr_matrix, tags: sparse.csr_matrix, tag_counts: np.ndarray):
+        self.ids = ids
+        self.positions = {post_id: i for i, post_id in enumerate(ids)}
+        self.text = text
+        self.tags = tags
+        self.tag_counts = tag_counts
+        self._transposed: Optional[Tuple[sparse.csr_matrix, sparse.csr_matrix]] = None
+
+    def transposed(self) -> Tuple[sparse.csr_matrix, sparse.csr_matrix]:
+        """Text and tag matrices transposed to CSR, for multiplying many rows at once."""
+        if self._transposed is None:
+            self._transposed = (self.text.T.tocsr(), self.tags.T.tocsr())
+        return self._transposed
+
+class _Table:
+    """post id -> [(related id, score)], best first, and the reverse references."""
+
+    def __init__(self, lists: Optional[Dict[str, List[Tuple[str, float]]]] = None,
+                 listed_by: Optional[Dict[str, Set[str]]] = None):
+        self.lists = lists if lists is not None else {}
+        self.listed_by = listed_by if listed_by is not None else {}
+
+    def copy(self) -> "_Table":
+        # Lists are replaced, never changed in place, so only the reverse references need copying
+        return _Table(dict(self.lists), {post_id: set(listed) for post_id, listed in self.listed_by.items()})
+
+    def set(self, post_id: str, related: List[Tuple[str, float]]):
+        for other, _ in self.lists.get(post_id, ()):
+            listed = self.listed_by.get(other)
+            if listed is not None:
+                listed.discard(post_id)
+        self.lists[post_id] = related
+        for other, _ in related:
+            self.listed_by.setdefault(other, set()).add(post_id)
+
+    def remove(self, post_id: str):
+        self.set(post_id, [])
+        del self.lists[post_id]
+        self.listed_by.pop(post_id, None)
+
+    def threshold(self, post_id: str, k: int) -> float:
+        """Score a post has to beat to enter ``post_id``'s list."""
+        related = self.lists.get(post_id, ())
+        return related[-1][1] if len(related) >= k else 0.0
+
+class _Refresh:
+    """The posts as of the start of one refresh, and the changes it applies."""
+
+    def __init__(self, index: "RelatedIndex"):
+        self.ids = list(index._terms)
+        self.terms = [index._terms[post_id] for post_id in self.ids]
+        self.tags = [index._tags[post_id] for post_id in self.ids]
+        # Columns are only ever added, so these widths cover every captured row
+        self.term_width = len(index._term_columns)
+        self.tag_width = len(index._tag_columns)
+        self.changed, index._changed = index._changed, set()
+        self.removed, index._removed = index._removed, set()
+        self.changes_since_build = index._changes_since_build + len(self.changed) + len(self.removed)
+        self.full = not index._built or self.changes_since_build > max(index.k, index.REBUILD_FRACTION * len(self.ids))
+
+    def restore(self, index: "RelatedIndex"):
+        """Hand the changes back to ``index`` after a failed refresh, as the posts now stand."""
+        for post_id in self.changed | self.removed:
+            (index._changed if post_id in index._terms else index._removed).add(post_id)
+
+class RelatedIndex(PostIndex):
+    """
+    The ``k`` most similar posts of every post, by cosine similarity of
+    TF-IDF vectors (field-weighted like search) blended with tag overlap
+    (Jaccard), weighted by ``tag_weight``.
+
+    Changes are applied lazily, when ``refresh`` is awaited before a lookup.
+    Usually only the changed posts are scored against the corpus, with one
+    sparse product: their own lists are replaced, they are inserted into
+    other lists they now beat, and lists that held a changed or removed post
+    are rescored. The whole table is rebuilt in blocks of ``BLOCK_ROWS`` rows
+    on first use and once enough posts changed that IDF weights have drifted.
+    Scoring runs in a worker thread on a copy of the table, and lookups are
+    answered from the previous table until the new one replaces it.
+    """
+
+    # Rows scored at once in a full build; bounds the dense score block to BLOCK_ROWS x posts
+    BLOCK_ROWS = 256
+    # Up to this many rows are scored as dense vectors, which is faster than a sparse product
+    DENSE_ROWS = 32
+    # Share of the corpus that may change before the table is rebuilt from scratch
+    REBUILD_FRACTION = 0.25
+
+    def __init__(self, k: int = 10, tag_weight: float = 0.3):
+        self.k = k
+        self.tag_weight = tag_weight
+        self.fingerprints: Dict[str, str] = {}
+        # Per post: (term columns, log-scaled term frequencies) and tag columns
+        self._terms: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._tags: Dict[str, np.ndarray] = {}
+        self._term_columns: Dict[str, int] = {}
+        self._tag_columns: Dict[str, int] = {}
+        self._table = _Table()
+        self._changed: Set[str] = set()
+        self._removed: Set[str] = set()
+        self._built = False
+        self._changes_since_build = 0
+        self._refreshing: Optional[asyncio.Task] = None
+
+        # Counters
+        self.full_builds = 0
+        self.incremental_updates = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    @property
+    def table(self) -> Dict[str, List[Tuple[str, float]]]:
+        return self._table.lists
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        for post_id in removed:
+            if self._terms.pop(post_id, None) is not None:
+                del self._tags[post_id]
+                del self.fingerprints[post_id]
+                self._changed.discard(post_id)
+                self._removed.add(post_id)
+        for post_id, post in upserts.items():
+            fp = fingerprint(post)
+            if self.fingerprints.get(post_id) == fp:
+                continue
+            tf = term_frequencies(post)
+            columns = np.fromiter((self._column(self._term_columns, term) for term in tf), np.int32, len(tf))
+            weights = 1 + np.log(np.fromiter(tf.values(), np.float64, len(tf)))
+            tags = dict.fromkeys(post.get("tags") or [])
+            self._terms[post_id] = (columns, weights)
+            self._tags[post_id] = np.fromiter((self._column(self._tag_columns, tag) for tag in tags), np.int32, len(tags))
+            self.fingerprints[post_id] = fp
+            self._changed.add(post_id)
+            self._removed.discard(post_id)
+
+    @staticmethod
+    def _column(columns: Dict[str, int], key: str) -> int:
+        column = columns.get(key)
+        if column is None:
+            column = columns[key] = len(columns)
+        return column
+
+    def related(self, post_id: str, limit: int) -> List[Tuple[str, float]]:
+        """Up to ``limit`` (post id, score) pairs most similar to ``post_id``, best first, as of the last refresh."""
+        return [(other, round(score, 4)) for other, score in self._table.lists.get(post_id, [])[:limit]]
+
+    async def refresh(self):
+        """
+        Start scoring the changes applied since the last refresh, unless that
+        is already under way. Only the first build is waited for; after that
+        lookups keep using the previous table while the new one is scored.
+        """
+        if self._refreshing is None and (self._changed or self._removed or not self._built):
+            self._refreshing = asyncio.create_task(self._refresh_in_thread())
+        if self._refreshing is not None and not self._built:
+            await asyncio.shield(self._refreshing)
+
+    async def _refresh_in_thread(self):
+        refresh = _Refresh(self)
+        try:
+            table = await asyncio.to_thread(self._score, refresh)
+        except Exception as e:
+            refresh.restore(self)
+            logger.warning(f"Related posts refresh failed: {str(e)}")
+        else:
+            self._finish(refresh, table)
+        finally:
+            self._refreshing = None
+
+    def refresh_now(self):
+        """Apply pending changes in the calling thread, for tools and benchmarks without an event loop."""
+        refresh = _Refresh(self)
+        self._finish(refresh, self._score(refresh))
+
+    def _finish(self, refresh: _Refresh, table: _Table):
+        self._table = table
+        if refresh.full:
+            self._built = True
+            self._changes_since_build = 0
+            self.full_builds += 1
+        else:
+            self._changes_since_build = refresh.changes_since_build
+            self.incremental_updates += 1
+
+    def _score(self, refresh: _Refresh) -> _Table:
+        """The table with ``refresh`` applied. Runs off the event loop, so it reads only ``refresh`` and the current table."""
+        vectors = self._vectors(refresh)
+        if refresh.full:
+            return self._build(vectors)
+        return self._update(vectors, refresh)
+
+    def _vectors(self, refresh: _Refresh) -> _Vectors:
+        ids = refresh.ids
+        n = len(ids)
+        rows = refresh.terms
+        text = self._csr([columns for columns, _ in rows], refresh.term_width, [weights for _, weights in rows])
+        # Smoothed IDF from the document frequency of every column, then L2-normalised rows
+        df = np.bincount(text.indices, minlength=text.shape[1])
+        text.data *= (np.log((1 + n) / (1 + df)) + 1)[text.indices]
+        row_lengths = np.diff(text.indptr)
+        norms = np.sqrt(np.bincount(np.repeat(np.arange(n), row_lengths), weights=text.data ** 2, minlength=n))
+        text.data /= np.repeat(norms, row_lengths)
+        tags = self._csr(refresh.tags, refresh.tag_width)
+        return _Vectors(ids, text, tags, np.diff(tags.indptr).astype(np.float64))
+    @staticmethod
+    def _csr(columns: List[np.ndarray], width: int, values: Optional[List[np.ndarray]] = None) -> sparse.csr_matrix:
+        """Rows given as column arrays (and values, default 1) assembled into a CSR matrix."""
+        indptr = np.zeros(len(columns) + 1, np.int64)
+        np.cumsum(np.fromiter(map(len, columns), np.int64, len(columns)), out=indptr[1:])
+        indices = np.concatenate(columns) if columns else np.zeros(0, np.int32)
+        data = np.concatenate(values) if values else np.ones(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(columns), width))
+
+    def _scores(self, vectors: _Vectors, positions: np.ndarray) -> np.ndarray:
+        """Dense (len(positions), posts) similarities of the posts at ``positions`` to every post."""
+        if len(positions) <= self.DENSE_ROWS:
+            # A few rows: multiply the corpus by them as dense vectors
+            text = (vectors.text @ vectors.text[positions].T.toarray()).T
+            shared = (vectors.tags @ vectors.tags[positions].T.toarray()).T
+        else:
+            text_t, tags_t = vectors.transposed()
+            text = (vectors.text[positions] @ text_t).toarray()
+            shared = (vectors.tags[positions] @ tags_t).toarray()
+        union = vectors.tag_counts[positions][:, None] + vectors.tag_counts[None, :] - shared
+        overlap = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+        scores = (1 - self.tag_weight) * text + self.tag_weight * overlap
+        # A post is not related to itself
+        scores[np.arange(len(positions)), positions] = 0.0
+        return scores
+
+    def _top(self, vectors: _Vectors, scores: np.ndarray) -> List[Tuple[str, float]]:
+        if len(scores) > self.k:
+            candidates = np.argpartition(-scores, self.k - 1)[:self.k]
+        else:
+            candidates = np.arange(len(scores))
+        candidates = candidates[scores[candidates] > 0]
+        top = [(vectors.ids[i], float(scores[i])) for i in candidates]
+        top.sort(key=lambda item: (-item[1], item[0]))
+        return top
+
+    def _blocks(self, vectors: _Vectors, post_ids: List[str]):
+        """(post ids, their score rows) in blocks of at most BLOCK_ROWS posts."""
+        for start in range(0, len(post_ids), self.BLOCK_ROWS):
+            block = post_ids[start:start + self.BLOCK_ROWS]
+            positions = np.fromiter((vectors.positions[post_id] for post_id in block), np.int64, len(block))
+            yield block, self._scores(vectors, positions)
+
+    def _build(self, vectors: _Vectors) -> _Table:
+        table = _Table()
+        if self.k > 0:
+            for block, scores in self._blocks(vectors, vectors.ids):
+                for row, post_id in enumerate(block):
+                    table.set(post_id, self._top(vectors, scores[row]))
+        return table
+
+    def _update(self, vectors: _Vectors, refresh: _Refresh) -> _Table:
+        table = self._table.copy()
+        changed = [post_id for post_id in vectors.ids if post_id in refresh.changed]
+        gone = refresh.changed | refresh.removed
+        # Lists holding a changed or removed post may now miss a better candidate
+        stale = set().union(*(table.listed_by.get(post_id, ()) for post_id in gone)) - gone
+        for post_id in refresh.removed:
+            table.remove(post_id)
+        if not self.k:
+            return table
+        for block, scores in self._blocks(vectors, sorted(stale)):
+            for row, post_id in enumerate(block):
+                table.set(post_id, self._top(vectors, scores[row]))
+
+        thresholds = np.fromiter(
+            (table.threshold(post_id, self.k) for post_id in vectors.ids), np.float64, len(vectors.ids))
+        for block, scores in self._blocks(vectors, changed):
+            for row, post_id in enumerate(block):
+                table.set(post_id, self._top(vectors, scores[row]))
+                # Similarity is symmetric: the changed post joins other lists it now beats
+                for i in np.nonzero(scores[row] > thresholds)[0]:
+                    other = vectors.ids[i]
+                    if other in refresh.changed or other in stale:
+                        continue
+                    related = table.lists[other] + [(post_id, float(scores[row, i]))]
+                    related.sort(key=lambda item: (-item[1], item[0]))
+                    table.set(other, related[:self.k])
+                    thresholds[i] = table.threshold(other, self.k)
+        return table
@@ -0,0 +1,106 @@
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.services.blog.markdown import render_markdown
+from app.services.blog.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Bump when render_markdown's output changes so cached renders are not reused
+RENDER_VERSION = 2
+
+class PostRenderer:
+    """
+    Renders post content to HTML, a table of contents and reading time.
+
+    Results are cached by a hash of the content, so a post is only rendered
+    again after an edit, and concurrent requests for the same content share
+    one render. Content of ``process_threshold`` characters or more is rendered
+    in a process pool so large posts do not block the event loop; smaller
+    content renders inline, where it is cheaper than pickling it across.
+    """
+
+    def __init__(self, max_entries: int, process_threshold: int, max_workers: int):
+        self.max_entries = max_entries
+        self.process_threshold = process_threshold
+        self.max_workers = max_workers
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.inline_renders = 0
+        self.process_renders = 0
+
+    @staticmethod
+    def content_key(content: str) -> str:
+        return f"{RENDER_VERSION}:{hashlib.sha256(content.encode()).hexdigest()}"
+
+    async def render(self, content: str) -> Dict:
+        key = self.content_key(content)
+        rendered = self._entries.get(key)
+        if rendered is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return rendered
+        self.misses += 1
+        return await self._flight.do(key, lambda: self._render(key, content))
+
+    async def _render(self, key: str, content: str) -> Dict:
+        if len(content) >= self.process_threshold and self.max_workers > 0:
+            rendered = await self._render_in_process(content)
+        else:
+            self.inline_renders += 1
+            rendered = render_markdown(content)
+        self._entries[key] = rendered
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return rendered
+
+    async def _render_in_process(self, content: str) -> Dict:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            rendered = await asyncio.get_running_loop().run_in_executor(self._pool, render_markdown, content)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool next time
+            logger.warning("Render process pool broke, rendering in a thread instead")
+            self._pool.shutdown(wait=False)
+            self._pool = None
+            self.inline_renders += 1
+            return await asyncio.to_thread(render_markdown, content)
+        self.process_renders += 1
+        return rendered
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "inline_renders": self.inline_renders,
+            "process_renders": self.process_renders,
+            "coalesced_renders": self._flight.shared,
+            "process_pool_running": self._pool is not None,
+        }
+
+def create_post_renderer() -> PostRenderer:
+    return PostRenderer(
+        max_entries=settings.RENDER_CACHE_ENTRIES,
+        process_threshold=settings.RENDER_PROCESS_THRESHOLD_CHARS,
+        max_workers=settings.RENDER_PROCESS_WORKERS,
+    )
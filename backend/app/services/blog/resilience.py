@@ -0,0 +1,235 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.exceptions import GistServiceException
+from app.core.metrics import GITHUB_LATENCY, GITHUB_REQUESTS, record_phase
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """
+    Opens after ``failure_threshold`` consecutive failed calls and rejects
+    calls for ``reset_timeout`` seconds. Then a single trial call is let
+    through (half-open): success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self.transitions: Dict[str, int] = {}
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        key = f"{self.state}_to_{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        logger.warning(f"GitHub circuit breaker {self.state} -> {state}")
+        self.state = state
+
+    def allow(self) -> bool:
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._trial_running:
+                return False
+            self._trial_running = True
+        return self.state != OPEN
+
+    def record_success(self):
+        self.failures = 0
+        self._trial_running = False
+        self._transition(CLOSED)
+
+    def release(self):
+        """A call ended without an outcome (e.g. it was cancelled)."""
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def retry_in(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
+
+class RateLimitBudget:
+    """
+    GitHub's rate limit as last reported in response headers. Reads stop
+    once ``reserve`` requests are left so that the remainder stays
+    available for writes; nothing is sent while a ``Retry-After`` is pending.
+    """
+
+    def __init__(self, reserve: int):
+        self.reserve = reserve
+        self.remaining: Optional[int] = None
+        self.limit: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until = 0.0
+
+    def observe(self, res: httpx.Response):
+        remaining = res.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and remaining.isdigit():
+            self.remaining = int(remaining)
+            limit = res.headers.get("X-RateLimit-Limit")
+            self.limit = int(limit) if limit and limit.isdigit() else self.limit
+            reset = res.headers.get("X-RateLimit-Reset")
+            self.reset_at = float(reset) if reset and reset.isdigit() else None
+        retry_after = res.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            self.blocked_until = max(self.blocked_until, time.time() + int(retry_after))
+
+    def resume_at(self, write: bool = False) -> float:
+        """Unix time from which a call of this kind may be sent (0 if it may be sent now)."""
+        now = time.time()
+        if now < self.blocked_until:
+            return self.blocked_until
+        if self.remaining is None or self.reset_at is None or now >= self.reset_at:
+            return 0.0
+        floor = 0 if write else self.reserve
+        return self.reset_at if self.remaining <= floor else 0.0
+
+def _retry_after(res: httpx.Response) -> Optional[float]:
+    value = res.headers.get("Retry-After")
+    return float(value) if value and value.isdigit() else None
+
+def is_retryable(res: httpx.Response) -> bool:
+    """5xx, 429 and GitHub's secondary rate limit (a 403 with Retry-After or that message)."""
+    if res.status_code >= 500 or res.status_code == 429:
+        return True
+    if res.status_code == 403:
+        return _retry_after(res) is not None or "secondary rate limit" in res.text.lower()
+    return False
+
+class UpstreamGuard:
+    """
+    Wraps every GitHub call with the rate-limit budget, a circuit breaker and
+    bounded retries with full-jitter exponential backoff. Calls that cannot
+    be made or keep failing raise GistServiceException (served as 503);
+    other responses, including 304 and 404, are returned to the caller.
+    """
+
+    def __init__(
+        self,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        failure_threshold: int,
+        reset_timeout: float,
+        rate_limit_reserve: int,
+    ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.budget = RateLimitBudget(rate_limit_reserve)
+
+        # Counters
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected_open = 0
+        self.rejected_budget = 0
+
+    def _backoff(self, attempt: int, res: Optional[httpx.Response]) -> Optional[float]:
+        """Delay before the next attempt, or None if GitHub asked us to wait longer than we would."""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = _retry_after(res) if res is not None else None
+        if retry_after is not None:
+            if retry_after > self.backoff_max:
+                return None
+            delay = max(delay, retry_after)
+        return delay
+
+    async def call(self, fn: Callable[[], Awaitable[httpx.Response]], write: bool = False) -> httpx.Response:
+        resume_at = self.budget.resume_at(write)
+        if resume_at:
+            self.rejected_budget += 1
+            raise GistServiceException(f"GitHub rate limit budget exhausted, retry in {resume_at - time.time():.0f}s")
+        if not self.breaker.allow():
+            self.rejected_open += 1
+            raise GistServiceException(f"GitHub circuit open, retry in {self.breaker.retry_in():.0f}s")
+
+        self.calls += 1
+        try:
+            return await self._attempts(fn, "PATCH" if write else "GET")
+        except asyncio.CancelledError:
+            self.breaker.release()
+            raise
+
+    async def _attempts(self, fn: Callable[[], Awaitable[httpx.Response]], method: str) -> httpx.Response:
+        error = "no attempt made"
+        for attempt in range(self.max_retries + 1):
+            res: Optional[httpx.Response] = None
+            started = time.perf_counter()
+            try:
+                res = await fn()
+            except httpx.TransportError as e:
+                error = f"{type(e).__name__}: {str(e)}"
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            finally:
+                elapsed = time.perf_counter() - started
+                GITHUB_LATENCY.observe(elapsed, method)
+                GITHUB_REQUESTS.inc(method, str(res.status_code) if res is not None else "error")
+                record_phase("upstream", elapsed)
+            if res is not None:
+                self.budget.observe(res)
+                if not is_retryable(res):
+                    self.breaker.record_success()
+                    return res
+                error = f"GitHub responded {res.status_code}"
+
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, res)
+            if delay is None:
+                break
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+        self.failures += 1
+        self.breaker.record_failure()
+        raise GistServiceException(error)
+
+    def stats(self) -> dict:
+        return {
+            "circuit_state": self.breaker.state,
+            "circuit_transitions": dict(self.breaker.transitions),
+            "consecutive_failures": self.breaker.failures,
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected_open": self.rejected_open,
+            "rejected_budget": self.rejected_budget,
+            "rate_limit_remaining": self.budget.remaining,
+            "rate_limit_reset_at": self.budget.reset_at,
+        }
+
+def create_upstream_guard() -> UpstreamGuard:
+    return UpstreamGuard(
+        max_retries=settings.GITHUB_MAX_RETRIES,
+        backoff_base=settings.GITHUB_RETRY_BASE_SECONDS,
+        backoff_max=settings.GITHUB_RETRY_MAX_SECONDS,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout=settings.CIRCUIT_RESET_SECONDS,
+        rate_limit_reserve=settings.GITHUB_RATE_LIMIT_RESERVE,
+    )
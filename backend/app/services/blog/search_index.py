@@ -0,0 +1,245 @@
+import bisect
+import gzip
+import hashlib
+import heapq
+import html
+import json
+import logging
+import math
+import os
+import re
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.services.blog.indexes import PostIndex
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have if in into is it its of on or "
+    "that the their then there these this to was were will with".split()
+)
+
+# Field weights: a match in the title counts three times a match in the body
+FIELD_WEIGHTS = (("title", 3.0), ("tags", 2.0), ("summary", 1.5), ("content", 1.0))
+
+INDEX_FORMAT_VERSION = 1
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+def _field_text(post: dict, field: str) -> str:
+    value = post.get(field)
+    if not value:
+        return ""
+    if isinstance(value, list):
+        return " ".join(str(v) for v in value)
+    return str(value)
+
+def fingerprint(post: dict) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    for field, _ in FIELD_WEIGHTS:
+        h.update(_field_text(post, field).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+def term_frequencies(post: dict) -> Dict[str, float]:
+    """Field-weighted frequency of every term in a post."""
+    terms: Dict[str, float] = defaultdict(float)
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(_field_text(post, field)):
+            terms[token] += weight
+    return dict(terms)
+
+def make_snippet(text: str, terms: Iterable[str], width: int = 160) -> str:
+    """
+    HTML-escaped excerpt of ``text`` around the first query match, with
+    matching words wrapped in <mark>. Query terms match as word prefixes.
+    """
+    terms = [t for t in terms if t]
+    if not text:
+        return ""
+    if not terms:
+        return html.escape(text[:width])
+    pattern = re.compile(r"\b(" + "|".join(re.escape(t) for t in terms) + r")\w*", re.IGNORECASE)
+    match = pattern.search(text)
+    start = max(0, match.start() - width // 3) if match else 0
+    end = min(len(text), start + width)
+    excerpt = text[start:end]
+
+    parts = []
+    last = 0
+    for m in pattern.finditer(excerpt):
+        parts.append(html.escape(excerpt[last:m.start()]))
+        parts.append(f"<mark>{html.escape(m.group(0))}</mark>")
+        last = m.end()
+    parts.append(html.escape(excerpt[last:]))
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return prefix + "".join(parts) + suffix
+
+
+class SearchIndex(PostIndex):
+    """
+    In-memory inverted index over title, summary, content and tags, ranked
+    with BM25 over field-weighted term frequencies.
+
+    Each post's terms are also kept per document (as interned strings shared
+    with the postings) so an update only re-tokenizes and unlinks that post.
+    The index can be saved to a gzipped JSON file; after a restart, posts
+    whose fingerprint matches the saved entry reuse the saved term
+    frequencies instead of being tokenized again.
+    """
+
+    K1 = 1.2
+    B = 0.75
+    MAX_PREFIX_EXPANSIONS = 50
+    MIN_PREFIX_LENGTH = 3
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self.doc_terms: Dict[str, Tuple[str, ...]] = {}
+        self.doc_lengths: Dict[str, float] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.total_length = 0.0
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        # BM25 length normalisation per document, recomputed after changes
+        self._norms: Optional[Dict[str, float]] = None
+        # Entries loaded from disk, consumed as matching posts arrive
+        self._saved: Dict[str, list] = {}
+        self.dirty = False
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def apply(self, upserts: Dict[str, dict], removed: Iterable[str]):
+        for post_id in removed:
+            self._remove(post_id)
+        for post_id, post in upserts.items():
+            fp = fingerprint(post)
+            if self.fingerprints.get(post_id) == fp:
+                continue
+            self._remove(post_id)
+            saved = self._saved.pop(post_id, None)
+            if saved is not None and saved[0] == fp:
+                terms = saved[1]
+            else:
+                terms = term_frequencies(post)
+            self._add(post_id, fp, terms)
+
+    def _add(self, post_id: str, fp: str, terms: Dict[str, float]):
+        interned = []
+        for term, tf in terms.items():
+            term = sys.intern(term)
+            postings = self.postings[term]
+            if not postings:
+                self._vocabulary_dirty = True
+            postings[post_id] = tf
+            interned.append(term)
+        length = sum(terms.values())
+        self.doc_terms[post_id] = tuple(interned)
+        self.doc_lengths[post_id] = length
+        self.fingerprints[post_id] = fp
+        self.total_length += length
+        self._norms = None
+        self.dirty = True
+
+    def _remove(self, post_id: str):
+        terms = self.doc_terms.pop(post_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(post_id, None)
+            if not postings:
+                del self.postings[term]
+                self._vocabulary_dirty = True
+        self.total_length -= self.doc_lengths.pop(post_id, 0.0)
+        self.fingerprints.pop(post_id, None)
+        self._norms = None
+        self.dirty = True
+
+    def _expand(self, term: str, prefix: bool) -> List[Tuple[str, float]]:
+        """The term itself plus, for prefix terms, vocabulary words starting with it (weighted lower)."""
+        expansions = [(term, 1.0)] if term in self.postings else []
+        if not prefix or len(term) < self.MIN_PREFIX_LENGTH:
+            return expansions
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self.postings.keys())
+            self._vocabulary_dirty = False
+        i = bisect.bisect_left(self._vocabulary, term)
+        while i < len(self._vocabulary) and len(expansions) < self.MAX_PREFIX_EXPANSIONS:
+            candidate = self._vocabulary[i]
+            if not candidate.startswith(term):
+                break
+            if candidate != term:
+                expansions.append((candidate, 0.7))
+            i += 1
+        return expansions
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Return ([(post id, score)] for the requested window, total matches).
+        The last query word also matches as a prefix, for search-as-you-type.
+        """
+        terms = tokenize(query)
+        if not terms or not self.doc_terms:
+            return [], 0
+
+        n = len(self.doc_terms)
+        if self._norms is None:
+            avg_length = self.total_length / n or 1.0
+            self._norms = {
+                post_id: self.K1 * (1 - self.B + self.B * length / avg_length)
+                for post_id, length in self.doc_lengths.items()
+            }
+        norms = self._norms
+        scores: Dict[str, float] = defaultdict(float)
+        unique_terms = list(dict.fromkeys(terms))
+        for position, query_term in enumerate(unique_terms):
+            for term, boost in self._expand(query_term, prefix=position == len(unique_terms) - 1):
+                postings = self.postings[term]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                weight = boost * idf * (self.K1 + 1)
+                for post_id, tf in postings.items():
+                    scores[post_id] += weight * tf / (tf + norms[post_id])
+
+        top = heapq.nlargest(offset + limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(post_id, round(score, 4)) for post_id, score in top[offset:]], len(scores)
+
+    def save(self, path: str):
+        """Write the per-document term frequencies to ``path`` atomically."""
+        docs = {
+            post_id: [self.fingerprints[post_id], {term: self.postings[term][post_id] for term in terms}]
+            for post_id, terms in self.doc_terms.items()
+        }
+        payload = json.dumps({"version": INDEX_FORMAT_VERSION, "docs": docs}, separators=(",", ":"))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+        self.dirty = False
+
+    def load(self, path: str) -> int:
+        """
+        Load saved term frequencies. They only enter the live index when a
+        post with the same fingerprint is applied, so deleted posts drop out.
+        """
+        if not os.path.exists(path):
+            return 0
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable search index {path}: {str(e)}")
+            return 0
+        if payload.get("version") != INDEX_FORMAT_VERSION:
+            return 0
+        self._saved = payload["docs"]
+        return len(self._saved)
@@ -0,0 +1,234 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional
+import logging
+import os
+
+import httpx
+
+from app.services.blog.interfaces import BlogRepository
+from app.services.blog.gist_service import GistBlogService
+from app.services.blog.resilience import create_upstream_guard
+from app.services.blog.slugs import assign_slug
+from app.models.blog_model import Blog
+from app.core.config import settings
+from app.schemas.blog_schema import BlogCreate, BlogUpdate
+
+logger = logging.getLogger(__name__)
+
+def parse_gist_ids(value: Optional[str]) -> List[str]:
+    return [gist_id.strip() for gist_id in (value or "").split(",") if gist_id.strip()]
+
+def shard_path(path: str, gist_id: str) -> str:
+    base, ext = os.path.splitext(path)
+    return f"{base}.{gist_id}{ext}"
+
+def shard_wal_path(gist_id: str) -> str:
+    return shard_path(settings.WRITE_AHEAD_LOG_PATH, gist_id)
+
+def shard_snapshot_path(gist_id: str) -> str:
+    return shard_path(settings.SNAPSHOT_PATH, gist_id)
+
+class ShardedGistBlogService(BlogRepository):
+    """
+    Spreads posts over several gists (GIST_IDS), each managed by its own
+    GistBlogService with its own cache and writer.
+
+    A post's home shard is chosen by rendezvous hashing of (gist id, post id),
+    so adding a shard only moves the posts that now hash to the new gist.
+    Listing fans out to every shard concurrently; single-post reads go to the
+    home shard and only fall back to the other shards' cached data for posts
+    that have not been rebalanced yet.
+
+    Slugs must be unique across all shards, so every write (allocating an id
+    or slug, moving a post between shards) holds one lock for the whole
+    read-modify-write of the shared slug index.
+    """
+
+    def __init__(self, gist_ids: List[str], client: Optional[httpx.AsyncClient] = None):
+        super().__init__()
+        if not gist_ids:
+            raise ValueError("ShardedGistBlogService needs at least one gist id")
+        # All shards share one GitHub token, so they share its rate limit and health
+        self.guard = create_upstream_guard()
+        self.shards: Dict[str, GistBlogService] = {
+            gist_id: GistBlogService(
+                client=client,
+                gist_id=gist_id,
+                wal_path=shard_wal_path(gist_id),
+                on_change=self._shard_changed,
+                snapshot_path=shard_snapshot_path(gist_id),
+                guard=self.guard,
+                slug_index=self.slugs,
+            )
+            for gist_id in gist_ids
+        }
+        self._write_lock = asyncio.Lock()
+
+    def home_shard(self, post_id: str) -> GistBlogService:
+        def weight(gist_id: str) -> int:
+            digest = hashlib.blake2b(f"{gist_id}:{post_id}".encode(), digest_size=8).digest()
+            return int.from_bytes(digest, "big")
+        return self.shards[max(self.shards, key=weight)]
+
+    def bind_client(self, client: httpx.AsyncClient):
+        for shard in self.shards.values():
+            shard.bind_client(client)
+
+    async def startup(self):
+        await asyncio.gather(*(shard.startup() for shard in self.shards.values()))
+
+    async def shutdown(self):
+        await asyncio.gather(*(shard.shutdown() for shard in self.shards.values()))
+
+    def cache_stats(self) -> dict:
+        return {gist_id: shard.cache_stats() for gist_id, shard in self.shards.items()}
+
+    def writer_stats(self) -> dict:
+        return {gist_id: shard.writer_stats() for gist_id, shard in self.shards.items()}
+
+    def upstream_stats(self) -> dict:
+        return self.guard.stats()
+
+    def health(self) -> dict:
+        shards = {gist_id: shard.health() for gist_id, shard in self.shards.items()}
+        return {
+            "degraded": any(h["degraded"] for h in shards.values()),
+            "stale": any(h["stale"] for h in shards.values()),
+            "shards": shards,
+        }
+
+    def load_indexes(self):
+        super().load_indexes()
+        for shard in self.shards.values():
+            shard.load_snapshot()
+
+    def _shard_changed(self, upserts: Dict[str, dict], removed: List[str]):
+        # A post moved between shards disappears from one while still present in another
+        removed = [
+            post_id for post_id in removed
+            if not any(post_id in (shard.cache.data or {}) for shard in self.shards.values())
+        ]
+        self._publish(upserts, removed)
+
+    async def ensure_fresh(self):
+        await self._all_post_maps()
+
+    async def get_post(self, post_id: str) -> Optional[dict]:
+        shard = await self._locate(post_id)
+        if shard is None:
+            return None
+        return await shard.get_post(post_id)
+
+    async def _all_post_maps(self) -> Dict[str, Dict[str, dict]]:
+        maps = await asyncio.gather(*(shard.get_post_map() for shard in self.shards.values()))
+        return dict(zip(self.shards.keys(), maps))
+
+    async def _locate(self, post_id: str) -> Optional[GistBlogService]:
+        """Find the shard holding ``post_id``, checking its home shard first."""
+        home = self.home_shard(post_id)
+        if post_id in await home.get_post_map():
+            return home
+        for gist_id, posts in (await self._all_post_maps()).items():
+            if post_id in posts:
+                return self.shards[gist_id]
+        return None
+
+    async def get_post_map(self) -> Dict[str, dict]:
+        merged: Dict[str, dict] = {}
+        for gist_id, posts in (await self._all_post_maps()).items():
+            for post_id, post in posts.items():
+                # A post caught mid-move exists twice; prefer its home shard's copy
+                if post_id not in merged or self.home_shard(post_id).gist_id == gist_id:
+                    merged[post_id] = post
+        return merged
+
+    async def list_blogs(self, limit: Optional[int] = None, offset: int = 0) -> List[Blog]:
+        try:
+            posts = list((await self.get_post_map()).values())
+            if limit is not None or offset:
+                posts.sort(key=lambda p: (p["date"], int(p["id"])), reverse=True)
+                posts = posts[offset:offset + limit if limit is not None else None]
+            posts = await asyncio.gather(*(self.home_shard(p["id"]).load_post(p) for p in posts))
+            return [Blog(**v) for v in posts]
+        except Exception as e:
+            logger.error(f"Error fetching blogs: {str(e)}")
+            raise
+
+    async def get_blog(self, blog_id: int) -> Optional[Blog]:
+        shard = await self._locate(str(blog_id))
+        if shard is None:
+            return None
+        return await shard.get_blog(blog_id)
+
+    async def create_blog(self, blog: BlogCreate) -> Blog:
+        try:
+            # Ids and slugs are allocated across all shards so they stay globally unique
+            async with self._write_lock:
+                posts = await self.get_post_map()
+                new_id = str(max([int(i) for i in posts.keys()] + [0]) + 1)
+                blog_data = blog.model_dump()
+                blog_data.update({"id": new_id, "date": datetime.now().isoformat()})
+                assign_slug(blog_data, None, self.slugs)
+                await self.home_shard(new_id).upsert_post(blog_data)
+
+            logger.info(f"Created blog post with ID: {new_id}")
+            return Blog(**blog_data)
+        except Exception as e:
+            logger.error(f"Error creating blog: {str(e)}")
+            raise
+
+    async def update_blog(self, blog_id: int, blog_update: BlogUpdate) -> Optional[Blog]:
+        post_id = str(blog_id)
+        async with self._write_lock:
+            shard = await self._locate(post_id)
+            if shard is None:
+                return None
+            updated = await shard.update_blog(blog_id, blog_update)
+            home = self.home_shard(post_id)
+            if updated is not None and shard is not home:
+                # Editing a post that has not been rebalanced moves it home
+                await self._move(post_id, shard, home)
+            return updated
+
+    async def delete_blog(self, blog_id: int) -> bool:
+        async with self._write_lock:
+            shard = await self._locate(str(blog_id))
+            if shard is None:
+                return False
+            return await shard.delete_blog(blog_id)
+
+    async def _move(self, post_id: str, source: GistBlogService, target: GistBlogService) -> bool:
+        """
+        Move ``post_id`` from ``source`` to ``target``; call with the write lock
+        held. Returns whether a copy was moved.
+
+        The new copy is written before the old one is removed, so a crash in
+        between leaves a duplicate rather than a loss. Reads and edits find
+        the target's copy first, so when the target already holds the post
+        that copy is the current one and the source's is just dropped.
+        """
+        post = await source.get_post(post_id)
+        if post is None:
+            return False
+        if post_id in await target.get_post_map():
+            await source.remove_post(post_id)
+            return False
+        await target.upsert_post(post)
+        await source.remove_post(post_id)
+        return True
+
+    async def rebalance(self) -> int:
+        """Move every post that is not on its home shard. Returns the number moved."""
+        moved = 0
+        for gist_id, posts in (await self._all_post_maps()).items():
+            source = self.shards[gist_id]
+            for post_id in list(posts.keys()):
+                target = self.home_shard(post_id)
+                if target is not source:
+                    # _move re-reads both shards under the lock, so writes since the listing above are kept
+                    async with self._write_lock:
+                        moved += await self._move(post_id, source, target)
+        logger.info(f"Rebalanced {moved} post(s) across {len(self.shards)} gist shard(s)")
+        return moved
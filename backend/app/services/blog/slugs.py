@@ -0,0 +1,43 @@
+import re
+import unicodedata
+from typing import Optional
+
+from app.services.blog.indexes import SlugIndex
+
+MAX_SLUG_LENGTH = 80
+# Old slugs kept as redirects per post
+MAX_PREVIOUS_SLUGS = 20
+
+def slugify(text: str) -> str:
+    """Lowercase ASCII words joined by hyphens, e.g. "Hello, World!" -> "hello-world"."""
+    ascii_text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    slug = re.sub(r"[^a-z0-9]+", "-", ascii_text.lower()).strip("-")
+    return slug[:MAX_SLUG_LENGTH].rstrip("-") or "post"
+
+def _derived_from(slug: str, base: str) -> bool:
+    """Whether ``slug`` is ``base`` or one of its de-duplicated forms (``base-2``...)."""
+    return slug == base or re.fullmatch(rf"{re.escape(base)}-\d+", slug) is not None
+
+def assign_slug(post: dict, previous: Optional[dict], index: SlugIndex) -> dict:
+    """
+    Set ``slug`` (and ``previous_slugs``) on ``post`` from its title, unique
+    across ``index``. An edit that changes the slug keeps the old one in
+    ``previous_slugs`` so links to it can be redirected.
+    """
+    post_id = post.get("id")
+    base = slugify(post.get("title") or "")
+    old_slug = (previous or {}).get("slug")
+    history = list((previous or {}).get("previous_slugs") or [])
+
+    if old_slug and _derived_from(old_slug, base) and index.owner(old_slug) in (None, post_id):
+        slug = old_slug
+    else:
+        slug = index.unique(base, post_id)
+        if old_slug and old_slug != slug:
+            history.append(old_slug)
+
+    # Renaming a post back reclaims its old slug
+    history = [s for s in dict.fromkeys(history) if s != slug][-MAX_PREVIOUS_SLUGS:]
+    post["slug"] = slug
+    post["previous_slugs"] = history
+    return post
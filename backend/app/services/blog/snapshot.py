@@ -0,0 +1,56 @@
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+class SnapshotStore:
+    """
+    Local copy of the last post map seen upstream, so a restart can serve
+    posts before GitHub has answered (or while it is down).
+
+    The file is JSON lines: a header with the format version, upstream ETag
+    and gist file list, then one ``[post id, post]`` line per post. It is
+    written to a temporary file, fsynced and renamed into place, and read
+    back line by line so loading never holds the whole file text in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.version = 0
+
+    def save(self, posts: Dict[str, dict], header: dict):
+        self.version += 1
+        header = {**header, "format": SNAPSHOT_FORMAT_VERSION, "version": self.version, "saved_at": time.time()}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(header, separators=(",", ":")) + "\n")
+            for post_id, post in posts.items():
+                f.write(json.dumps([post_id, post], separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> Optional[Tuple[Dict[str, dict], dict]]:
+        """Return (posts, header), or None if there is no usable snapshot."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline())
+                if header.get("format") != SNAPSHOT_FORMAT_VERSION:
+                    return None
+                posts: Dict[str, dict] = {}
+                for line in f:
+                    post_id, post = json.loads(line)
+                    posts[post_id] = post
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.path}: {str(e)}")
+            return None
+        self.version = header.get("version", 0)
+        return posts, header
@@ -0,0 +1,254 @@
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+import logging
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import selectinload
+
+from app.services.blog.interfaces import BlogRepository
+from app.services.blog.slugs import assign_slug
+from app.models.blog_model import Blog
+from app.db.database import AsyncSessionLocal, init_db
+from app.db.models import BlogRevision, DeletedPost, Post, PostTag
+from app.schemas.blog_schema import BlogCreate, BlogUpdate
+
+logger = logging.getLogger(__name__)
+
+def post_to_dict(post: Post) -> dict:
+    """The same raw post shape the gist backend stores."""
+    return {
+        "id": str(post.id),
+        "title": post.title,
+        "content": post.content,
+        "summary": post.summary,
+        "tags": list(post.tags or []),
+        "media": list(post.media or []),
+        "date": post.date.isoformat(),
+        "slug": post.slug,
+        "previous_slugs": list(post.previous_slugs or []),
+    }
+
+def post_to_blog(post: Post) -> Blog:
+    return Blog(**post_to_dict(post))
+
+def _set_tags(post: Post, tags: Optional[List[str]]):
+    post.tags = list(tags or [])
+    post.tag_rows = [PostTag(tag=tag) for tag in dict.fromkeys(post.tags)]
+
+async def _next_revision(session) -> int:
+    """Bump the shared revision counter inside the caller's write transaction."""
+    await session.execute(update(BlogRevision).where(BlogRevision.id == 1).values(value=BlogRevision.value + 1))
+    return (await session.execute(select(BlogRevision.value).where(BlogRevision.id == 1))).scalar_one()
+
+class SQLiteBlogService(BlogRepository):
+    """
+    Blog repository backed by the async SQLAlchemy engine in app.db.database.
+    Listing and single-post reads are indexed local queries. The in-memory
+    indexes are loaded at startup and kept current by this process's writes.
+
+    Every write also bumps the single-row blog_revision counter and stamps
+    the post (or a deleted_posts tombstone) with the new value, so with
+    several workers ``ensure_fresh`` reads that one row per request and,
+    when another worker has written, loads just the posts changed since.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        super().__init__()
+        self.session_factory = session_factory
+        # Slugs are checked against the slug index, so allocate and commit them one at a time
+        self._slug_lock = asyncio.Lock()
+        # Revision the indexes reflect; below any stored one, so startup loads every post
+        self.revision = -1
+        self._refresh_lock = asyncio.Lock()
+
+    async def startup(self):
+        await init_db()
+        async with self.session_factory() as session:
+            await session.execute(insert(BlogRevision).values(id=1, value=0).on_conflict_do_nothing())
+            await session.commit()
+        await self.ensure_fresh()
+
+    async def ensure_fresh(self):
+        async with self.session_factory() as session:
+            current = await session.scalar(select(BlogRevision.value).where(BlogRevision.id == 1))
+        if current is None or current == self.revision:
+            return
+        async with self._refresh_lock:
+            if current <= self.revision:
+                return
+            async with self.session_factory() as session, session.begin():
+                # One read transaction, so the posts and tombstones match the revision read with them
+                revision = await session.scalar(select(BlogRevision.value).where(BlogRevision.id == 1))
+                posts = (await session.execute(select(Post).where(Post.revision > self.revision))).scalars().all()
+                deleted = (await session.execute(
+                    select(DeletedPost.post_id).where(DeletedPost.revision > self.revision)
+                )).scalars().all()
+            upserts = {str(post.id): post_to_dict(post) for post in posts}
+            # A tombstoned id whose row exists again was re-created later
+            removed = [str(post_id) for post_id in deleted if str(post_id) not in upserts]
+            self._publish(upserts, removed)
+            self.revision = revision
+
+    def _advance(self, revision: int):
+        """
+        Record a revision this process published itself. Only contiguous ones,
+        so a gap left by another worker's write is still picked up.
+        """
+        if revision == self.revision + 1:
+            self.revision = revision
+
+    async def get_post(self, post_id: str) -> Optional[dict]:
+        async with self.session_factory() as session:
+            post = await session.get(Post, int(post_id))
+        return post_to_dict(post) if post else None
+
+    async def list_blogs(self, limit: Optional[int] = None, offset: int = 0) -> List[Blog]:
+        """Newest first."""
+        try:
+            query = select(Post).order_by(Post.date.desc(), Post.id.desc()).offset(offset)
+            if limit is not None:
+                query = query.limit(limit)
+            async with self.session_factory() as session:
+                posts = (await session.execute(query)).scalars().all()
+            return [post_to_blog(post) for post in posts]
+        except Exception as e:
+            logger.error(f"Error fetching blogs: {str(e)}")
+            raise
+
+    async def list_blogs_by_tags(self, tags: List[str], match_all: bool = True) -> List[Blog]:
+        """
+        Posts carrying all (or any) of ``tags``, newest first, through the
+        indexed post_tags table, so other workers' writes are included too.
+        """
+        try:
+            wanted = set(tags)
+            tagged = select(PostTag.post_id).where(PostTag.tag.in_(wanted)).group_by(PostTag.post_id)
+            if match_all:
+                tagged = tagged.having(func.count() == len(wanted))
+            query = select(Post).where(Post.id.in_(tagged)).order_by(Post.date.desc(), Post.id.desc())
+            async with self.session_factory() as session:
+                posts = (await session.execute(query)).scalars().all()
+            return [post_to_blog(post) for post in posts]
+        except Exception as e:
+            logger.error(f"Error fetching blogs by tags {tags}: {str(e)}")
+            raise
+
+    async def get_blog(self, blog_id: int) -> Optional[Blog]:
+        try:
+            async with self.session_factory() as session:
+                post = await session.get(Post, blog_id)
+            return post_to_blog(post) if post else None
+        except Exception as e:
+            logger.error(f"Error fetching blog {blog_id}: {str(e)}")
+            raise
+
+    async def create_blog(self, blog: BlogCreate) -> Blog:
+        try:
+            blog_data = blog.model_dump()
+            post = Post(
+                title=blog_data["title"],
+                content=blog_data["content"],
+                summary=blog_data.get("summary"),
+                media=list(blog_data.get("media") or []),
+                date=datetime.now(),
+            )
+            _set_tags(post, blog_data.get("tags"))
+            async with self._slug_lock:
+                # Allocate against other workers' slugs too
+                await self.ensure_fresh()
+                slugs = assign_slug({"title": post.title}, None, self.slugs)
+                post.slug, post.previous_slugs = slugs["slug"], slugs["previous_slugs"]
+                async with self.session_factory() as session:
+                    post.revision = await _next_revision(session)
+                    session.add(post)
+                    await session.commit()
+                self._publish({str(post.id): post_to_dict(post)}, [])
+                self._advance(post.revision)
+            logger.info(f"Created blog post with ID: {post.id}")
+            return post_to_blog(post)
+        except Exception as e:
+            logger.error(f"Error creating blog: {str(e)}")
+            raise
+
+    async def update_blog(self, blog_id: int, blog_update: BlogUpdate) -> Optional[Blog]:
+        try:
+            async with self._slug_lock, self.session_factory() as session:
+                await self.ensure_fresh()
+                post = await session.get(Post, blog_id, options=[selectinload(Post.tag_rows)])
+                if not post:
+                    return None
+                previous = post_to_dict(post)
+
+                # Update only the fields that are provided
+                update_data = blog_update.model_dump(exclude_unset=True)
+                for key, value in update_data.items():
+                    if value is None:
+                        continue
+                    if key == "tags":
+                        _set_tags(post, value)
+                    else:
+                        setattr(post, key, value)
+
+                # Update the modification date
+                post.date = datetime.now()
+                slugs = assign_slug({"id": str(post.id), "title": post.title}, previous, self.slugs)
+                post.slug, post.previous_slugs = slugs["slug"], slugs["previous_slugs"]
+                post.revision = await _next_revision(session)
+                await session.commit()
+                self._publish({str(post.id): post_to_dict(post)}, [])
+                self._advance(post.revision)
+            logger.info(f"Updated blog post with ID: {blog_id}")
+            return post_to_blog(post)
+        except Exception as e:
+            logger.error(f"Error updating blog {blog_id}: {str(e)}")
+            raise
+
+    async def delete_blog(self, blog_id: int) -> bool:
+        try:
+            async with self.session_factory() as session:
+                result = await session.execute(delete(Post).where(Post.id == blog_id))
+                if not result.rowcount:
+                    return False
+                revision = await _next_revision(session)
+                await session.execute(insert(DeletedPost).values(post_id=blog_id, revision=revision).on_conflict_do_update(
+                    index_elements=[DeletedPost.post_id], set_={"revision": revision},
+                ))
+                await session.commit()
+            self._publish({}, [str(blog_id)])
+            self._advance(revision)
+            logger.info(f"Deleted blog post with ID: {blog_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting blog {blog_id}: {str(e)}")
+            raise
+
+    async def import_posts(self, posts: List[dict]) -> int:
+        """
+        Upsert raw gist post dicts, keeping their ids and dates.
+        Used by the gist import tool.
+        """
+        imported = {}
+        async with self.session_factory() as session:
+            revision = await _next_revision(session)
+            for raw in posts:
+                post_id = int(raw["id"])
+                post = await session.get(Post, post_id, options=[selectinload(Post.tag_rows)])
+                if post is None:
+                    post = Post(id=post_id)
+                    session.add(post)
+                post.title = raw["title"]
+                post.content = raw["content"]
+                post.summary = raw.get("summary")
+                post.media = list(raw.get("media") or [])
+                post.date = datetime.fromisoformat(str(raw["date"]))
+                post.slug = raw.get("slug")
+                post.previous_slugs = list(raw.get("previous_slugs") or [])
+                _set_tags(post, raw.get("tags"))
+                post.revision = revision
+                imported[str(post_id)] = post
+            await session.commit()
+        self._publish({post_id: post_to_dict(post) for post_id, post in imported.items()}, [])
+        self._advance(revision)
+        return len(posts)
@@ -0,0 +1,141 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Container, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal, init_db
+from app.db.models import PostView
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    """
+    Post view counts that cost the request path one dict update.
+
+    ``record`` only bumps an in-memory delta on the event loop (no awaits, so
+    no locks). Every ``flush_seconds`` the deltas are swapped out and added
+    to the post_views table in one transaction; each worker process keeps
+    its own deltas and the upsert adds rather than overwrites, so workers
+    never lose each other's counts. The stored totals are read back in the
+    same transaction, so rankings include other workers' views as of the last
+    flush plus this worker's views since. ``stop`` flushes what is left.
+    """
+
+    # Rows per INSERT statement, well under SQLite's bound-parameter limit
+    BATCH_ROWS = 500
+
+    def __init__(self, session_factory=AsyncSessionLocal, flush_seconds: float = 5.0):
+        self.session_factory = session_factory
+        self.flush_seconds = flush_seconds
+        # Deltas not yet written, and the batch being written
+        self._pending: Dict[str, int] = {}
+        self._flushing: Dict[str, int] = {}
+        # Stored totals as of the last flush plus everything recorded since
+        self._totals: Dict[str, int] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.recorded = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.rows_written = 0
+        self.last_flush: Optional[float] = None
+        self.last_flush_ms: Optional[float] = None
+
+    def record(self, post_id: str):
+        self._pending[post_id] = self._pending.get(post_id, 0) + 1
+        self._totals[post_id] = self._totals.get(post_id, 0) + 1
+        self.recorded += 1
+
+    def views(self, post_id: str) -> int:
+        return self._totals.get(post_id, 0)
+
+    def top(self, limit: int, post_ids: Container[str]) -> List[Tuple[str, int]]:
+        """The ``limit`` most viewed of ``post_ids`` as (post id, views), most viewed first."""
+        viewed = ((post_id, views) for post_id, views in self._totals.items() if post_id in post_ids)
+        return heapq.nsmallest(limit, viewed, key=lambda item: (-item[1], item[0]))
+
+    async def start(self):
+        """Create the table, load the stored totals and start flushing."""
+        await init_db()
+        await self.flush()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush task and write the remaining deltas."""
+        if self._task is not None:
+            # Not while a flush is in flight, or its batch would be lost to the cancellation
+            async with self._flush_lock:
+                self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"View count flush failed: {str(e)}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            started = time.perf_counter()
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+            try:
+                async with self.session_factory() as session:
+                    rows = [{"post_id": post_id, "views": views} for post_id, views in batch.items()]
+                    for start in range(0, len(rows), self.BATCH_ROWS):
+                        statement = insert(PostView).values(rows[start:start + self.BATCH_ROWS])
+                        await session.execute(statement.on_conflict_do_update(
+                            index_elements=[PostView.post_id],
+                            set_={"views": PostView.views + statement.excluded.views},
+                        ))
+                    stored = dict((await session.execute(select(PostView.post_id, PostView.views))).all())
+                    await session.commit()
+            except Exception:
+                # Put the batch back for the next flush
+                for post_id, views in batch.items():
+                    self._pending[post_id] = self._pending.get(post_id, 0) + views
+                self.flush_failures += 1
+                raise
+            finally:
+                self._flushing = {}
+
+            # Views recorded while writing are in _pending but not yet stored
+            for post_id, views in self._pending.items():
+                stored[post_id] = stored.get(post_id, 0) + views
+            self._totals = stored
+            self.flushes += 1
+            self.rows_written += len(batch)
+            self.last_flush = time.time()
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+
+    def stats(self) -> dict:
+        return {
+            "posts_viewed": len(self._totals),
+            "recorded": self.recorded,
+            "pending_posts": len(self._pending) + len(self._flushing),
+            "pending_views": sum(self._pending.values()) + sum(self._flushing.values()),
+            "flush_seconds": self.flush_seconds,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "rows_written": self.rows_written,
+            "last_flush": self.last_flush,
+            "last_flush_ms": self.last_flush_ms,
+        }
+
+def create_view_counter() -> ViewCounter:
+    return ViewCounter(flush_seconds=settings.VIEW_FLUSH_SECONDS)
@@ -0,0 +1,290 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+def apply_mutations(data: Dict[str, dict], mutations: List[dict]) -> Dict[str, dict]:
+    """
+    Return a copy of ``data`` with ``mutations`` applied in order.
+    Each mutation carries the full post, so later mutations of an id win.
+    """
+    if not mutations:
+        return data
+    result = dict(data)
+    for mutation in mutations:
+        if mutation["op"] == "delete":
+            result.pop(mutation["id"], None)
+        else:
+            result[mutation["id"]] = mutation["post"]
+    return result
+
+def dead_letter_path(wal_path: str) -> str:
+    base, ext = os.path.splitext(wal_path)
+    return f"{base}.dead{ext}"
+
+class RejectedWriteError(Exception):
+    """
+    Upstream refused the write itself (a 4xx other than rate limiting), so
+    retrying the same batch cannot succeed.
+    """
+
+
+class WriteAheadLog:
+    """
+    Append-only JSON-lines log of acknowledged but not yet flushed mutations.
+    Every append is fsynced before the mutation is acknowledged.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, mutation: dict):
+        line = json.dumps(mutation, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def read(self) -> List[dict]:
+        if not os.path.exists(self.path):
+            return []
+        mutations = []
+        with self._lock, open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    mutations.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-append was never acknowledged
+                    logger.warning(f"Skipping corrupt write-ahead log entry in {self.path}")
+        return mutations
+
+    def rewrite(self, mutations: List[dict]):
+        """Atomically replace the log with ``mutations`` (the still-pending tail)."""
+        with self._lock:
+            if not mutations:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for mutation in mutations:
+                    f.write(json.dumps(mutation, separators=(",", ":")) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+
+class GistWriter:
+    """
+    Single async writer for gist mutations.
+
+    ``submit`` logs a mutation to the write-ahead log and acknowledges it; a
+    background task waits ``coalesce_window`` seconds for more mutations and
+    hands the whole batch to ``flush_fn`` so it lands in one PATCH. Failed
+    flushes keep the batch pending and are retried after ``retry_delay``.
+
+    A batch upstream rejects (``RejectedWriteError``) is written again one
+    mutation at a time; mutations rejected on their own are moved to the
+    ``dead_letters`` log, so one bad write cannot hold up the queue behind it.
+    ``on_dead_letter`` is called with each of them.
+
+    Appends and rewrites of the write-ahead log are serialized by
+    ``_wal_lock``, and a rewrite only keeps mutations already appended
+    (``_logged_seq``), so a rewrite can neither drop an acknowledged
+    mutation nor duplicate one whose append is still waiting.
+    """
+
+    def __init__(
+        self,
+        wal: WriteAheadLog,
+        flush_fn: Callable[[List[dict]], Awaitable[None]],
+        coalesce_window: float,
+        retry_delay: float,
+        dead_letters: Optional[WriteAheadLog] = None,
+        on_dead_letter: Optional[Callable[[dict], None]] = None,
+    ):
+        self.wal = wal
+        self.flush_fn = flush_fn
+        self.coalesce_window = coalesce_window
+        self.retry_delay = retry_delay
+        self.dead_letters = dead_letters or WriteAheadLog(dead_letter_path(wal.path))
+        self.on_dead_letter = on_dead_letter
+        self.pending: List[dict] = []
+        self._seq = 0
+        # Highest seq appended to the write-ahead log
+        self._logged_seq = 0
+        self._wal_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+        self._kicked = False
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.mutations_flushed = 0
+        self.last_flush_ms: Optional[float] = None
+        self.total_flush_ms = 0.0
+        self.last_error: Optional[str] = None
+        self.dead_lettered = 0
+        self.last_dead_letter: Optional[dict] = None
+
+    def start(self) -> List[dict]:
+        """Replay the write-ahead log into the queue and start the flush loop."""
+        self.dead_lettered = len(self.dead_letters.read())
+        replayed = self.wal.read()
+        if replayed:
+            logger.info(f"Replaying {len(replayed)} pending mutation(s) from {self.wal.path}")
+            self.pending.extend(replayed)
+            self._seq = max(m["seq"] for m in replayed)
+            self._logged_seq = self._seq
+            self._wakeup.set()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return replayed
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush whatever is still queued, then stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self.pending:
+            try:
+                await asyncio.wait_for(self._flush(), timeout)
+            except Exception as e:
+                # Still in the write-ahead log, replayed on next startup
+                logger.warning(f"Final flush failed, {len(self.pending)} mutation(s) left in WAL: {str(e)}")
+
+    async def submit(self, op: str, post_id: str, post: Optional[dict] = None) -> dict:
+        self._seq += 1
+        mutation = {"seq": self._seq, "op": op, "id": post_id, "post": post, "ts": time.time()}
+        # Queued first, so a rewrite that runs before the append below already keeps it
+        self.pending.append(mutation)
+        try:
+            async with self._wal_lock:
+                await asyncio.to_thread(self.wal.append, mutation)
+                self._logged_seq = mutation["seq"]
+        except Exception:
+            # Not acknowledged, so it must not be flushed either
+            self.pending = [m for m in self.pending if m is not mutation]
+            raise
+        self._wakeup.set()
+        return mutation
+
+    def kick(self):
+        """Request a flush even if nothing is queued (e.g. a storage migration)."""
+        self._kicked = True
+        self._wakeup.set()
+
+    def pending_after(self, seq: int) -> List[dict]:
+        return [m for m in self.pending if m["seq"] > seq]
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Let mutations that arrive within the window join this batch
+            await asyncio.sleep(self.coalesce_window)
+            self._wakeup.clear()
+            try:
+                await self._flush()
+            except Exception:
+                await asyncio.sleep(self.retry_delay)
+                self._wakeup.set()
+
+    async def _flush(self):
+        if not self.pending and not self._kicked:
+            return
+        self._kicked = False
+        batch = list(self.pending)
+        try:
+            await self._write(batch)
+        except RejectedWriteError as e:
+            if not batch:
+                self._kicked = True
+                raise
+            if len(batch) == 1:
+                await self._dead_letter(batch[0], e)
+                return
+            # Find the mutations rejected on their own and write the rest
+            for mutation in batch:
+                try:
+                    await self._write([mutation])
+                except RejectedWriteError as error:
+                    await self._dead_letter(mutation, error)
+        except Exception:
+            self._kicked = not batch
+            raise
+
+    async def _write(self, batch: List[dict]):
+        started = time.perf_counter()
+        try:
+            await self.flush_fn(batch)
+        except Exception as e:
+            self.failed_flushes += 1
+            self.last_error = str(e)
+            logger.error(f"Failed to flush {len(batch)} gist mutation(s): {str(e)}")
+            raise
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if batch:
+            self.pending = self.pending_after(batch[-1]["seq"])
+            await self._rewrite_wal()
+        self.flushes += 1
+        self.mutations_flushed += len(batch)
+        self.last_flush_ms = round(elapsed_ms, 2)
+        self.total_flush_ms += elapsed_ms
+        self.last_error = None
+        logger.info(f"Flushed {len(batch)} gist mutation(s) in {elapsed_ms:.0f}ms")
+
+    async def _dead_letter(self, mutation: dict, error: Exception):
+        self.pending = [m for m in self.pending if m["seq"] != mutation["seq"]]
+        entry = {**mutation, "error": str(error), "failed_at": time.time()}
+        self.dead_lettered += 1
+        self.last_dead_letter = {key: entry[key] for key in ("seq", "op", "id", "error", "failed_at")}
+        logger.error(
+            f"Gist rejected {mutation['op']} of post {mutation['id']}, moved to {self.dead_letters.path}: {str(error)}"
+        )
+        # Readers must not see the mutation once it has left the queue
+        if self.on_dead_letter is not None:
+            self.on_dead_letter(mutation)
+        # Appended before the log is trimmed, so a crash in between duplicates it rather than losing it
+        await asyncio.to_thread(self.dead_letters.append, entry)
+        await self._rewrite_wal()
+
+    async def _rewrite_wal(self):
+        async with self._wal_lock:
+            # Taken under the lock: appends that finished are in pending, ones still waiting add themselves
+            tail = [m for m in self.pending if m["seq"] <= self._logged_seq]
+            await asyncio.to_thread(self.wal.rewrite, tail)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self.pending),
+            "oldest_pending_age_seconds": round(time.time() - self.pending[0]["ts"], 3) if self.pending else None,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "mutations_flushed": self.mutations_flushed,
+            "mutations_per_flush": round(self.mutations_flushed / self.flushes, 2) if self.flushes else None,
+            "last_flush_ms": self.last_flush_ms,
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 2) if self.flushes else None,
+            "last_error": self.last_error,
+            "dead_letters": self.dead_lettered,
+            "dead_letter_path": self.dead_letters.path,
+            "last_dead_letter": self.last_dead_letter,
+        }
@@ -0,0 +1,351 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.blog.singleflight import SingleFlight
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+HASH_RE = re.compile(r"^[0-9a-f]{64}$")
+# Bytes needed to recognise every type in sniff_content_type
+SNIFF_BYTES = 32
+# Types that can be resized into width variants (when Pillow is installed)
+RESIZABLE_TYPES = {"image/png": "PNG", "image/jpeg": "JPEG", "image/webp": "WEBP"}
+# Types decoded once on upload (when Pillow is installed) so corrupt or truncated images are refused
+DECODABLE_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp"}
+
+# ISO base media files (an ftyp box) by brand: MP4 video, or AVIF/HEIC images
+MP4_BRANDS = {b"isom", b"iso2", b"iso4", b"iso5", b"iso6", b"mp41", b"mp42", b"avc1", b"dash", b"M4V ", b"mmp4"}
+IMAGE_BRANDS = {
+    b"avif": "image/avif", b"avis": "image/avif",
+    b"heic": "image/heic", b"heix": "image/heic", b"heim": "image/heic", b"heis": "image/heic",
+    b"hevc": "image/heic-sequence", b"hevx": "image/heic-sequence",
+}
+# Generic HEIF brands; the compatible brands after them name the codec
+HEIF_BRANDS = {b"mif1": "image/heif", b"msf1": "image/heif-sequence"}
+
+def _sniff_ftyp(head: bytes) -> Optional[str]:
+    major = head[8:12]
+    if major in MP4_BRANDS:
+        return "video/mp4"
+    if major in IMAGE_BRANDS:
+        return IMAGE_BRANDS[major]
+    if major in HEIF_BRANDS:
+        # Compatible brands follow the 4-byte minor version
+        for offset in range(16, len(head) - 3, 4):
+            content_type = IMAGE_BRANDS.get(head[offset:offset + 4])
+            if content_type is not None:
+                return content_type
+        return HEIF_BRANDS[major]
+    return None
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """
+    Media type from a file's leading bytes, or None if it is not an allowed
+    type. Uploads are typed by content, never by the client's claim, and SVG
+    is not accepted since it can carry scripts.
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp":
+        return _sniff_ftyp(head)
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+class MediaTooLargeError(Exception):
+    pass
+
+class UnsupportedMediaError(Exception):
+    pass
+
+class CorruptMediaError(UnsupportedMediaError):
+    """An allowed type by its leading bytes, but the rest does not decode."""
+
+class MediaUpload:
+    """
+    One upload streamed to a temporary file in chunks, hashed as it arrives.
+    Only one chunk is held in memory at a time.
+    """
+
+    def __init__(self, store: "MediaStore"):
+        self.store = store
+        self.tmp_path = os.path.join(store.tmp_dir, uuid.uuid4().hex)
+        self._file = open(self.tmp_path, "wb")
+        self._sha256 = hashlib.sha256()
+        self._head = b""
+        self.content_type: Optional[str] = None
+        self.size = 0
+
+    async def write(self, chunk: bytes):
+        if not chunk:
+            return
+        self.size += len(chunk)
+        if self.size > self.store.max_upload_bytes:
+            raise MediaTooLargeError(f"Uploads are limited to {self.store.max_upload_bytes} bytes")
+        if self.content_type is None and len(self._head) < SNIFF_BYTES:
+            self._head += chunk[:SNIFF_BYTES - len(self._head)]
+            if len(self._head) == SNIFF_BYTES:
+                self._sniff()
+        self._sha256.update(chunk)
+        await asyncio.to_thread(self._file.write, chunk)
+
+    def _sniff(self):
+        self.content_type = sniff_content_type(self._head)
+        if self.content_type is None:
+            raise UnsupportedMediaError("Unsupported media type")
+
+    async def commit(self) -> Tuple[dict, bool]:
+        """Move the upload to its content address. Returns (media info, whether it was new)."""
+        if self.size == 0:
+            raise UnsupportedMediaError("Empty upload")
+        if self.content_type is None:
+            self._sniff()
+        await asyncio.to_thread(self._close)
+        if Image is not None and self.content_type in DECODABLE_TYPES:
+            await asyncio.to_thread(self._decode)
+        media_hash = self._sha256.hexdigest()
+        created = await asyncio.to_thread(self.store.add, self.tmp_path, media_hash)
+        return self.store.describe(media_hash, self.content_type, self.size), created
+
+    def _decode(self):
+        try:
+            with Image.open(self.tmp_path) as image:
+                image.load()
+        except Exception as e:
+            raise CorruptMediaError(f"Corrupt or truncated image: {str(e)}")
+
+    def _close(self):
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def abort(self):
+        """Drop the temporary file; a no-op once committed."""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+class MediaStore:
+    """
+    Content-addressed media files under ``root``: each file is stored once
+    under the SHA-256 of its bytes, so re-uploads are free and URLs can be
+    cached forever.
+
+    Width variants of images (resized on first request, with Pillow) are
+    derived data: they live under ``variants/`` and are evicted least
+    recently used once they take more than ``variant_cache_bytes`` on disk.
+    Originals are never evicted.
+    """
+
+    def __init__(self, root: str, max_upload_bytes: int, variant_cache_bytes: int, variant_widths: List[int]):
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        self.variants_dir = os.path.join(root, "variants")
+        self.max_upload_bytes = max_upload_bytes
+        self.variant_cache_bytes = variant_cache_bytes
+        self.variant_widths = sorted(set(variant_widths))
+        self._types: Dict[str, str] = {}
+        self._variants: "OrderedDict[str, int]" = OrderedDict()
+        self._variant_bytes = 0
+        # Variants that would not be smaller than their original, or could not be made
+        self._too_narrow: set = set()
+        self._flight = SingleFlight()
+        # Evicted variants whose files are still being deleted, and the deletion
+        self._unlinking: Dict[str, asyncio.Future] = {}
+
+        # Counters
+        self.uploads = 0
+        self.deduplicated = 0
+        self.variants_created = 0
+        self.variant_hits = 0
+        self.variants_evicted = 0
+
+    def load(self):
+        """Create the directories and rebuild the variant LRU from disk, oldest access first."""
+        for path in (self.root, self.tmp_dir, self.variants_dir):
+            os.makedirs(path, exist_ok=True)
+        for name in os.listdir(self.tmp_dir):
+            # Leftovers of uploads interrupted by a crash
+            os.remove(os.path.join(self.tmp_dir, name))
+        entries = []
+        for entry in os.scandir(self.variants_dir):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_atime, entry.path, stat.st_size))
+        self._variants.clear()
+        self._variant_bytes = 0
+        for _, path, size in sorted(entries):
+            self._variants[path] = size
+            self._variant_bytes += size
+        self._remove_files(self._evict())
+
+    def begin_upload(self) -> MediaUpload:
+        return MediaUpload(self)
+
+    def path(self, media_hash: str) -> str:
+        return os.path.join(self.root, media_hash[:2], media_hash)
+
+    def add(self, tmp_path: str, media_hash: str) -> bool:
+        """Move a finished upload into place; False if the same bytes were already stored."""
+        self.uploads += 1
+        path = self.path(media_hash)
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            self.deduplicated += 1
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+        return True
+
+    @staticmethod
+    def describe(media_hash: str, content_type: str, size: int) -> dict:
+        return {"hash": media_hash, "url": f"/media/{media_hash}", "content_type": content_type, "size": size}
+
+    def content_type(self, media_hash: str) -> Optional[str]:
+        """Type of a stored file (sniffed once, then remembered), or None if there is no such file."""
+        content_type = self._types.get(media_hash)
+        if content_type is not None:
+            return content_type
+        try:
+            with open(self.path(media_hash), "rb") as f:
+                content_type = sniff_content_type(f.read(SNIFF_BYTES))
+        except FileNotFoundError:
+            return None
+        if content_type is not None:
+            self._types[media_hash] = content_type
+        return content_type
+
+    async def variant(self, media_hash: str, content_type: str, width: int) -> str:
+        """
+        Path of ``media_hash`` resized to ``width`` pixels wide, created on
+        first use. Falls back to the original when it cannot be resized.
+        """
+        fmt = RESIZABLE_TYPES.get(content_type)
+        if Image is None or fmt is None:
+            return self.path(media_hash)
+        path = os.path.join(self.variants_dir, f"{media_hash}-w{width}.{fmt.lower()}")
+        if path in self._variants:
+            self._variants.move_to_end(path)
+            self.variant_hits += 1
+            return path
+        if path in self._too_narrow:
+            return self.path(media_hash)
+        return await self._flight.do(path, lambda: self._create_variant(media_hash, fmt, width, path))
+
+    async def _create_variant(self, media_hash: str, fmt: str, width: int, path: str) -> str:
+        unlinking = self._unlinking.get(path)
+        if unlinking is not None:
+            # Recreating a just-evicted variant; its old file must be gone before the new one lands
+            await asyncio.shield(unlinking)
+        try:
+            created = await asyncio.to_thread(self._resize, self.path(media_hash), fmt, width, path)
+        except Exception as e:
+            # Stored before uploads were decoded; serve the original rather than fail
+            logger.warning(f"Could not resize media {media_hash}: {str(e)}")
+            created = False
+        if not created:
+            self._too_narrow.add(path)
+            return self.path(media_hash)
+        size = os.path.getsize(path)
+        self._variants[path] = size
+        self._variant_bytes += size
+        self.variants_created += 1
+        await self._unlink(self._evict(path))
+        return path
+
+    @staticmethod
+    def _resize(source: str, fmt: str, width: int, path: str) -> bool:
+        with Image.open(source) as image:
+            if image.width <= width:
+                return False
+            height = max(1, round(image.height * width / image.width))
+            resized = image.resize((width, height), Image.LANCZOS)
+            tmp_path = f"{path}.tmp"
+            resized.save(tmp_path, format=fmt, optimize=True)
+        os.replace(tmp_path, path)
+        return True
+
+    def _evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Drop least recently used variants from the LRU until it fits the
+        budget, and return their paths for deletion. Runs on the event loop,
+        the only place the LRU is touched.
+        """
+        victims = []
+        while self._variant_bytes > self.variant_cache_bytes and self._variants:
+            path, size = next(iter(self._variants.items()))
+            if path == keep:
+                break
+            del self._variants[path]
+            self._variant_bytes -= size
+            self.variants_evicted += 1
+            victims.append(path)
+        return victims
+
+    async def _unlink(self, paths: List[str]):
+        """Delete evicted variant files in a thread."""
+        if not paths:
+            return
+        unlinking = asyncio.ensure_future(asyncio.to_thread(self._remove_files, paths))
+        for path in paths:
+            self._unlinking[path] = unlinking
+
+        def done(_):
+            for path in paths:
+                if self._unlinking.get(path) is unlinking:
+                    del self._unlinking[path]
+
+        # Cleared when the deletion finishes, even if this caller is cancelled first
+        unlinking.add_done_callback(done)
+        await asyncio.shield(unlinking)
+
+    @staticmethod
+    def _remove_files(paths: List[str]):
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "deduplicated": self.deduplicated,
+            "variants": len(self._variants),
+            "variant_bytes": self._variant_bytes,
+            "variant_cache_bytes": self.variant_cache_bytes,
+            "variants_created": self.variants_created,
+            "variant_hits": self.variant_hits,
+            "variants_evicted": self.variants_evicted,
+            "resizing_available": Image is not None,
+        }
+
+def create_media_store() -> MediaStore:
+    return MediaStore(
+        root=settings.MEDIA_ROOT,
+        max_upload_bytes=settings.MEDIA_MAX_UPLOAD_BYTES,
+        variant_cache_bytes=settings.MEDIA_VARIANT_CACHE_BYTES,
+        variant_widths=[int(w) for w in settings.MEDIA_VARIANT_WIDTHS.split(",") if w.strip()],
+    )
@@ -0,0 +1,36 @@
+"""
+One-shot import of the posts in the configured gist into the SQLite repository.
+
+    python -m app.tools.import_gist
+
+Post ids and dates are preserved, and re-running the import upserts, so it is
+safe to run again before switching BLOG_BACKEND to "sqlite".
+"""
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.logging import configure_logging
+from app.services.blog.gist_service import GistBlogService
+from app.services.blog.sqlite_service import SQLiteBlogService
+
+logger = logging.getLogger(__name__)
+
+async def import_gist() -> int:
+    gist_service = GistBlogService()
+    try:
+        # Raw post dicts, so fields the Blog model leaves out (previous_slugs) are kept
+        post_map = await gist_service.get_post_map()
+        posts = await asyncio.gather(*(gist_service.load_post(post) for post in post_map.values()))
+    finally:
+        await gist_service.client.aclose()
+
+    sqlite_service = SQLiteBlogService()
+    await sqlite_service.startup()
+    count = await sqlite_service.import_posts(posts)
+    logger.info(f"Imported {count} post(s) from gist {settings.GIST_ID} into {settings.DATABASE_URL}")
+    return count
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(import_gist())
@@ -0,0 +1,31 @@
+"""
+Move posts onto their home gist after shards are added to GIST_IDS.
+
+    python -m app.tools.rebalance_shards
+
+Moves go through each shard's write-ahead log and writer, and are flushed to
+GitHub before the command exits.
+"""
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.core.http import create_github_client
+from app.core.logging import configure_logging
+from app.services.blog.sharded_gist_service import ShardedGistBlogService, parse_gist_ids
+
+logger = logging.getLogger(__name__)
+
+async def rebalance_shards() -> int:
+    client = create_github_client()
+    service = ShardedGistBlogService(parse_gist_ids(settings.GIST_IDS), client=client)
+    await service.startup()
+    try:
+        return await service.rebalance()
+    finally:
+        await service.shutdown()
+        await client.aclose()
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(rebalance_shards())
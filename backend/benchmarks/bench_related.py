@@ -0,0 +1,76 @@
+"""
+Related-posts index benchmark over a synthetic corpus.
+
+    python -m benchmarks.bench_related --posts 1000 --posts 5000 --posts 20000
+
+Reports how the full top-k build (time, peak and retained memory) scales
+with corpus size, next to the cost of refreshing the table after a single
+post changes and of a lookup.
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+
+from benchmarks.bench_search import synthetic_corpus
+from app.services.blog.related import RelatedIndex, _Refresh
+
+def bench(n: int, k: int, updates: int) -> dict:
+    corpus = synthetic_corpus(n)
+
+    index = RelatedIndex(k=k)
+    started = time.perf_counter()
+    index.apply(corpus, [])
+    index.refresh_now()
+    build_s = time.perf_counter() - started
+
+    # Separate build for memory, tracemalloc slows the Python parts down
+    tracemalloc.start()
+    measured = RelatedIndex(k=k)
+    measured.apply(corpus, [])
+    measured.refresh_now()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    rng = random.Random(7)
+    update_ms = []
+    for i in range(updates):
+        post_id = str(rng.randint(1, n))
+        post = dict(corpus[post_id], content=corpus[post_id]["content"] + f" edited{i}", tags=rng.sample(corpus["1"]["tags"], 2))
+        started = time.perf_counter()
+        index.apply({post_id: post}, [])
+        index.refresh_now()
+        update_ms.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    for i in range(1000):
+        index.related(str(i % n + 1), k)
+    lookup_us = (time.perf_counter() - started) * 1000
+
+    vectors = index._vectors(_Refresh(index))
+    return {
+        "posts": n,
+        "k": k,
+        "build_seconds": round(build_s, 3),
+        "build_peak_mb": round(peak / 1e6, 1),
+        "retained_mb": round(retained / 1e6, 1),
+        "single_update_ms_p50": round(statistics.median(update_ms), 3),
+        "single_update_ms_max": round(max(update_ms), 3),
+        "lookup_us": round(lookup_us, 3),
+        "full_builds": index.full_builds,
+        "incremental_updates": index.incremental_updates,
+        "vocabulary": vectors.text.shape[1],
+        "nonzeros": int(vectors.text.nnz),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, action="append", help="Corpus size (repeatable)")
+    parser.add_argument("--k", type=int, default=10, help="Related posts kept per post")
+    parser.add_argument("--updates", type=int, default=20, help="Single-post edits to time")
+    args = parser.parse_args()
+    for n in args.posts or [1000, 5000]:
+        print(json.dumps(bench(n, args.k, args.updates)))
@@ -0,0 +1,97 @@
+"""
+Listing endpoint throughput with and without the serialized response cache.
+
+    python -m benchmarks.bench_responses --posts 100 --posts 1000
+
+"before" serves GET /api/blog-posts/ the old way: build Blog models, let
+FastAPI validate them through ``response_model`` and encode the JSON on
+every request. "after" is the current route, which reuses the bytes (and
+their gzip form) until the corpus changes. Both run in-process over the
+ASGI transport, so the numbers exclude network and server overhead.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI
+
+import app.api.routes.blog as blog_routes
+from app.models.blog_model import Blog
+from app.schemas.blog_schema import BlogResponse
+from app.services.blog.interfaces import BlogRepository
+
+class InMemoryBlogService(BlogRepository):
+    def __init__(self, posts: Dict[str, dict]):
+        super().__init__()
+        self.posts = posts
+        self._publish(posts, [])
+
+    async def get_post(self, post_id: str) -> Optional[dict]:
+        return self.posts.get(post_id)
+
+    async def list_blogs(self, limit: Optional[int] = None, offset: int = 0) -> List[Blog]:
+        posts = sorted(self.posts.values(), key=lambda p: (p["date"], int(p["id"])), reverse=True)
+        end = offset + limit if limit is not None else None
+        return [Blog(**post) for post in posts[offset:end]]
+
+def synthetic_posts(n: int) -> Dict[str, dict]:
+    return {
+        str(i): {
+            "id": str(i),
+            "title": f"Post number {i}",
+            "summary": "A short summary of the post. " * 3,
+            "content": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40,
+            "tags": ["python", "fastapi", f"tag{i % 20}"],
+            "media": [],
+            "date": f"2024-01-{i % 28 + 1:02d}T12:00:{i % 60:02d}",
+            "slug": f"post-number-{i}",
+        }
+        for i in range(1, n + 1)
+    }
+
+def create_bench_app(service: BlogRepository) -> FastAPI:
+    blog_routes.blog_service = service
+    app = FastAPI()
+    app.include_router(blog_routes.router, prefix="/api/blog-posts")
+
+    @app.get("/before", response_model=Dict[str, BlogResponse])
+    async def before():
+        blogs = await service.list_blogs()
+        return {str(blog.id): blog for blog in blogs}
+
+    return app
+
+async def measure(client: httpx.AsyncClient, path: str, requests: int, headers: dict) -> dict:
+    # Warm up (fills the response cache for the "after" route)
+    for _ in range(3):
+        (await client.get(path, headers=headers)).raise_for_status()
+    started = time.perf_counter()
+    size = 0
+    for _ in range(requests):
+        # Read the raw bytes so client-side decompression is not measured
+        async with client.stream("GET", path, headers=headers) as res:
+            size = sum([len(chunk) async for chunk in res.aiter_raw()])
+    elapsed = time.perf_counter() - started
+    return {"requests_per_second": round(requests / elapsed, 1), "bytes_on_wire": size}
+
+async def bench(n: int, requests: int) -> dict:
+    app = create_bench_app(InMemoryBlogService(synthetic_posts(n)))
+    transport = httpx.ASGITransport(app=app)
+    result = {"posts": n}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        result["before"] = await measure(client, "/before", requests, {"Accept-Encoding": "identity"})
+        result["after"] = await measure(client, "/api/blog-posts/", requests, {"Accept-Encoding": "identity"})
+        result["after_gzip"] = await measure(client, "/api/blog-posts/", requests, {"Accept-Encoding": "gzip"})
+    result["speedup"] = round(result["after"]["requests_per_second"] / result["before"]["requests_per_second"], 1)
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, action="append", help="Corpus size (repeatable)")
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+    for n in args.posts or [100, 1000]:
+        print(json.dumps(asyncio.run(bench(n, args.requests))))
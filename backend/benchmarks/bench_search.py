@@ -0,0 +1,101 @@
+"""
+Search index benchmark over a synthetic corpus.
+
+    python -m benchmarks.bench_search --posts 10000 --posts 100000
+
+Reports build time, incremental update time, query latency, persisted size,
+warm-start load time and the memory held by the index.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from app.services.blog.search_index import SearchIndex
+
+WORDS = [f"word{i}" for i in range(20000)]
+TAGS = [f"tag{i}" for i in range(200)]
+
+def synthetic_corpus(n: int, seed: int = 42) -> dict:
+    rng = random.Random(seed)
+    # Zipf-like word distribution so common terms have long posting lists
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    posts = {}
+    for i in range(1, n + 1):
+        posts[str(i)] = {
+            "id": str(i),
+            "title": " ".join(rng.choices(WORDS, weights, k=6)),
+            "summary": " ".join(rng.choices(WORDS, weights, k=20)),
+            "content": " ".join(rng.choices(WORDS, weights, k=300)),
+            "tags": rng.sample(TAGS, 3),
+            "date": f"2024-01-01T00:00:{i % 60:02d}",
+        }
+    return posts
+
+def bench(n: int, queries: int) -> dict:
+    corpus = synthetic_corpus(n)
+
+    index = SearchIndex()
+    started = time.perf_counter()
+    index.apply(corpus, [])
+    build_s = time.perf_counter() - started
+
+    # Separate build for memory, tracemalloc slows tokenization down considerably
+    tracemalloc.start()
+    measured = SearchIndex()
+    measured.apply(corpus, [])
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+    del measured
+
+    rng = random.Random(7)
+    latencies = []
+    for _ in range(queries):
+        q = " ".join(rng.sample(WORDS[:2000], 2)) + " " + rng.choice(WORDS[:500])[:5]
+        started = time.perf_counter()
+        index.search(q, limit=10)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    post = dict(corpus["1"], content=corpus["1"]["content"] + " freshly edited")
+    started = time.perf_counter()
+    index.apply({"1": post}, [])
+    update_ms = (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "search_index.json.gz")
+        started = time.perf_counter()
+        index.save(path)
+        save_s = time.perf_counter() - started
+        size_mb = os.path.getsize(path) / 1e6
+
+        warm = SearchIndex()
+        started = time.perf_counter()
+        warm.load(path)
+        warm.apply(corpus, [])
+        warm_start_s = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "posts": n,
+        "build_seconds": round(build_s, 3),
+        "warm_start_seconds": round(warm_start_s, 3),
+        "single_update_ms": round(update_ms, 3),
+        "query_p50_ms": round(statistics.median(latencies), 3),
+        "query_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "index_memory_mb": round(memory_mb, 1),
+        "persisted_mb": round(size_mb, 2),
+        "save_seconds": round(save_s, 3),
+        "vocabulary": len(index.postings),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--posts", type=int, action="append", help="Corpus size (repeatable)")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    for n in args.posts or [10000]:
+        print(json.dumps(bench(n, args.queries)))
@@ -0,0 +1,230 @@
+"""
+Local stand-in for the parts of the GitHub Gist API the backend uses.
+
+    python -m benchmarks.fake_gist --port 9000 --posts 500 --latency-ms 40 --failure-rate 0.02
+
+then start the backend with ``GITHUB_API_URL=http://127.0.0.1:9000`` and
+``GIST_ID=fake``. The load test also serves it in-process, without a port.
+
+It answers ``GET /gists/{id}`` (with ETags and 304s), ``PATCH /gists/{id}``
+and raw file URLs like GitHub does: files beyond ``--max-files`` are left
+out of the listing and content above ``--truncate-bytes`` is truncated, so
+the backend's raw URL fallbacks are exercised too. Every call waits
+``--latency-ms`` (plus up to ``--jitter-ms``), a ``--failure-rate`` share of
+calls fail with ``--failure-status``, and responses carry rate limit headers.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+
+WORDS = (
+    "python fastapi async cache latency gist github index search token stream "
+    "request response server client queue worker thread memory profile deploy "
+    "docker database schema query benchmark release feature design pattern"
+).split()
+
+def synthetic_posts(n: int, content_bytes: int = 2000, seed: int = 0) -> Dict[str, dict]:
+    """``n`` posts of roughly ``content_bytes`` of text drawn from a small vocabulary, so searches match."""
+    rng = random.Random(seed)
+    posts = {}
+    for i in range(1, n + 1):
+        words = []
+        size = 0
+        while size < content_bytes:
+            word = rng.choice(WORDS)
+            words.append(word)
+            size += len(word) + 1
+        posts[str(i)] = {
+            "id": str(i),
+            "title": f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} notes {i}",
+            "summary": " ".join(rng.choices(WORDS, k=12)),
+            "content": " ".join(words),
+            "tags": sorted(set(rng.choices(WORDS[:10], k=3))),
+            "media": [],
+            "date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}T12:{i % 60:02d}:00",
+            "slug": f"post-{i}",
+        }
+    return posts
+
+class FakeGist:
+    """One gist's files plus the knobs that shape how it is served."""
+
+    def __init__(
+        self,
+        posts: Dict[str, dict],
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_status: int = 502,
+        max_files: int = 300,
+        truncate_bytes: int = 1024 * 1024,
+        rate_limit: int = 5000,
+        seed: int = 0,
+    ):
+        # Importing the app package builds the app from the current settings,
+        # so the load test has to configure them before this runs
+        from app.services.blog.gist_layout import INDEX_FILENAME, encode_index, encode_post, post_filename
+
+        self.files: Dict[str, str] = {post_filename(post_id): encode_post(post) for post_id, post in posts.items()}
+        self.files[INDEX_FILENAME] = encode_index(posts)
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.max_files = max_files
+        self.truncate_bytes = truncate_bytes
+        self.rate_limit = rate_limit
+        self.rate_limit_used = 0
+        self.rate_limit_reset = time.time() + 3600
+        self._rng = random.Random(seed)
+        self._etag: Optional[str] = None
+
+        # Counters
+        self.calls: Dict[str, int] = {}
+        self.failures = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+
+    def etag(self) -> str:
+        if self._etag is None:
+            digest = hashlib.sha1()
+            for name in sorted(self.files):
+                digest.update(name.encode())
+                digest.update(self.files[name].encode())
+            self._etag = f'"{digest.hexdigest()}"'
+        return self._etag
+
+    def rate_limit_headers(self) -> Dict[str, str]:
+        if time.time() >= self.rate_limit_reset:
+            self.rate_limit_used = 0
+            self.rate_limit_reset = time.time() + 3600
+        self.rate_limit_used += 1
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.rate_limit - self.rate_limit_used)),
+            "X-RateLimit-Reset": str(int(self.rate_limit_reset)),
+        }
+
+    async def delay(self, kind: str) -> Optional[Response]:
+        """Simulate latency, and return an error response if this call should fail."""
+        self.calls[kind] = self.calls.get(kind, 0) + 1
+        wait = self.latency + self._rng.uniform(0, self.jitter)
+        if wait:
+            await asyncio.sleep(wait)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            self.failures += 1
+            headers = {"Retry-After": "1"} if self.failure_status in (403, 429) else {}
+            return JSONResponse({"message": "Injected failure"}, status_code=self.failure_status, headers=headers)
+        return None
+
+    def listing(self, gist_id: str, base_url: str) -> dict:
+        files = {}
+        for name in sorted(self.files)[:self.max_files]:
+            content = self.files[name]
+            truncated = len(content) > self.truncate_bytes
+            files[name] = {
+                "filename": name,
+                "size": len(content),
+                "truncated": truncated,
+                "content": content[:self.truncate_bytes] if truncated else content,
+                "raw_url": f"{base_url}raw/{gist_id}/{name}",
+            }
+        return {"id": gist_id, "owner": {"login": "fake"}, "files": files}
+
+    def patch(self, files: Dict[str, Optional[dict]]):
+        for name, file in files.items():
+            if file is None:
+                self.files.pop(name, None)
+            elif file.get("content") is not None:
+                self.files[name] = file["content"]
+        self._etag = None
+
+    def stats(self) -> dict:
+        return {
+            "calls": dict(self.calls),
+            "failures": self.failures,
+            "not_modified": self.not_modified,
+            "bytes_sent": self.bytes_sent,
+            "files": len(self.files),
+        }
+
+def create_fake_gist_app(gist: FakeGist) -> FastAPI:
+    app = FastAPI(title="Fake GitHub Gist API", docs_url=None, redoc_url=None, openapi_url=None)
+
+    @app.get("/gists/{gist_id}")
+    async def get_gist(gist_id: str, request: Request):
+        error = await gist.delay("get")
+        if error is not None:
+            return error
+        headers = {**gist.rate_limit_headers(), "ETag": gist.etag()}
+        if request.headers.get("If-None-Match") == gist.etag():
+            gist.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        body = json.dumps(gist.listing(gist_id, str(request.base_url))).encode()
+        gist.bytes_sent += len(body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    @app.patch("/gists/{gist_id}")
+    async def patch_gist(gist_id: str, request: Request):
+        error = await gist.delay("patch")
+        if error is not None:
+            return error
+        gist.patch((await request.json()).get("files") or {})
+        return JSONResponse(gist.listing(gist_id, str(request.base_url)), headers=gist.rate_limit_headers())
+
+    @app.get("/raw/{gist_id}/{filename}")
+    async def raw_file(gist_id: str, filename: str):
+        error = await gist.delay("raw")
+        if error is not None:
+            return error
+        content = gist.files.get(filename)
+        if content is None:
+            return PlainTextResponse("Not Found", status_code=404)
+        gist.bytes_sent += len(content)
+        return PlainTextResponse(content)
+
+    @app.get("/_stats")
+    async def stats():
+        return gist.stats()
+
+    return app
+
+def add_fake_gist_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--posts", type=int, default=200, help="Posts in the gist")
+    parser.add_argument("--content-bytes", type=int, default=2000, help="Approximate size of each post's content")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added to every GitHub call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra latency, up to this much")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of calls that fail (0-1)")
+    parser.add_argument("--failure-status", type=int, default=502, help="Status of injected failures")
+    parser.add_argument("--max-files", type=int, default=300, help="Files inlined in the gist listing")
+    parser.add_argument("--truncate-bytes", type=int, default=1024 * 1024, help="Inlined content is truncated above this")
+    parser.add_argument("--seed", type=int, default=0)
+
+def fake_gist_from_args(args: argparse.Namespace) -> FakeGist:
+    return FakeGist(
+        synthetic_posts(args.posts, args.content_bytes, args.seed),
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        failure_rate=args.failure_rate,
+        failure_status=args.failure_status,
+        max_files=args.max_files,
+        truncate_bytes=args.truncate_bytes,
+        seed=args.seed,
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_fake_gist_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+    uvicorn.run(create_fake_gist_app(fake_gist_from_args(args)), host=args.host, port=args.port, log_level="warning")
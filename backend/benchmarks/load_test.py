@@ -0,0 +1,247 @@
+"""
+Load test of the whole app against the fake Gist API.
+
+    python -m benchmarks.load_test --concurrency 20 --requests 500 --output results.json
+    python -m benchmarks.load_test --latency-ms 40 --failure-rate 0.02
+    python -m benchmarks.load_test --update-baseline
+
+Runs ``create_app()`` with its full middleware stack and the gist backend,
+whose GitHub client is wired to ``benchmarks.fake_gist`` in-process (or to
+a running fake with ``--github-url``). Each workload sends ``--requests``
+requests from ``--concurrency`` concurrent clients over the ASGI transport
+and reports throughput and p50/p95/p99 latency. The create, update and
+delete workloads run in that order on the posts they create.
+
+Results are written as JSON and compared with ``benchmarks/baseline.json``:
+a workload regresses when its throughput drops, or its p95 grows, by more
+than ``--tolerance``, and the run then exits with status 1. Baselines are
+machine specific, so refresh it with ``--update-baseline`` on the machine
+that runs the comparison.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.fake_gist import WORDS, add_fake_gist_arguments, create_fake_gist_app, fake_gist_from_args
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+WORKLOADS = ("list", "page", "get", "search", "create", "update", "delete")
+READ_WORKLOADS = ("list", "page", "get", "search")
+ADMIN_PASSWORD = "load-test-password"
+
+def configure_environment(data_dir: str, github_url: str):
+    """
+    Point the settings at the fake gist and throwaway data files. The app
+    reads its settings when first imported, so this runs before that.
+    """
+    os.environ.update({
+        "BLOG_BACKEND": "gist",
+        "GIST_ID": "fake",
+        "GIST_IDS": "",
+        "GITHUB_TOKEN": "fake-token",
+        "GITHUB_API_URL": github_url,
+        "ADMIN_PASSWORD": ADMIN_PASSWORD,
+        "SECRET_KEY": "load-test-secret",
+        "RATE_LIMIT_PER_MINUTE": str(10 ** 9),
+        "RATE_LIMIT_BACKEND": "memory",
+        "WRITE_AHEAD_LOG_PATH": os.path.join(data_dir, "gist_wal.jsonl"),
+        "SNAPSHOT_PATH": os.path.join(data_dir, "gist_snapshot.jsonl"),
+        "SEARCH_INDEX_PATH": os.path.join(data_dir, "search_index.json.gz"),
+        # View counts are written to SQLite whatever the backend
+        "DATABASE_URL": "sqlite+aiosqlite:///" + os.path.join(data_dir, "blog.db"),
+    })
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), round(p / 100 * len(ordered) + 0.5)))
+    return ordered[rank - 1]
+
+def summarize(latencies: List[float], errors: int, concurrency: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+
+    def ms(seconds: float) -> float:
+        return round(seconds * 1000, 3)
+
+    return {
+        "requests": len(ordered),
+        "concurrency": concurrency,
+        "errors": errors,
+        "requests_per_second": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "max": ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+
+# A request factory takes the request number and returns (method, path, json body)
+RequestFactory = Callable[[int], Tuple[str, str, Optional[dict]]]
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    make_request: RequestFactory,
+    requests: int,
+    concurrency: int,
+    headers: dict,
+    on_response: Optional[Callable[[httpx.Response], None]] = None
+) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    next_request = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for n in next_request:
+            method, path, body = make_request(n)
+            started = time.perf_counter()
+            try:
+                res = await client.request(method, path, json=body, headers=headers)
+                failed = res.status_code >= 400
+            except httpx.HTTPError:
+                res, failed = None, True
+            latencies.append(time.perf_counter() - started)
+            if on_response is not None and not failed:
+                on_response(res)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, concurrency, time.perf_counter() - started)
+
+def request_factories(post_ids: List[str], created: List[str], seed: int) -> Dict[str, RequestFactory]:
+    rng = random.Random(seed)
+
+    def new_post(n: int) -> dict:
+        return {
+            "title": f"Load test post {n}",
+            "summary": " ".join(rng.choices(WORDS, k=10)),
+            "content": " ".join(rng.choices(WORDS, k=300)),
+            "tags": rng.sample(WORDS[:10], 2),
+        }
+
+    return {
+        "list": lambda n: ("GET", "/api/blog-posts/", None),
+        "page": lambda n: ("GET", f"/api/blog-posts/page?limit=20&tag={WORDS[n % 10]}", None),
+        "get": lambda n: ("GET", f"/api/blog-posts/{rng.choice(post_ids)}", None),
+        "search": lambda n: ("GET", f"/api/blog-posts/search?q={'+'.join(rng.sample(WORDS, 2))}", None),
+        "create": lambda n: ("POST", "/api/blog-posts/", new_post(n)),
+        "update": lambda n: ("PUT", f"/api/blog-posts/{created[n % len(created)]}", {"summary": f"Updated {n}"}),
+        "delete": lambda n: ("DELETE", f"/api/blog-posts/{created[n % len(created)]}", None),
+    }
+
+async def run(args: argparse.Namespace) -> dict:
+    fake = None
+    github_transport = None
+    if args.github_url is None:
+        fake = fake_gist_from_args(args)
+        github_transport = httpx.ASGITransport(app=create_fake_gist_app(fake))
+
+    from app import create_app
+
+    app = create_app(github_transport=github_transport)
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, dict] = {}
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+            login = await client.post("/api/auth/login", json={"password": ADMIN_PASSWORD})
+            login.raise_for_status()
+            admin = {"Authorization": f"Bearer {login.json()['token']}"}
+
+            # Warm up: the first read loads the gist and builds the indexes
+            listing = await client.get("/api/blog-posts/")
+            listing.raise_for_status()
+            post_ids = list(listing.json())
+            created: List[str] = []
+            factories = request_factories(post_ids, created, args.seed)
+            for name in args.workload or WORKLOADS:
+                if name in ("update", "delete") and not created:
+                    print(f"Skipping {name}: no posts were created", file=sys.stderr)
+                    continue
+                headers = admin if name in ("create", "update", "delete") else {}
+                if name in READ_WORKLOADS:
+                    # Untimed pass so every workload starts with warm caches
+                    await run_workload(client, factories[name], args.requests // 10, args.concurrency, headers)
+                on_response = (lambda res: created.append(res.json()["id"])) if name == "create" else None
+                results[name] = await run_workload(
+                    client, factories[name], args.requests, args.concurrency, headers, on_response)
+                print(f"{name:>8}: {json.dumps(results[name])}", file=sys.stderr)
+
+    return {
+        "meta": {
+            "timestamp": round(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "posts": args.posts,
+            "content_bytes": args.content_bytes,
+            "latency_ms": args.latency_ms,
+            "failure_rate": args.failure_rate,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "workloads": results,
+        "upstream": fake.stats() if fake is not None else None,
+    }
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> List[str]:
+    """
+    Human-readable regressions of ``results`` against ``baseline``. A p95
+    increase also has to exceed ``min_delta_ms``, so sub-millisecond jitter
+    on fast routes is not reported.
+    """
+    regressions = []
+    for name, current in results["workloads"].items():
+        before = baseline.get("workloads", {}).get(name)
+        if before is None:
+            continue
+        if current["requests_per_second"] < before["requests_per_second"] * (1 - tolerance):
+            regressions.append(f"{name}: {current['requests_per_second']} req/s, baseline {before['requests_per_second']}")
+        p95, baseline_p95 = current["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        if p95 > baseline_p95 * (1 + tolerance) and p95 - baseline_p95 > min_delta_ms:
+            regressions.append(f"{name}: p95 {p95} ms, baseline {baseline_p95}")
+    return regressions
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_fake_gist_arguments(parser)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per workload")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--workload", choices=WORKLOADS, action="append", help="Run only this workload (repeatable)")
+    parser.add_argument("--github-url", help="Use a fake gist server already running at this URL")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="Smallest p95 increase reported as a regression")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="blog-load-test-") as data_dir:
+        configure_environment(data_dir, args.github_url or "http://fake-github")
+        results = asyncio.run(run(args))
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,30 @@
+"""
+Importing anything under ``app`` builds the app from the current settings,
+so point every data file at a throwaway directory before the first import.
+"""
+import os
+import sys
+import tempfile
+
+DATA_DIR = tempfile.mkdtemp(prefix="blog-tests-")
+
+os.environ.update({
+    "ENV": "test",
+    "BLOG_BACKEND": "gist",
+    "GIST_ID": "test-gist",
+    "GIST_IDS": "",
+    "GITHUB_TOKEN": "test-token",
+    "GITHUB_API_URL": "http://github.test",
+    "ADMIN_PASSWORD": "test-password",
+    "SECRET_KEY": "test-secret",
+    "POLL_ENABLED": "false",
+    "RATE_LIMIT_BACKEND": "memory",
+    "WRITE_AHEAD_LOG_PATH": os.path.join(DATA_DIR, "gist_wal.jsonl"),
+    "SNAPSHOT_PATH": os.path.join(DATA_DIR, "gist_snapshot.jsonl"),
+    "SEARCH_INDEX_PATH": os.path.join(DATA_DIR, "search_index.json.gz"),
+    "MEDIA_ROOT": os.path.join(DATA_DIR, "media"),
+    "RATE_LIMIT_DB_PATH": os.path.join(DATA_DIR, "rate_limits.db"),
+    "DATABASE_URL": "sqlite+aiosqlite:///" + os.path.join(DATA_DIR, "blog.db"),
+})
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,35 @@
+import asyncio
+import json
+
+import httpx
+
+from app import create_app
+from app.api.routes import blog
+from app.services.blog.gist_layout import INDEX_FILENAME, encode_index
+
+def test_lifespan_shares_one_github_client_and_closes_it(monkeypatch):
+    async def run():
+        clients, requests = [], []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request.url.path)
+            files = {INDEX_FILENAME: {"content": encode_index({})}}
+            return httpx.Response(200, json={"id": "test-gist", "files": files})
+
+        monkeypatch.setattr(blog.blog_service, "_client", None)
+        app = create_app(github_transport=httpx.MockTransport(handler))
+        async with app.router.lifespan_context(app):
+            client = app.state.http_client
+            assert blog.blog_service.client is client
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as http:
+                for _ in range(2):
+                    res = await http.get("/api/blog-posts/")
+                    assert res.status_code == 200 and json.loads(res.content) == {}
+                    clients.append(blog.blog_service.client)
+            assert not client.is_closed
+        assert clients == [client, client]
+        # The gist was fetched through the pooled client's transport
+        assert requests and set(requests) == {"/gists/test-gist"}
+        assert client.is_closed
+
+    asyncio.run(run())
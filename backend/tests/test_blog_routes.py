@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes import blog, tags
+from app.core.response_cache import ResponseCache
+from app.db.models import Base
+from app.schemas.blog_schema import BlogCreate
+from app.services.blog.interfaces import SUMMARY_FIELDS
+from app.services.blog.sqlite_service import SQLiteBlogService
+from app.services.blog.views import ViewCounter
+
+async def make_client(tmp_path, monkeypatch) -> httpx.AsyncClient:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'blog.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    service = SQLiteBlogService(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    await service.startup()
+    monkeypatch.setattr(blog, "blog_service", service)
+    monkeypatch.setattr(tags, "blog_service", service)
+    monkeypatch.setattr(blog, "response_cache", ResponseCache())
+    app = FastAPI()
+    app.include_router(blog.router, prefix="/api/blog-posts")
+    app.include_router(tags.router, prefix="/api")
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+def test_listing_carries_the_change_version(tmp_path, monkeypatch):
+    async def run():
+        async with await make_client(tmp_path, monkeypatch) as client:
+            await blog.blog_service.create_blog(BlogCreate(title="First", content="x"))
+            listing = await client.get("/api/blog-posts/")
+            version = int(listing.headers[blog.CHANGES_VERSION_HEADER])
+            assert version == blog.blog_service.changes.version
+
+            revalidated = await client.get("/api/blog-posts/", headers={"If-None-Match": listing.headers["etag"]})
+            assert revalidated.status_code == 304
+            assert revalidated.headers[blog.CHANGES_VERSION_HEADER] == str(version)
+
+            # Changes made after the listing are replayed from its version
+            await blog.blog_service.create_blog(BlogCreate(title="Second", content="y"))
+            assert [v for v, _ in blog.blog_service.changes.since(version)] == [version + 1]
+
+    asyncio.run(run())
+
+def test_only_full_reads_count_as_views(tmp_path, monkeypatch):
+    async def run():
+        monkeypatch.setattr(blog, "view_counter", ViewCounter())
+        async with await make_client(tmp_path, monkeypatch) as client:
+            created = await blog.blog_service.create_blog(BlogCreate(title="Counted", content="x"))
+            post_id = str(created.id)
+
+            first = await client.get(f"/api/blog-posts/{post_id}")
+            assert first.status_code == 200
+            cached = await client.get(f"/api/blog-posts/{post_id}")
+            assert cached.status_code == 200
+            revalidated = await client.get(f"/api/blog-posts/{post_id}", headers={"If-None-Match": first.headers["etag"]})
+            assert revalidated.status_code == 304
+            refetched = await client.get(f"/api/blog-posts/{post_id}?count=false")
+            assert refetched.status_code == 200
+            by_slug = await client.get("/api/blog-posts/by-slug/counted?count=false")
+            assert by_slug.status_code == 200
+            assert (await client.get("/api/blog-posts/by-slug/counted")).status_code == 200
+
+            assert blog.view_counter.views(post_id) == 3
+
+    asyncio.run(run())
+
+def test_pages_project_the_requested_fields(tmp_path, monkeypatch):
+    async def run():
+        async with await make_client(tmp_path, monkeypatch) as client:
+            for title in ("First", "Second", "Third"):
+                await blog.blog_service.create_blog(BlogCreate(title=title, content=f"{title} body", tags=["t"]))
+
+            first = (await client.get("/api/blog-posts/page?limit=2")).json()
+            assert [item["title"] for item in first["items"]] == ["Third", "Second"]
+            assert set(first["items"][0]) == set(SUMMARY_FIELDS)
+            assert first["total"] == 3
+            second = (await client.get(f"/api/blog-posts/page?limit=2&cursor={first['next_cursor']}")).json()
+            assert [item["title"] for item in second["items"]] == ["First"]
+            assert second["next_cursor"] is None
+
+            projected = (await client.get("/api/blog-posts/page?fields=id,content")).json()
+            assert projected["items"][0] == {"id": projected["items"][0]["id"], "content": "Third body"}
+
+            assert (await client.get("/api/blog-posts/page?fields=id,secret")).status_code == 400
+            assert (await client.get("/api/blog-posts/page?cursor=not-a-cursor")).status_code == 400
+
+    asyncio.run(run())
+
+def test_tag_listings_are_cached_per_match_mode(tmp_path, monkeypatch):
+    async def run():
+        async with await make_client(tmp_path, monkeypatch) as client:
+            for title, tags in (("Both", ["python", "async"]), ("Python", ["python"]), ("Rust", ["rust"])):
+                await blog.blog_service.create_blog(BlogCreate(title=title, content="x", tags=tags))
+
+            async def titles(query: str) -> list:
+                return sorted(post["title"] for post in (await client.get(f"/api/blog-posts/?{query}")).json().values())
+
+            assert await titles("tag=python&tag=async") == ["Both"]
+            assert await titles("tag=python&tag=async&match=any") == ["Both", "Python"]
+            assert await titles("tag=python&tag=async") == ["Both"]
+
+            facets = (await client.get("/api/tags")).json()
+            assert facets[0] == {"tag": "python", "count": 2}
+            await blog.blog_service.create_blog(BlogCreate(title="More Rust", content="x", tags=["rust"]))
+            assert {"tag": "rust", "count": 2} in (await client.get("/api/tags")).json()
+
+    asyncio.run(run())
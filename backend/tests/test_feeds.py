@@ -0,0 +1,79 @@
+import asyncio
+import xml.etree.ElementTree as ET
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.routes import feeds
+from app.core.config import settings
+from app.core.response_cache import ResponseCache
+from app.db.models import Base
+from app.schemas.blog_schema import BlogCreate
+from app.services.blog import interfaces
+from app.services.blog.sqlite_service import SQLiteBlogService
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+SITEMAP = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+async def make_client(tmp_path, monkeypatch) -> httpx.AsyncClient:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'blog.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    service = SQLiteBlogService(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    await service.startup()
+    monkeypatch.setattr(feeds, "blog_service", service)
+    monkeypatch.setattr(feeds, "response_cache", ResponseCache())
+    app = FastAPI()
+    app.include_router(feeds.router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+def test_feeds_are_well_formed_xml(tmp_path, monkeypatch):
+    async def run():
+        async with await make_client(tmp_path, monkeypatch) as client:
+            service = feeds.blog_service
+            # Markup and characters XML does not allow, even escaped
+            await service.create_blog(BlogCreate(title="Tom & <Jerry>", content="x", summary="a\x01b", tags=["c&d"]))
+            await service.create_blog(BlogCreate(title="Second", content="y"))
+
+            rss = await client.get("/feed.xml")
+            assert rss.headers["content-type"] == "application/rss+xml; charset=utf-8"
+            channel = ET.fromstring(rss.content).find("channel")
+            items = channel.findall("item")
+            assert [item.findtext("title") for item in items] == ["Second", "Tom & <Jerry>"]
+            assert items[1].findtext("description") == "ab"
+            assert items[1].findtext("category") == "c&d"
+            assert items[1].findtext("link") == f"{settings.FRONTEND_URL}/posts/tom-jerry"
+
+            atom = ET.fromstring((await client.get("/atom.xml")).content)
+            entries = atom.findall(f"{ATOM}entry")
+            assert [entry.findtext(f"{ATOM}title") for entry in entries] == ["Second", "Tom & <Jerry>"]
+            assert entries[1].find(f"{ATOM}category").get("term") == "c&d"
+            assert atom.findtext(f"{ATOM}updated").endswith("Z")
+
+            sitemap = await client.get("/sitemap.xml")
+            urls = ET.fromstring(sitemap.content).findall(f"{SITEMAP}url")
+            assert len(urls) == 2
+
+            # Later requests get the cached copy of the streamed document
+            cached = await client.get("/sitemap.xml", headers={"Accept-Encoding": "identity"})
+            assert cached.content == sitemap.content
+            assert cached.headers["etag"] == sitemap.headers["etag"]
+
+    asyncio.run(run())
+
+def test_sitemap_is_capped_and_feeds_hold_the_latest_posts(tmp_path, monkeypatch):
+    async def run():
+        monkeypatch.setattr(interfaces, "SITEMAP_MAX_URLS", 3)
+        monkeypatch.setattr(settings, "FEED_MAX_ITEMS", 2)
+        async with await make_client(tmp_path, monkeypatch) as client:
+            for i in range(5):
+                await feeds.blog_service.create_blog(BlogCreate(title=f"Post {i}", content="x"))
+
+            urls = ET.fromstring((await client.get("/sitemap.xml")).content).findall(f"{SITEMAP}url")
+            assert [url.findtext(f"{SITEMAP}loc").rsplit("/", 1)[-1] for url in urls] == ["post-4", "post-3", "post-2"]
+            items = ET.fromstring((await client.get("/feed.xml")).content).find("channel").findall("item")
+            assert [item.findtext("title") for item in items] == ["Post 4", "Post 3"]
+
+    asyncio.run(run())
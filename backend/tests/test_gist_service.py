@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+from app.schemas.blog_schema import BlogCreate, BlogUpdate
+from app.services.blog.gist_layout import INDEX_FILENAME, LEGACY_FILENAME, post_filename
+from test_writer import FakeGistAPI, make_service, until
+
+def legacy_post(post_id: str, title: str) -> dict:
+    return {"id": post_id, "title": title, "content": f"{title} body", "summary": None, "tags": [], "media": [],
+            "date": f"2024-01-0{post_id}T00:00:00", "slug": title.lower(), "previous_slugs": []}
+
+def test_legacy_gist_is_migrated_to_per_post_files(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        api.files = {LEGACY_FILENAME: json.dumps({"1": legacy_post("1", "One"), "2": legacy_post("2", "Two")})}
+        service = make_service(api, tmp_path)
+        await service.startup()
+        # Served from the legacy file right away, migrated in the background
+        assert sorted(post["title"] for post in (await service.get_post_map()).values()) == ["One", "Two"]
+        await until(lambda: LEGACY_FILENAME not in api.files)
+
+        migration = api.patches[-1]
+        assert set(migration) == {post_filename("1"), post_filename("2"), INDEX_FILENAME, LEGACY_FILENAME}
+        assert migration[LEGACY_FILENAME] is None
+        assert json.loads(api.files[post_filename("2")]) == legacy_post("2", "Two")
+        assert set(json.loads(api.files[INDEX_FILENAME])) == {"1", "2"}
+        await service.shutdown()
+
+        # A fresh process reads the per-post layout and does not migrate again
+        restarted = make_service(api, tmp_path / "restarted")
+        await restarted.startup()
+        assert sorted(post["title"] for post in (await restarted.get_post_map()).values()) == ["One", "Two"]
+        await restarted.shutdown()
+        assert len(api.patches) == 1
+
+    asyncio.run(run())
+
+def test_writes_patch_only_the_touched_post_and_the_index(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        service = make_service(api, tmp_path)
+        await service.startup()
+        for title in ("One", "Two", "Three"):
+            await service.create_blog(BlogCreate(title=title, content="x"))
+            await until(lambda: not service.writer.pending)
+        ids = sorted(json.loads(api.files[INDEX_FILENAME]), key=int)
+
+        await service.update_blog(int(ids[1]), BlogUpdate(content="edited"))
+        await until(lambda: not service.writer.pending)
+        assert set(api.patches[-1]) == {post_filename(ids[1]), INDEX_FILENAME}
+        assert json.loads(api.patches[-1][post_filename(ids[1])]["content"])["content"] == "edited"
+
+        await service.delete_blog(int(ids[0]))
+        await until(lambda: not service.writer.pending)
+        await service.shutdown()
+        assert api.patches[-1] == {
+            post_filename(ids[0]): None,
+            INDEX_FILENAME: {"content": api.files[INDEX_FILENAME]},
+        }
+        assert set(json.loads(api.files[INDEX_FILENAME])) == set(ids[1:])
+        assert post_filename(ids[0]) not in api.files
+
+    asyncio.run(run())
+
+def test_restart_serves_the_snapshot_while_github_is_down(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        service = make_service(api, tmp_path)
+        await service.startup()
+        created = await service.create_blog(BlogCreate(title="Kept", content="x"))
+        await until(lambda: not service.writer.pending)
+        await service.shutdown()
+        assert (tmp_path / "snapshot.jsonl").exists()
+
+        api.outage = 503
+        restarted = make_service(api, tmp_path)
+        restarted.load_indexes()
+        await restarted.startup()
+        # Indexes are warm before the first request reaches GitHub
+        assert restarted.summaries.summaries[created.id]["title"] == "Kept"
+        assert [blog.title for blog in await restarted.list_blogs()] == ["Kept"]
+        # The read scheduled a revalidation, which failed
+        await restarted._refresh_task
+        assert restarted.last_error is not None
+        health = restarted.health()
+        assert (health["degraded"], health["stale"], health["source"]) == (True, True, "snapshot")
+        assert (await restarted.get_post(created.id))["title"] == "Kept"
+
+        # Once GitHub answers again the snapshot is replaced by upstream data
+        api.outage = None
+        api.files[INDEX_FILENAME] = json.dumps({})
+        await restarted.list_blogs()
+        await until(lambda: not restarted.cache.from_snapshot)
+        await restarted.shutdown()
+        assert restarted.health()["degraded"] is False
+        assert await restarted.list_blogs() == []
+
+    asyncio.run(run())
+
+def test_expired_cache_is_served_while_github_is_down(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        service = make_service(api, tmp_path)
+        await service.startup()
+        await service.create_blog(BlogCreate(title="Cached", content="x"))
+        await until(lambda: not service.writer.pending)
+
+        api.outage = 502
+        # Past both the TTL and the stale window, so the read waits on GitHub
+        service.cache.fetched_at = 0.0
+        assert not service.cache.is_servable_stale()
+        assert [blog.title for blog in await service.list_blogs()] == ["Cached"]
+        assert service.health()["degraded"] is True
+        assert service.cache.stale_hits == 1
+
+        api.outage = None
+        await service.list_blogs()
+        await service.shutdown()
+        assert service.cache.is_fresh()
+        assert service.health()["degraded"] is False
+
+    asyncio.run(run())
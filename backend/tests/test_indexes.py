@@ -0,0 +1,73 @@
+from app.services.blog.indexes import SummaryIndex, TagIndex, decode_cursor, encode_cursor
+
+def dated(post_id: int, date: str, **fields) -> dict:
+    return {"id": str(post_id), "title": f"Post {post_id}", "summary": None, "tags": [], "date": date,
+            "slug": f"post-{post_id}", "previous_slugs": [], **fields}
+
+# Two posts share a timestamp, so the id breaks the tie
+POSTS = {
+    str(i): dated(i, date) for i, date in enumerate([
+        "2024-01-01T09:00:00", "2024-01-02T09:00:00", "2024-01-02T09:00:00",
+        "2024-01-03T12:30:00", "2024-02-01T00:00:00", "2024-03-15T08:00:00",
+    ], start=1)
+}
+
+def all_pages(index: SummaryIndex, limit: int, **kwargs) -> list:
+    ids, cursor, total = index.page(limit, **kwargs)
+    pages = [ids]
+    while cursor is not None:
+        ids, cursor, page_total = index.page(limit, cursor=cursor, **kwargs)
+        assert page_total == total
+        pages.append(ids)
+    return pages
+
+def test_cursor_pages_cover_every_post_once_in_both_directions():
+    index = SummaryIndex()
+    index.apply(POSTS, [])
+    assert all_pages(index, 2) == [["6", "5"], ["4", "3"], ["2", "1"]]
+    assert all_pages(index, 4, descending=False) == [["1", "2", "3", "4"], ["5", "6"]]
+    assert decode_cursor(encode_cursor(("2024-01-02T09:00:00", 3))) == ("2024-01-02T09:00:00", 3)
+
+    # A post added before the cursor position does not shift later pages
+    ids, cursor, _ = index.page(2)
+    index.apply({"7": dated(7, "2024-04-01T00:00:00")}, ["5"])
+    assert index.page(2, cursor=cursor)[0] == ["4", "3"]
+
+def test_since_and_until_bound_the_page_and_its_total():
+    index = SummaryIndex()
+    index.apply(POSTS, [])
+    ids, cursor, total = index.page(10, since="2024-01-02T09:00:00", until="2024-02-01T00:00:00")
+    assert (ids, cursor, total) == (["5", "4", "3", "2"], None, 4)
+    # A bare date as the upper bound includes the whole day
+    assert index.page(10, until="2024-01-03")[0] == ["4", "3", "2", "1"]
+    assert index.page(10, since="2024-03-16") == ([], None, 0)
+    assert all_pages(index, 1, since="2024-01-02", until="2024-01-02T23:59:59", descending=False) == [["2"], ["3"]]
+
+def test_tag_matches_require_all_or_any_tags():
+    index = TagIndex()
+    index.apply({
+        "1": dated(1, "2024-01-01", tags=["python", "async"]),
+        "2": dated(2, "2024-01-02", tags=["python"]),
+        "3": dated(3, "2024-01-03", tags=["rust", "async"]),
+    }, [])
+    assert index.match(["python", "async"]) == {"1"}
+    assert index.match(["python", "async"], match_all=False) == {"1", "2", "3"}
+    assert index.match(["python", "python"]) == {"1", "2"}
+    assert index.match(["python", "go"]) == set()
+    assert index.match(["python", "go"], match_all=False) == {"1", "2"}
+    assert index.match([]) == set()
+
+def test_tag_facets_are_cached_until_the_tags_change():
+    index = TagIndex()
+    index.apply({"1": dated(1, "2024-01-01", tags=["b", "a"]), "2": dated(2, "2024-01-02", tags=["b"])}, [])
+    facets = index.facets()
+    assert facets == [("b", 2), ("a", 1)]
+
+    # Edits that leave the tags alone keep the cached facets
+    index.apply({"1": dated(1, "2024-01-01", tags=["b", "a"], title="Renamed")}, [])
+    assert index.facets() is facets
+
+    index.apply({"2": dated(2, "2024-01-02", tags=["a", "c"])}, [])
+    assert index.facets() == [("a", 2), ("b", 1), ("c", 1)]
+    index.apply({}, ["1"])
+    assert index.facets() == [("a", 1), ("c", 1)]
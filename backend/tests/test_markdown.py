@@ -0,0 +1,45 @@
+import pickle
+
+from app.services.blog.markdown import render_markdown
+
+def html(content: str) -> str:
+    return render_markdown(content)["html"]
+
+def test_code_spans_inside_link_labels():
+    assert html("see [the `foo()` docs](https://x.y)") == (
+        '<p>see <a href="https://x.y" rel="nofollow noopener">the <code>foo()</code> docs</a></p>'
+    )
+
+def test_escapes_inside_links():
+    assert html(r"[a\*b](/docs) and [\[x\]](/y)") == '<p><a href="/docs">a*b</a> and <a href="/y">[x]</a></p>'
+
+def test_nul_sequences_are_plain_text():
+    # Once the renderer's own placeholders; must not index into anything or loop
+    rendered = html("x \x000\x00 `\x001\x00` [\x002\x00](/a)")
+    assert "\x00" not in rendered
+    assert "<code>" in rendered and '<a href="/a">' in rendered
+
+def test_raw_html_and_unsafe_urls_are_neutralised():
+    assert html('<script>alert(1)</script>\n\n[x](javascript:alert(1)) <img src=x onerror=alert(1)>') == (
+        "<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>\n"
+        "<p>[x](javascript:alert(1)) &lt;img src=x onerror=alert(1)&gt;</p>"
+    )
+    assert html("[x](vbscript:y) ![i](data:text/html,x)") == "<p>[x](vbscript:y) ![i](data:text/html,x)</p>"
+
+def test_headings_get_unique_ids_and_a_toc():
+    rendered = render_markdown("# Hello *World*\n\n## Hello World\n\ntext")
+    assert rendered["html"].startswith('<h1 id="hello-world">Hello <em>World</em></h1>\n<h2 id="hello-world-1">')
+    assert rendered["toc"] == [
+        {"level": 1, "id": "hello-world", "title": "Hello World"},
+        {"level": 2, "id": "hello-world-1", "title": "Hello World"},
+    ]
+
+def test_tables_code_and_images():
+    rendered = html("| a | b |\n|:-|-:|\n| `x\\|y` | 2 |\n\n```py\n<b>\n```\n\n![alt](/a.png \"T\")")
+    assert '<th style="text-align:left">a</th>' in rendered
+    assert "<td style=\"text-align:left\"><code>x|y</code></td>" in rendered
+    assert '<pre><code class="language-py">&lt;b&gt;\n</code></pre>' in rendered
+    assert '<img src="/a.png" alt="alt" title="T" loading="lazy">' in rendered
+
+def test_render_is_picklable_for_the_process_pool():
+    assert pickle.loads(pickle.dumps(render_markdown))("*a*")["html"] == "<p><em>a</em></p>"
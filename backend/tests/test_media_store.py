@@ -0,0 +1,96 @@
+import asyncio
+import io
+import os
+import struct
+import threading
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.api.routes import media
+from app.core.dependencies import get_current_admin
+from app.services.media.store import MediaStore, sniff_content_type
+
+def ftyp(major: bytes, *compatible: bytes) -> bytes:
+    brands = major + b"\0\0\0\0" + b"".join(compatible)
+    return (struct.pack(">I", 8 + len(brands)) + b"ftyp" + brands).ljust(32, b"\0")
+
+def test_ftyp_files_are_typed_by_brand():
+    assert sniff_content_type(ftyp(b"isom", b"isom", b"avc1")) == "video/mp4"
+    assert sniff_content_type(ftyp(b"avif", b"mif1")) == "image/avif"
+    assert sniff_content_type(ftyp(b"mif1", b"mif1", b"avif")) == "image/avif"
+    assert sniff_content_type(ftyp(b"heic", b"mif1")) == "image/heic"
+    assert sniff_content_type(ftyp(b"mif1", b"heic")) == "image/heic"
+    assert sniff_content_type(ftyp(b"mif1")) == "image/heif"
+    # Audio, QuickTime and camera raw files are not accepted as video
+    for brand in (b"M4A ", b"qt  ", b"crx "):
+        assert sniff_content_type(ftyp(brand)) is None
+
+def png(size=(256, 256)) -> bytes:
+    Image = pytest.importorskip("PIL.Image")
+    source = io.BytesIO()
+    Image.effect_noise(size, 64).convert("RGB").save(source, format="PNG")
+    return source.getvalue()
+
+def test_eviction_stays_on_the_event_loop(tmp_path):
+    image = png()
+
+    async def run():
+        store = MediaStore(str(tmp_path), max_upload_bytes=1 << 20, variant_cache_bytes=1, variant_widths=[])
+        store.load()
+        upload = store.begin_upload()
+        await upload.write(image)
+        info, _ = await upload.commit()
+
+        loop_thread = threading.get_ident()
+        evict = store._evict
+        evicting_threads = []
+
+        def recording_evict(*args):
+            evicting_threads.append(threading.get_ident())
+            return evict(*args)
+
+        store._evict = recording_evict
+        widths = [16, 32, 48, 64, 16, 32, 48, 64, 80, 96]
+        await asyncio.gather(*(store.variant(info["hash"], "image/png", width) for width in widths))
+        await store.variant(info["hash"], "image/png", 16)
+
+        assert evicting_threads and set(evicting_threads) == {loop_thread}
+        # Only the newest variant fits the budget, and the disk agrees with the LRU
+        on_disk = {entry.path for entry in os.scandir(store.variants_dir)}
+        assert on_disk == set(store._variants) and len(on_disk) == 1
+        assert store._variant_bytes == sum(store._variants.values())
+        assert not store._unlinking
+
+    asyncio.run(run())
+
+def test_corrupt_and_truncated_images_are_refused(tmp_path, monkeypatch):
+    image = png((64, 64))
+
+    async def run():
+        store = MediaStore(str(tmp_path), max_upload_bytes=1 << 20, variant_cache_bytes=1 << 20, variant_widths=[32])
+        store.load()
+        monkeypatch.setattr(media, "media_store", store)
+        app = FastAPI()
+        app.include_router(media.router)
+        app.dependency_overrides[get_current_admin] = lambda: "admin"
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            truncated = await client.post("/api/media", content=image[:len(image) // 2])
+            corrupt = await client.post("/api/media", content=image[:64] + bytes(len(image) - 64))
+            stored = await client.post("/api/media", content=image)
+            assert stored.status_code == 201
+            resized = await client.get(f"/media/{stored.json()['hash']}?w=32")
+            # A corrupt file stored before uploads were decoded is served as is
+            legacy = "0" * 64
+            os.makedirs(os.path.dirname(store.path(legacy)), exist_ok=True)
+            with open(store.path(legacy), "wb") as f:
+                f.write(image[:len(image) // 2])
+            legacy_resized = await client.get(f"/media/{legacy}?w=32")
+        assert truncated.status_code == 422
+        assert corrupt.status_code == 422
+        assert resized.status_code == 200
+        assert legacy_resized.status_code == 200 and legacy_resized.content == image[:len(image) // 2]
+        assert os.listdir(store.tmp_dir) == []
+
+    asyncio.run(run())
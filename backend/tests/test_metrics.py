@@ -0,0 +1,72 @@
+import asyncio
+import re
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.routes import metrics
+from app.core.metrics import HTTP_REQUESTS, Counter, Histogram, Registry, timed
+from app.core.middleware import MetricsMiddleware
+
+SAMPLE_RE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="[^"]*",?)*\})? -?[0-9.e+-]+$')
+
+def test_registry_renders_the_prometheus_text_format():
+    registry = Registry()
+    requests = registry.register(Counter("requests_total", "Requests", ("route",)))
+    latency = registry.register(Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0)))
+    registry.add_collector(lambda: [("queue_depth", "gauge", "Queued", [({"gist": "a"}, 3), ({"gist": "b"}, None)])])
+    requests.inc("/a")
+    requests.inc("/a", amount=2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+        "# HELP queue_depth Queued",
+        "# TYPE queue_depth gauge",
+        # Collectors leave out samples they have no value for
+        'queue_depth{gist="a"} 3',
+    ]
+
+def test_requests_are_counted_by_route_template_with_server_timing():
+    async def run():
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: int):
+            with timed("parse"):
+                await asyncio.sleep(0.005)
+            return {"id": item_id}
+
+        app.include_router(metrics.router)
+        app.add_middleware(MetricsMiddleware)
+        before = HTTP_REQUESTS.values.get(("GET", "/items/{item_id}", "200"), 0)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/items/1")
+            await client.get("/items/2")
+            await client.get("/nowhere")
+            scraped = await client.get("/metrics")
+
+        timing = dict(re.findall(r"(\w+);dur=([0-9.]+)", first.headers["server-timing"]))
+        assert set(timing) == {"parse", "total"}
+        assert 5 <= float(timing["parse"]) <= float(timing["total"])
+        assert HTTP_REQUESTS.values[("GET", "/items/{item_id}", "200")] == before + 2
+        assert ("GET", "unmatched", "404") in HTTP_REQUESTS.values
+
+        assert scraped.status_code == 200
+        assert scraped.headers["content-type"].startswith("text/plain; version=0.0.4")
+        lines = scraped.text.splitlines()
+        assert all(line.startswith("# ") or SAMPLE_RE.match(line) for line in lines), lines
+        assert any(line.startswith('blog_cache_misses_total{gist="test-gist"} ') for line in lines)
+        assert "# TYPE http_request_duration_seconds histogram" in lines
+
+    asyncio.run(run())
@@ -0,0 +1,55 @@
+import asyncio
+import time
+
+from app.services.blog.poller import UpstreamPoller
+
+def test_interval_backs_off_while_unchanged_and_resets_on_change():
+    async def run():
+        outcomes = iter([False, False, False, True, Exception("down"), False])
+        intervals = []
+
+        async def poll() -> bool:
+            intervals.append(poller.interval)
+            outcome = next(outcomes, None)
+            if outcome is None:
+                await asyncio.Event().wait()
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        poller = UpstreamPoller(poll, min_interval=0.001, max_interval=0.004)
+        poller.start()
+        await asyncio.wait_for(_until(lambda: len(intervals) == 7), 2)
+        await poller.stop()
+
+        # Doubles up to the maximum, back to the minimum after a change; failures back off too
+        assert intervals == [0.001, 0.002, 0.004, 0.004, 0.001, 0.002, 0.004]
+        stats = poller.stats()
+        assert (stats["polls"], stats["changes"], stats["failures"], stats["running"]) == (7, 1, 1, False)
+
+    asyncio.run(run())
+
+def test_deferral_holds_the_next_poll_back():
+    async def run():
+        polled = []
+
+        async def poll() -> bool:
+            polled.append(time.time())
+            return False
+
+        poller = UpstreamPoller(poll, min_interval=0.001, max_interval=0.001)
+        deferred_until = time.time() + 0.2
+        poller.defer_until(deferred_until)
+        # An earlier deadline does not shorten the deferral
+        poller.defer_until(time.time())
+        poller.start()
+        await asyncio.wait_for(_until(lambda: polled), 2)
+        await poller.stop()
+        assert polled[0] >= deferred_until
+        assert poller.stats()["deferrals"] == 1
+
+    asyncio.run(run())
+
+async def _until(condition):
+    while not condition():
+        await asyncio.sleep(0.001)
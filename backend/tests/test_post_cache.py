@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import httpx
+
+from app.services.blog.cache import PostCache
+from test_writer import FakeGistAPI, make_service, until
+
+class ETagGistAPI(FakeGistAPI):
+    """FakeGistAPI answering GETs that carry the current ETag with 304."""
+
+    def __init__(self):
+        super().__init__()
+        self.gets = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET":
+            return super().handler(request)
+        etag = f'"{hash(tuple(sorted(self.files.items())))}"'
+        self.gets.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        res = super().handler(request)
+        res.headers["ETag"] = etag
+        return res
+
+def test_freshness_windows():
+    changes = []
+    cache = PostCache(ttl=10, stale_ttl=20, on_change=lambda upserts, removed: changes.append((upserts, removed)))
+    assert not cache.is_fresh() and not cache.is_servable_stale()
+
+    cache.store({"1": {"id": "1"}}, etag='"a"')
+    assert cache.is_fresh()
+    cache.fetched_at = time.monotonic() - 15
+    assert not cache.is_fresh() and cache.is_servable_stale()
+    cache.fetched_at = time.monotonic() - 31
+    assert not cache.is_servable_stale()
+
+    # A 304 makes the same map fresh again without telling on_change
+    data = cache.data
+    cache.touch()
+    assert cache.is_fresh() and cache.data is data
+    assert changes == [({"1": {"id": "1"}}, [])]
+
+    # A restored snapshot is always servable, never fresh
+    cache.restore({"1": {"id": "1"}, "2": {"id": "2"}}, etag='"b"')
+    assert not cache.is_fresh() and cache.is_servable_stale()
+    assert changes[-1] == ({"2": {"id": "2"}}, [])
+
+def test_reads_are_fresh_then_stale_while_revalidating_then_not_modified(tmp_path):
+    async def run():
+        api = ETagGistAPI()
+        service = make_service(api, tmp_path)
+        service.cache.ttl = 0.05
+        service.cache.stale_ttl = 60
+
+        await service.list_blogs()
+        assert api.gets == [None]
+        await service.list_blogs()
+        assert service.cache.stats()["hits"] == 1
+        assert len(api.gets) == 1
+
+        await asyncio.sleep(0.06)
+        data, version = service.cache.data, service.changes.version
+        # Served at once, revalidated in the background with If-None-Match
+        assert await service.get_post_map() is data
+        assert service.cache.stale_hits == 1
+        await until(lambda: service.cache.not_modified == 1)
+        assert api.gets[-1] == service.cache.etag
+        assert service.cache.is_fresh()
+        assert service.cache.data is data
+        assert service.changes.version == version
+
+        # Past the stale window the read waits for the revalidation
+        service.cache.fetched_at = 0.0
+        assert await service.get_post_map() is data
+        assert (service.cache.misses, service.cache.not_modified, service.cache.revalidations) == (2, 2, 2)
+
+    asyncio.run(run())
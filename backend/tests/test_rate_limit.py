@@ -0,0 +1,97 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit_store import MemoryCounterStore, SQLiteCounterStore
+
+async def ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+def client_for(store, requests_per_minute: int = 600) -> httpx.AsyncClient:
+    app = RateLimitMiddleware(ok_app, requests_per_minute=requests_per_minute, store=store)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+def test_buckets_are_shared_through_sqlite(tmp_path):
+    async def run():
+        path = str(tmp_path / "limits.db")
+        async with client_for(SQLiteCounterStore(path), 2) as first, client_for(SQLiteCounterStore(path), 2) as second:
+            assert (await first.get("/")).status_code == 200
+            assert (await second.get("/")).status_code == 200
+            rejected = await first.get("/")
+        assert rejected.status_code == 429
+        assert int(rejected.headers["retry-after"]) >= 1
+
+    asyncio.run(run())
+
+def test_sqlite_hits_waiting_on_a_lock_do_not_stall_the_event_loop(tmp_path):
+    async def run():
+        path = str(tmp_path / "limits.db")
+        store = SQLiteCounterStore(path)
+        # Another worker holds the write lock for most of the busy timeout
+        other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        other.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.6, lambda: other.execute("COMMIT")).start()
+
+        ticks = []
+
+        async def ticker():
+            while len(ticks) < 10:
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.05)
+
+        ticking = asyncio.create_task(ticker())
+        await asyncio.sleep(0.1)
+        async with client_for(store) as client:
+            response = await client.get("/")
+        await ticking
+        assert response.status_code == 200
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.3
+
+    asyncio.run(run())
+
+def test_memory_store_stays_on_the_event_loop():
+    async def run():
+        threads = []
+
+        class RecordingStore(MemoryCounterStore):
+            def hit(self, *args):
+                threads.append(threading.get_ident())
+                return super().hit(*args)
+
+        async with client_for(RecordingStore()) as client:
+            assert (await client.get("/")).status_code == 200
+        assert threads == [threading.get_ident()]
+
+    asyncio.run(run())
+
+def test_memory_store_expires_while_hits_are_running():
+    async def run():
+        threads = []
+
+        class RecordingStore(MemoryCounterStore):
+            def expire(self, now):
+                threads.append(threading.get_ident())
+                return super().expire(now)
+
+        store = RecordingStore()
+        for n in range(200_000):
+            store._buckets[f"default|10.0.{n}"] = [1.0, 0.0, 1.0]
+        app = RateLimitMiddleware(ok_app, requests_per_minute=100_000, store=store, cleanup_interval=0.01)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            for _ in range(20):
+                responses = await asyncio.gather(*(client.get("/") for _ in range(20)))
+                assert all(response.status_code == 200 for response in responses)
+            deadline = time.perf_counter() + 5
+            while len(store) > 1 and time.perf_counter() < deadline:
+                await client.get("/")
+                await asyncio.sleep(0.01)
+        app._cleanup_task.cancel()
+        assert len(store) == 1
+        assert threads and set(threads) == {threading.get_ident()}
+
+    asyncio.run(run())
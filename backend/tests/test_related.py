@@ -0,0 +1,71 @@
+import asyncio
+import threading
+
+from app.services.blog.related import RelatedIndex
+
+def post(post_id: str, title: str, content: str, tags=()) -> dict:
+    return {"id": post_id, "title": title, "content": content, "summary": None, "tags": list(tags),
+            "date": "2024-01-01T00:00:00", "slug": post_id}
+
+CORPUS = {
+    "1": post("1", "Async Python", "asyncio event loop coroutines", ["python"]),
+    "2": post("2", "Python threads", "threads and the event loop", ["python"]),
+    "3": post("3", "Rust ownership", "borrow checker lifetimes", ["rust"]),
+    "4": post("4", "Rust async", "tokio runtime futures", ["rust"]),
+    "5": post("5", "Baking bread", "flour water salt yeast"),
+}
+
+def test_incremental_update_drops_removed_posts_and_inserts_changed_ones():
+    index = RelatedIndex(k=2, tag_weight=0.3)
+    index.apply(CORPUS, [])
+    index.refresh_now()
+    assert "5" not in dict(index.related("1", 2))
+    index.apply({"5": post("5", "Python bread", "asyncio flour event loop", ["python"])}, ["3"])
+    index.refresh_now()
+    assert (index.full_builds, index.incremental_updates) == (1, 1)
+
+    assert index.related("3", 2) == []
+    assert all("3" not in dict(index.related(post_id, 2)) for post_id in ("1", "2", "4", "5"))
+    # The edited post joins the lists it now beats
+    assert "5" in dict(index.related("1", 2))
+    assert "1" in dict(index.related("5", 2))
+
+def test_lookups_use_the_previous_table_while_a_refresh_runs():
+    async def run():
+        index = RelatedIndex(k=2)
+        index.apply(CORPUS, [])
+        # The first build is waited for
+        await index.refresh()
+        before = index.related("1", 2)
+        assert before[0][0] == "2"
+
+        score = index._score
+        started, release = threading.Event(), threading.Event()
+
+        def blocked(refresh):
+            started.set()
+            release.wait(5)
+            return score(refresh)
+        index._score = blocked
+
+        index.apply({}, ["2"])
+        await index.refresh()
+        await asyncio.to_thread(started.wait, 5)
+        # Scoring happens off the loop, which keeps answering from the old table
+        assert index.related("1", 2) == before
+        # Changes arriving meanwhile wait for the next refresh
+        index.apply({"6": post("6", "Event loops", "asyncio event loop internals", ["python"])}, [])
+        await index.refresh()
+        release.set()
+        while index._refreshing is not None:
+            await asyncio.sleep(0.01)
+        assert "2" not in dict(index.related("1", 2))
+        assert "6" not in dict(index.related("1", 2))
+
+        index._score = score
+        await index.refresh()
+        while index._refreshing is not None:
+            await asyncio.sleep(0.01)
+        assert index.related("1", 2)[0][0] == "6"
+
+    asyncio.run(run())
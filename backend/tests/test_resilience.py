@@ -0,0 +1,116 @@
+import asyncio
+import time
+from typing import List
+
+import httpx
+import pytest
+
+from app.core.exceptions import GistServiceException
+from app.services.blog.resilience import CLOSED, HALF_OPEN, OPEN, UpstreamGuard
+
+def make_guard(**overrides) -> UpstreamGuard:
+    options = dict(max_retries=2, backoff_base=0, backoff_max=1, failure_threshold=2, reset_timeout=0.05,
+                   rate_limit_reserve=10)
+    options.update(overrides)
+    return UpstreamGuard(**options)
+
+class Upstream:
+    """Answers calls with the given statuses in turn (200 once they run out) and counts them."""
+
+    def __init__(self, *statuses: int, headers: dict = None):
+        self.statuses: List[int] = list(statuses)
+        self.headers = headers or {}
+        self.calls = 0
+
+    async def __call__(self) -> httpx.Response:
+        self.calls += 1
+        status = self.statuses.pop(0) if self.statuses else 200
+        return httpx.Response(status, headers=self.headers)
+
+def test_transient_failures_are_retried_within_the_limit():
+    async def run():
+        guard = make_guard()
+        upstream = Upstream(503, 429)
+        assert (await guard.call(upstream)).status_code == 200
+        assert (upstream.calls, guard.retries, guard.failures) == (3, 2, 0)
+
+        upstream = Upstream(502, 502, 502)
+        with pytest.raises(GistServiceException, match="502"):
+            await guard.call(upstream)
+        assert (upstream.calls, guard.failures) == (3, 1)
+
+        # Other errors are the caller's to handle, without retries
+        upstream = Upstream(404)
+        assert (await guard.call(upstream)).status_code == 404
+        assert upstream.calls == 1
+
+        # A Retry-After longer than we would wait fails at once
+        upstream = Upstream(503, headers={"Retry-After": "30"})
+        with pytest.raises(GistServiceException):
+            await guard.call(upstream)
+        assert upstream.calls == 1
+
+    asyncio.run(run())
+
+def test_breaker_opens_then_lets_a_single_trial_through():
+    async def run():
+        guard = make_guard(max_retries=0)
+        for _ in range(2):
+            with pytest.raises(GistServiceException):
+                await guard.call(Upstream(500))
+        assert guard.breaker.state == OPEN
+
+        # Open: calls are rejected without reaching GitHub
+        upstream = Upstream()
+        with pytest.raises(GistServiceException, match="circuit open"):
+            await guard.call(upstream)
+        assert (upstream.calls, guard.rejected_open) == (0, 1)
+
+        # After the reset timeout one trial goes through; a failed trial re-opens at once
+        await asyncio.sleep(0.06)
+        with pytest.raises(GistServiceException):
+            await guard.call(Upstream(500))
+        assert guard.breaker.state == OPEN
+
+        await asyncio.sleep(0.06)
+        release = asyncio.Event()
+
+        async def slow() -> httpx.Response:
+            await release.wait()
+            return httpx.Response(200)
+        trial = asyncio.create_task(guard.call(slow))
+        await asyncio.sleep(0)
+        assert guard.breaker.state == HALF_OPEN
+        with pytest.raises(GistServiceException, match="circuit open"):
+            await guard.call(Upstream())
+        release.set()
+        assert (await trial).status_code == 200
+        assert guard.breaker.state == CLOSED
+        assert guard.breaker.transitions == {"closed_to_open": 1, "open_to_half_open": 2, "half_open_to_open": 1,
+                                             "half_open_to_closed": 1}
+
+    asyncio.run(run())
+
+def test_rate_limit_reserve_is_kept_for_writes():
+    async def run():
+        guard = make_guard()
+        reset = str(int(time.time()) + 60)
+        await guard.call(Upstream(headers={"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": reset}))
+
+        upstream = Upstream()
+        with pytest.raises(GistServiceException, match="budget"):
+            await guard.call(upstream)
+        assert (upstream.calls, guard.rejected_budget) == (0, 1)
+        assert (await guard.call(upstream, write=True)).status_code == 200
+
+        # The window has reset once its reset time has passed
+        guard.budget.reset_at = time.time() - 1
+        assert (await guard.call(upstream)).status_code == 200
+
+        # A Retry-After holds back reads and writes alike
+        guard.budget.blocked_until = time.time() + 60
+        with pytest.raises(GistServiceException):
+            await guard.call(upstream, write=True)
+        assert upstream.calls == 2
+
+    asyncio.run(run())
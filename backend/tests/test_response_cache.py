@@ -0,0 +1,29 @@
+import gzip
+
+from starlette.requests import Request
+
+from app.core.response_cache import MIN_COMPRESS_BYTES, CachedBody, check_not_modified
+
+def make_request(**headers) -> Request:
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+def test_small_bodies_keep_the_plain_etag():
+    response = CachedBody(b'{"a":1}').response("gzip", "abc")
+    assert response.headers["etag"] == '"abc"'
+    assert "content-encoding" not in response.headers
+    assert response.body == b'{"a":1}'
+
+def test_compressed_bodies_get_the_encoding_suffix():
+    plain = b"x" * MIN_COMPRESS_BYTES
+    response = CachedBody(plain).response("gzip", "abc")
+    assert response.headers["etag"] == '"abc-gz"'
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(response.body) == plain
+
+def test_either_etag_revalidates():
+    for held in ('"abc"', '"abc-gz"'):
+        response = check_not_modified(make_request(if_none_match=held), "abc", "gzip")
+        assert response is not None and response.status_code == 304
+    assert check_not_modified(make_request(if_none_match='"abc-br"'), "abc", "gzip") is None
+    assert check_not_modified(make_request(), "abc", None) is None
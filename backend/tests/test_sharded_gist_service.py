@@ -0,0 +1,137 @@
+import asyncio
+import json
+from typing import Dict
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.schemas.blog_schema import BlogCreate, BlogUpdate
+from app.services.blog.gist_layout import INDEX_FILENAME, encode_index, encode_post, post_filename
+from app.services.blog.sharded_gist_service import ShardedGistBlogService
+
+GIST_IDS = ["shard-a", "shard-b"]
+
+class FakeGists:
+    """Several in-memory gists behind one httpx.MockTransport, addressed by /gists/{id}."""
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, str]] = {gist_id: {INDEX_FILENAME: encode_index({})} for gist_id in GIST_IDS}
+        # Post files the API leaves out of the listing, as it does past 300 files
+        self.unlisted: Dict[str, set] = {gist_id: set() for gist_id in GIST_IDS}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host == "raw.test":
+            gist_id, filename = request.url.path.strip("/").split("/")
+            return httpx.Response(200, text=self.files[gist_id][filename])
+        gist_id = request.url.path.rsplit("/", 1)[-1]
+        files = self.files[gist_id]
+        if request.method == "GET":
+            listing = {
+                name: {"content": content} if name not in self.unlisted[gist_id]
+                else {"truncated": True, "content": None, "raw_url": f"http://raw.test/{gist_id}/{name}"}
+                for name, content in files.items()
+            }
+            return httpx.Response(200, json={"id": gist_id, "files": listing})
+        for name, file in json.loads(request.content)["files"].items():
+            if file is None:
+                files.pop(name, None)
+            else:
+                files[name] = file["content"]
+        return httpx.Response(200, json={"id": gist_id})
+
+@pytest.fixture
+def sharded(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "WRITE_AHEAD_LOG_PATH", str(tmp_path / "wal.jsonl"))
+    monkeypatch.setattr(settings, "SNAPSHOT_PATH", str(tmp_path / "snapshot.jsonl"))
+    monkeypatch.setattr(settings, "WRITE_COALESCE_SECONDS", 0.0)
+    gists = FakeGists()
+    service = ShardedGistBlogService(GIST_IDS, client=httpx.AsyncClient(transport=httpx.MockTransport(gists.handler)))
+    return gists, service
+
+async def posts_on_each_shard(service: ShardedGistBlogService, title: str):
+    """Create posts until there is one on each shard; returns their ids by gist."""
+    by_shard = {}
+    while len(by_shard) < len(GIST_IDS):
+        blog = await service.create_blog(BlogCreate(title=f"{title} {len(by_shard)}-{blog_count(service)}", content="x"))
+        by_shard.setdefault(service.home_shard(blog.id).gist_id, blog.id)
+    return by_shard
+
+def blog_count(service: ShardedGistBlogService) -> int:
+    return len(service.slugs.slugs_by_post)
+
+def test_concurrent_renames_on_different_shards_get_distinct_slugs(sharded):
+    async def run():
+        gists, service = sharded
+        await service.startup()
+        ids = list((await posts_on_each_shard(service, "Draft")).values())
+        slugs_before = {post_id: service.slugs.current_slug(post_id) for post_id in ids}
+
+        await asyncio.gather(*(service.update_blog(int(post_id), BlogUpdate(title="Same Title")) for post_id in ids))
+        await service.shutdown()
+
+        slugs = {post_id: service.slugs.current_slug(post_id) for post_id in ids}
+        assert sorted(slugs.values()) == ["same-title", "same-title-2"]
+        # Both redirects survive and point at their own post
+        for post_id in ids:
+            assert service.slugs.resolve(slugs_before[post_id]) == (post_id, False)
+
+    asyncio.run(run())
+
+def test_posts_are_listed_from_each_shards_index_file(sharded):
+    async def run():
+        gists, service = sharded
+        await service.startup()
+        by_shard = await posts_on_each_shard(service, "Listed")
+        created = sorted(service.slugs.slugs_by_post)
+        await service.shutdown()
+
+        # A fresh process whose gists leave the post files out of the listing
+        for gist_id, post_id in by_shard.items():
+            gists.unlisted[gist_id].add(post_filename(post_id))
+        restarted = ShardedGistBlogService(GIST_IDS, client=service.shards[GIST_IDS[0]].client)
+        for shard in restarted.shards.values():
+            shard.snapshot.path = shard.snapshot.path + ".unused"
+        blogs = await restarted.list_blogs()
+        assert sorted(blog.id for blog in blogs) == created
+        assert all(blog.content == "x" for blog in blogs)
+
+    asyncio.run(run())
+
+def seed(gists: FakeGists, gist_id: str, *posts: dict):
+    files = gists.files[gist_id]
+    for post in posts:
+        files[post_filename(post["id"])] = encode_post(post)
+    files[INDEX_FILENAME] = encode_index({post["id"]: post for post in posts})
+
+def test_rebalance_keeps_the_home_copy_of_a_duplicated_post(sharded):
+    async def run():
+        gists, service = sharded
+
+        def away_from(post_id: str) -> str:
+            return next(gist_id for gist_id in GIST_IDS if gist_id != service.home_shard(post_id).gist_id)
+
+        post = {"id": "1", "title": "Moved", "content": "stale", "summary": None, "tags": [], "media": [],
+                "date": "2024-01-01T00:00:00", "slug": "moved", "previous_slugs": []}
+        home, away = service.home_shard("1").gist_id, away_from("1")
+        # A move interrupted after writing the home copy, which was then edited
+        edited = {**post, "content": "edited", "date": "2024-02-01T00:00:00"}
+        # And a post that was never moved
+        stray = {**post, "id": "2", "title": "Stray", "slug": "stray"}
+        if away_from("2") == away:
+            seed(gists, away, post, stray)
+            seed(gists, home, edited)
+        else:
+            seed(gists, away, post)
+            seed(gists, home, edited, stray)
+        await service.startup()
+
+        assert await service.rebalance() == 1
+        await service.shutdown()
+        assert "1" not in json.loads(gists.files[away][INDEX_FILENAME])
+        assert json.loads(gists.files[home][post_filename("1")])["content"] == "edited"
+        assert (await service.get_post("1"))["content"] == "edited"
+        assert "2" in json.loads(gists.files[service.home_shard("2").gist_id][INDEX_FILENAME])
+        assert "2" not in json.loads(gists.files[away_from("2")][INDEX_FILENAME])
+
+    asyncio.run(run())
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+
+from app.core.exceptions import GistServiceException
+from app.services.blog.gist_layout import INDEX_FILENAME, encode_index, encode_post, post_filename
+from app.services.blog.gist_service import GistBlogService
+from app.services.blog.resilience import UpstreamGuard
+
+CALLERS = 200
+POSTS = {"1": {"id": "1", "title": "One", "content": "Body", "summary": None, "tags": [],
+               "media": [], "date": "2024-01-01T00:00:00", "slug": "one"}}
+
+def gist_payload(posts: dict) -> dict:
+    files = {post_filename(post_id): {"content": encode_post(post)} for post_id, post in posts.items()}
+    files[INDEX_FILENAME] = {"content": encode_index(posts)}
+    return {"id": "test-gist", "files": files}
+
+class CountingUpstream:
+    """Gist API stand-in that holds every request until released and counts them."""
+
+    def __init__(self):
+        self.calls = 0
+        self.status = 200
+        self.release = asyncio.Event()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        await self.release.wait()
+        if self.status != 200:
+            return httpx.Response(self.status, json={"message": "boom"})
+        return httpx.Response(200, json=gist_payload(POSTS), headers={"ETag": '"v1"'})
+
+def make_service(upstream: CountingUpstream, tmp_path) -> GistBlogService:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(upstream.handler))
+    guard = UpstreamGuard(max_retries=0, backoff_base=0, backoff_max=0, failure_threshold=100,
+                          reset_timeout=1, rate_limit_reserve=0)
+    return GistBlogService(client=client, gist_id="test-gist", wal_path=str(tmp_path / "wal.jsonl"),
+                           snapshot_path=str(tmp_path / "snapshot.jsonl"), guard=guard)
+
+async def concurrent_reads(service: GistBlogService, upstream: CountingUpstream):
+    reads = [asyncio.ensure_future(service.get_post_map()) for _ in range(CALLERS)]
+    # Let every caller reach the in-flight request before it completes
+    await asyncio.sleep(0.01)
+    upstream.release.set()
+    return await asyncio.gather(*reads, return_exceptions=True)
+
+def test_concurrent_callers_share_one_upstream_call(tmp_path):
+    async def run():
+        upstream = CountingUpstream()
+        service = make_service(upstream, tmp_path)
+        results = await concurrent_reads(service, upstream)
+
+        assert upstream.calls == 1
+        assert all(result is results[0] for result in results)
+        assert json.loads(encode_post(results[0]["1"])) == POSTS["1"]
+        stats = service.cache_stats()["single_flight"]
+        assert stats["upstream_calls"] == 1
+        assert stats["coalesced_calls"] == CALLERS - 1
+        assert stats["in_flight"] == 0
+
+    asyncio.run(run())
+
+def test_upstream_error_reaches_every_waiter_and_is_not_cached(tmp_path):
+    async def run():
+        upstream = CountingUpstream()
+        upstream.status = 500
+        service = make_service(upstream, tmp_path)
+        results = await concurrent_reads(service, upstream)
+
+        assert upstream.calls == 1
+        assert all(isinstance(result, GistServiceException) for result in results)
+        assert all(result is results[0] for result in results)
+
+        # The failure is not remembered: the next read goes upstream again and succeeds
+        upstream.status = 200
+        data = await service.get_post_map()
+        assert upstream.calls == 2
+        assert set(data) == {"1"}
+
+    asyncio.run(run())
+
+def test_cancelled_caller_does_not_cancel_shared_call(tmp_path):
+    async def run():
+        upstream = CountingUpstream()
+        service = make_service(upstream, tmp_path)
+        first = asyncio.ensure_future(service.get_post_map())
+        second = asyncio.ensure_future(service.get_post_map())
+        await asyncio.sleep(0.01)
+        first.cancel()
+        upstream.release.set()
+        assert set(await second) == {"1"}
+        assert first.cancelled()
+        assert upstream.calls == 1
+
+    asyncio.run(run())
@@ -0,0 +1,160 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import _upgrade_tables
+from app.db.models import Base
+from app.schemas.blog_schema import BlogCreate, BlogUpdate
+from app.services.blog.gist_layout import INDEX_FILENAME, encode_index, encode_post, post_filename
+from app.services.blog.gist_service import GistBlogService
+from app.services.blog.sqlite_service import SQLiteBlogService
+from app.tools import import_gist
+
+async def make_service(tmp_path) -> SQLiteBlogService:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'blog.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    service = SQLiteBlogService(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    await service.startup()
+    return service
+
+def test_tag_filters_query_the_post_tags_table(tmp_path):
+    async def run():
+        service = await make_service(tmp_path)
+        for title, tags in (("A", ["python", "async"]), ("B", ["python"]), ("C", ["rust"])):
+            await service.create_blog(BlogCreate(title=title, content="x", tags=tags))
+
+        def titles(blogs):
+            return sorted(blog.title for blog in blogs)
+
+        assert titles(await service.list_blogs_by_tags(["python"])) == ["A", "B"]
+        assert titles(await service.list_blogs_by_tags(["python", "async"])) == ["A"]
+        assert titles(await service.list_blogs_by_tags(["python", "async", "python"])) == ["A"]
+        assert titles(await service.list_blogs_by_tags(["async", "rust"], match_all=False)) == ["A", "C"]
+        assert await service.list_blogs_by_tags(["go"]) == []
+
+    asyncio.run(run())
+
+def test_import_keeps_slug_redirects(tmp_path, monkeypatch):
+    async def run():
+        posts = {"7": {"id": "7", "title": "New title", "content": "Body", "summary": None, "tags": ["a"],
+                       "media": [], "date": "2024-03-01T10:00:00", "slug": "new-title",
+                       "previous_slugs": ["old-title"]}}
+        files = {post_filename(post_id): {"content": encode_post(post)} for post_id, post in posts.items()}
+        files[INDEX_FILENAME] = {"content": encode_index(posts)}
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"id": "g", "files": files}))
+
+        sqlite_service = await make_service(tmp_path)
+        monkeypatch.setattr(import_gist, "GistBlogService", lambda: GistBlogService(
+            client=httpx.AsyncClient(transport=transport), wal_path=str(tmp_path / "wal.jsonl"),
+            snapshot_path=str(tmp_path / "snapshot.jsonl")))
+        monkeypatch.setattr(import_gist, "SQLiteBlogService", lambda: sqlite_service)
+
+        assert await import_gist.import_gist() == 1
+        post = await sqlite_service.get_post("7")
+        assert post["previous_slugs"] == ["old-title"]
+        assert sqlite_service.slugs.resolve("old-title") == ("7", False)
+
+        # The redirect survives the next edit too
+        await sqlite_service.update_blog(7, BlogUpdate(title="Newer title"))
+        assert sqlite_service.slugs.resolve("old-title")[0] == "7"
+
+    asyncio.run(run())
+
+def test_workers_pick_up_each_others_writes(tmp_path):
+    async def run():
+        worker_a = await make_service(tmp_path)
+        worker_b = await make_service(tmp_path)
+
+        created = await worker_a.create_blog(BlogCreate(title="Hello", content="First"))
+        post_id = str(created.id)
+        assert worker_b.versions.post_etag(post_id) is None
+        await worker_b.ensure_fresh()
+        etag = worker_b.versions.post_etag(post_id)
+        assert etag is not None
+        assert worker_b.slugs.resolve("hello") is not None
+
+        await worker_a.update_blog(created.id, BlogUpdate(content="Second"))
+        await worker_b.ensure_fresh()
+        assert worker_b.versions.post_etag(post_id) != etag
+        assert (await worker_b.get_post(post_id))["content"] == "Second"
+
+        # Slugs are allocated against the other worker's posts
+        twin = await worker_b.create_blog(BlogCreate(title="Hello", content="Twin"))
+        assert twin.slug == "hello-2"
+
+        await worker_a.delete_blog(created.id)
+        await worker_b.ensure_fresh()
+        assert worker_b.versions.post_etag(post_id) is None
+        # Its own writes do not make a worker reload them
+        revision = worker_b.revision
+        await worker_b.update_blog(twin.id, BlogUpdate(content="Again"))
+        assert worker_b.revision == revision + 1
+
+    asyncio.run(run())
+
+def test_one_heartbeat_refresh_picks_up_other_workers_posts(tmp_path):
+    async def run():
+        service = await make_service(tmp_path)
+        other = SQLiteBlogService(service.session_factory)
+        service.changes.heartbeat_seconds = 0.01
+        refreshes = 0
+        ensure_fresh = service.ensure_fresh
+
+        async def counted():
+            nonlocal refreshes
+            refreshes += 1
+            await ensure_fresh()
+        service.changes.refresh = counted
+
+        version = service.changes.version
+        await other.create_blog(BlogCreate(title="Elsewhere", content="x"))
+        # Several clients waiting share the refresh rather than each running one
+        await asyncio.wait_for(asyncio.gather(*(service.changes.wait() for _ in range(5))), 1)
+        while service.changes.version == version:
+            await asyncio.wait_for(service.changes.wait(), 1)
+
+        assert [blog.title for blog in await service.list_blogs()] == ["Elsewhere"]
+        assert refreshes <= 2
+
+    asyncio.run(run())
+
+def test_old_databases_get_new_columns_and_indexes(tmp_path):
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+        async with engine.begin() as conn:
+            # The posts table as it was before slugs and revisions
+            await conn.exec_driver_sql(
+                "CREATE TABLE posts (id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, content TEXT NOT NULL, "
+                "summary VARCHAR(500), tags JSON NOT NULL, media JSON NOT NULL, date DATETIME NOT NULL)"
+            )
+            await conn.exec_driver_sql(
+                "INSERT INTO posts VALUES (1, 'Old', 'x', NULL, '[]', '[]', '2024-01-01 00:00:00')")
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_upgrade_tables)
+            # Idempotent once the table is up to date
+            await conn.run_sync(_upgrade_tables)
+
+            ddl = (await conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'posts'")).scalar()
+            assert "revision INTEGER DEFAULT 0 NOT NULL" in ddl
+            assert "previous_slugs JSON DEFAULT '[]' NOT NULL" in ddl
+            indexes = {row[1]: row[2] for row in await conn.exec_driver_sql("PRAGMA index_list(posts)")}
+            assert indexes["ix_posts_slug"] == 1
+            assert {"ix_posts_date", "ix_posts_revision"} <= set(indexes)
+
+        service = SQLiteBlogService(sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+        await service.startup()
+        old = await service.get_post("1")
+        assert (old["previous_slugs"], old["title"]) == ([], "Old")
+        await service.create_blog(BlogCreate(title="New", content="y"))
+        assert sorted(blog.title for blog in await service.list_blogs()) == ["New", "Old"]
+        async with engine.begin() as conn:
+            with pytest.raises(IntegrityError):
+                await conn.exec_driver_sql("UPDATE posts SET slug = 'new' WHERE id = 1")
+        await engine.dispose()
+
+    asyncio.run(run())
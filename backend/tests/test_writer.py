@@ -0,0 +1,189 @@
+import asyncio
+import json
+import threading
+from typing import Callable, Dict, Optional
+
+import httpx
+
+from app.schemas.blog_schema import BlogCreate
+from app.services.blog.gist_layout import INDEX_FILENAME, encode_index
+from app.services.blog.gist_service import GistBlogService
+from app.services.blog.resilience import UpstreamGuard
+from app.services.blog.writer import GistWriter, RejectedWriteError, WriteAheadLog
+
+class FakeGistAPI:
+    """
+    In-memory gist behind an httpx.MockTransport. ``reject`` decides the
+    status of a PATCH from its files payload (None accepts it), and every
+    GET fails with ``outage`` while it is set.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, str] = {INDEX_FILENAME: encode_index({})}
+        self.patches = []
+        self.reject: Callable[[dict], Optional[int]] = lambda files: None
+        self.outage: Optional[int] = None
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            if self.outage is not None:
+                return httpx.Response(self.outage, json={"message": "Unavailable"})
+            files = {name: {"content": content} for name, content in self.files.items()}
+            return httpx.Response(200, json={"id": "test-gist", "files": files})
+        files = json.loads(request.content)["files"]
+        status = self.reject(files)
+        if status is not None:
+            return httpx.Response(status, json={"message": "Validation Failed"})
+        self.patches.append(files)
+        for name, file in files.items():
+            if file is None:
+                self.files.pop(name, None)
+            else:
+                self.files[name] = file["content"]
+        return httpx.Response(200, json={"id": "test-gist"})
+
+    def post_ids(self) -> set:
+        return set(json.loads(self.files[INDEX_FILENAME]))
+
+def make_service(api: FakeGistAPI, tmp_path) -> GistBlogService:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(api.handler))
+    guard = UpstreamGuard(max_retries=0, backoff_base=0, backoff_max=0, failure_threshold=100,
+                          reset_timeout=1, rate_limit_reserve=0)
+    service = GistBlogService(client=client, gist_id="test-gist", wal_path=str(tmp_path / "wal.jsonl"),
+                              snapshot_path=str(tmp_path / "snapshot.jsonl"), guard=guard)
+    service.writer.coalesce_window = 0
+    service.writer.retry_delay = 0.01
+    return service
+
+async def until(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+def post(title: str) -> BlogCreate:
+    return BlogCreate(title=title, content=f"{title} body", tags=[])
+
+def test_acknowledged_writes_are_replayed_after_restart(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        api.reject = lambda files: 503
+        service = make_service(api, tmp_path)
+        await service.startup()
+        created = await service.create_blog(post("Survives"))
+        await service.shutdown()
+        assert api.post_ids() == set()
+        assert service.writer.stats()["queue_depth"] == 1
+
+        # A new process replays the write-ahead log once GitHub is back
+        api.reject = lambda files: None
+        restarted = make_service(api, tmp_path)
+        await restarted.startup()
+        await until(lambda: not restarted.writer.pending)
+        await restarted.shutdown()
+        assert api.post_ids() == {created.id}
+        assert not (tmp_path / "wal.jsonl").exists()
+
+    asyncio.run(run())
+
+def test_transient_failures_are_retried(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        failures = iter([502, 429])
+        api.reject = lambda files: next(failures, None)
+        service = make_service(api, tmp_path)
+        await service.startup()
+        await service.create_blog(post("Eventually"))
+        await until(lambda: not service.writer.pending)
+        await service.shutdown()
+        stats = service.writer.stats()
+        assert stats["failed_flushes"] == 2
+        assert stats["dead_letters"] == 0
+        assert len(api.post_ids()) == 1
+
+    asyncio.run(run())
+
+def test_rejected_write_is_dead_lettered_and_does_not_block_the_queue(tmp_path):
+    async def run():
+        api = FakeGistAPI()
+        api.reject = lambda files: 422 if any("Rejected" in (f or {}).get("content", "") for f in files.values()) else None
+        service = make_service(api, tmp_path)
+        await service.startup()
+        rejected = await service.create_blog(post("Rejected"))
+        await until(lambda: not service.writer.pending)
+        assert [p["title"] for p in (await service.get_post_map()).values()] == []
+        accepted = await service.create_blog(post("Accepted"))
+        await until(lambda: not service.writer.pending)
+        await service.shutdown()
+
+        assert api.post_ids() == {accepted.id}
+        stats = service.writer.stats()
+        assert stats["queue_depth"] == 0
+        assert stats["dead_letters"] == 1
+        assert stats["last_dead_letter"]["id"] == rejected.id
+        dead = WriteAheadLog(stats["dead_letter_path"]).read()
+        assert [(entry["id"], entry["post"]["title"]) for entry in dead] == [(rejected.id, "Rejected")]
+        assert "422" in dead[0]["error"]
+        # Reads stop showing the rejected post (its id was free again for the next one)
+        assert [p["title"] for p in (await service.get_post_map()).values()] == ["Accepted"]
+
+    asyncio.run(run())
+
+def test_rejected_batch_is_split_so_only_the_bad_mutation_is_dead_lettered(tmp_path):
+    async def run():
+        written = []
+
+        async def flush(batch):
+            if any(m["post"]["title"] == "bad" for m in batch):
+                raise RejectedWriteError("GitHub responded 422")
+            written.extend(m["id"] for m in batch)
+
+        writer = GistWriter(WriteAheadLog(str(tmp_path / "wal.jsonl")), flush, coalesce_window=0, retry_delay=0)
+        for post_id, title in (("1", "good"), ("2", "bad"), ("3", "good")):
+            await writer.submit("upsert", post_id, {"title": title})
+        await writer._flush()
+
+        assert written == ["1", "3"]
+        assert writer.pending == []
+        assert [entry["id"] for entry in writer.dead_letters.read()] == ["2"]
+        assert WriteAheadLog(str(tmp_path / "wal.jsonl")).read() == []
+
+    asyncio.run(run())
+
+def test_submit_during_a_flush_stays_in_the_write_ahead_log(tmp_path):
+    async def run():
+        flushing = asyncio.Event()
+        release_flush = asyncio.Event()
+
+        async def flush(batch):
+            flushing.set()
+            await release_flush.wait()
+
+        wal = WriteAheadLog(str(tmp_path / "wal.jsonl"))
+        writer = GistWriter(wal, flush, coalesce_window=0, retry_delay=0.01)
+        # Hold the rewrite in its thread, so a submit's append could finish before it
+        rewriting, release_rewrite = threading.Event(), threading.Event()
+        rewrite = wal.rewrite
+
+        def slow_rewrite(mutations):
+            rewriting.set()
+            release_rewrite.wait(5)
+            rewrite(mutations)
+
+        wal.rewrite = slow_rewrite
+        writer.start()
+        await writer.submit("upsert", "1", {"id": "1"})
+        await flushing.wait()
+        release_flush.set()
+        await asyncio.to_thread(rewriting.wait, 5)
+
+        second = asyncio.create_task(writer.submit("upsert", "2", {"id": "2"}))
+        await asyncio.sleep(0.05)
+        release_rewrite.set()
+        await second
+        assert [m["id"] for m in wal.read()] == ["2"]
+        assert [m["id"] for m in writer.pending] == ["2"]
+        await writer.stop()
+        assert wal.read() == []
+
+    asyncio.run(run())
@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useState } from 'react';
 import ReactMarkdown from 'react-markdown';
 
 interface BlogPost {
@@ -14,6 +14,18 @@ interface BlogPost {
 
 type BlogPostsResponse = Record<string, BlogPost>;
 
+interface PostChange {
+  version: number;
+  created: BlogPost[];
+  updated: BlogPost[];
+  deleted: string[];
+}
+
+const API_URL = 'http://localhost:8000/api/blog-posts';
+
+const byDateDesc = (a: BlogPost, b: BlogPost): number =>
+  new Date(b.date).getTime() - new Date(a.date).getTime();
+
 interface BodyProps {
   refreshTrigger?: number;
 }
@@ -22,29 +34,62 @@ const Body = ({ refreshTrigger = 0 }: BodyProps): React.ReactElement => {
   const [posts, setPosts] = useState<BlogPost[]>([]);
   const [loading, setLoading] = useState<boolean>(true);
   const [error, setError] = useState<string | null>(null);
+  // Change-stream version of the first listing; null until it has loaded
+  const [changesSince, setChangesSince] = useState<string | null>(null);
 
-  useEffect(() => {
-    const fetchPosts = async () => {
-      try {
-        setLoading(true);
-        const response = await fetch('http://localhost:8000/api/blog-posts/');
-        if (!response.ok) {
-          throw new Error(`Failed to fetch posts: ${response.status}`);
-        }
-        const data: BlogPostsResponse = await response.json();
-        const postsArray = Object.values(data).sort((a, b) => 
-          new Date(b.date).getTime() - new Date(a.date).getTime()
-        );
-        setPosts(postsArray);
-        setError(null);
-      } catch (err) {
-        setError((err as Error).message);
-      } finally {
-        setLoading(false);
+  const fetchPosts = useCallback(async () => {
+    try {
+      setLoading(true);
+      const response = await fetch(`${API_URL}/`);
+      if (!response.ok) {
+        throw new Error(`Failed to fetch posts: ${response.status}`);
       }
-    };
+      const data: BlogPostsResponse = await response.json();
+      setPosts(Object.values(data).sort(byDateDesc));
+      // The stream resumes from here once; later reloads keep the open stream
+      const version = response.headers.get('X-Changes-Version') ?? '';
+      setChangesSince((current) => current ?? version);
+      setError(null);
+    } catch (err) {
+      setError((err as Error).message);
+    } finally {
+      setLoading(false);
+    }
+  }, []);
+
+  useEffect(() => {
     fetchPosts();
-  }, [refreshTrigger]);
+  }, [fetchPosts, refreshTrigger]);
+
+  // Live updates: only the posts named in a change are fetched again
+  useEffect(() => {
+    if (changesSince === null) {
+      return undefined;
+    }
+    // Replay what changed after the listing was built, not just what changes after connecting
+    const query = changesSince ? `?since=${encodeURIComponent(changesSince)}` : '';
+    const source = new EventSource(`${API_URL}/changes${query}`);
+    const applyChange = async (event: MessageEvent) => {
+      const change: PostChange = JSON.parse(event.data);
+      const changedIds = [...change.created, ...change.updated].map((post) => String(post.id));
+      const fetched = await Promise.all(changedIds.map(async (id) => {
+        // Refetches prompted by the change stream are not reader views
+        const response = await fetch(`${API_URL}/${id}?count=false`);
+        return response.ok ? ((await response.json()) as BlogPost) : null;
+      }));
+      const replaced = new Map<string, BlogPost>();
+      fetched.forEach((post, index) => post && replaced.set(changedIds[index], post));
+      const removed = new Set([...change.deleted, ...changedIds.filter((id) => !replaced.has(id))]);
+      setPosts((current) => {
+        const kept = current.filter((post) => !removed.has(String(post.id)) && !replaced.has(String(post.id)));
+        return [...kept, ...replaced.values()].sort(byDateDesc);
+      });
+    };
+    source.addEventListener('change', (event) => { applyChange(event as MessageEvent); });
+    // The server no longer has the changes since our version: reload everything
+    source.addEventListener('reset', () => { fetchPosts(); });
+    return () => source.close();
+  }, [changesSince, fetchPosts]);
 
   const formatDate = (dateString: string): string => {
     const date = new Date(dateString);